@@ -2,6 +2,7 @@ import functools
 import random
 from abc import ABC, abstractmethod
 import base_rings
+import lattices
 from properties import *
 
 def convert_subrings(method):
@@ -20,6 +21,8 @@ def convert_subrings(method):
 
 
 class BaseRing(ABC):
+    numpy_dtype = object
+
     def __init__(self, canonical_proper_subrings=(), name=None, **properties):
         self.canonical_subrings = list(canonical_proper_subrings)
         self.name = name or 'A' + str(random.randint(0, 1000000))
@@ -94,6 +97,17 @@ class BaseRing(ABC):
     def element_str(element):
         pass
 
+    def to_numpy(self, element):
+        """ Entry of a NumPy array of dtype `numpy_dtype` representing the element. Rings without a machine type keep elements themselves. """
+        return element
+
+    def from_numpy(self, value):
+        return value
+
+    def normalize_numpy(self, array):
+        """ Brings the result of NumPy arithmetic back to canonical representatives (e.g. reduction modulo p). """
+        return array
+
     def info(self):
         print(self.name + ': commutative ring with 1')
         print(', '.join(filter(lambda x: self.properties[x] and x != 'exact_values', self.properties().keys())))
@@ -219,6 +233,9 @@ class GroupElement(ABC):
     def __eq__(self, other):
         return self.group.eq(self, other)
 
+    def __hash__(self):
+        return self.group.hash(self)
+
     def __invert__(self):
         return self.group.inv(self)
 
@@ -270,6 +287,9 @@ class Group(ABC):
     def eq(self, a, b):
         pass
 
+    def hash(self, a):
+        raise TypeError(f"Elements of {self} have no canonical form to hash.")
+
     def add(self, a, b):
         raise NotImplementedError("Additive operations are reserved for abelian groups")
 
@@ -319,8 +339,37 @@ class AbelianGroup(Group, ABC):
 
 class FGAbelianGroup(AbelianGroup, FGGroup, ABC):
     def __init__(self, generators, name=None, **properties):
-        AbelianGroup.__init__(self, name, **properties)
-        FGGroup.__init__(self, generators, name, **properties)
+        FGGroup.__init__(self, generators, name, abelian=True, **properties)
+
+    def invariant_factors(self, relations=None):
+        """
+            Invariant factors of Z^n (n generators) modulo `relations`, the relations of the group by default.
+            A relation is a vector of exponents or a sequence of generators and (generator, exponent) pairs.
+            The group is Z/d_1 x ... x Z/d_k with d_1 | d_2 | ..., free summands are reported as 0.
+        """
+        if relations is None:
+            relations = getattr(self, 'relations', [])
+        rows = [self._exponent_vector(r) for r in relations]
+        factors = lattices.invariant_factors(rows, self.no_generators)
+        factors += [0] * (self.no_generators - len(factors))
+        return [d for d in factors if d != 1]
+
+    def _exponent_vector(self, relation):
+        if all(isinstance(n, int) for n in relation):
+            return list(relation)
+        vector = [0] * self.no_generators
+        for item in relation:
+            g, n = item if isinstance(item, tuple) else (item, 1)
+            vector[self.generators.index(g)] += n
+        return vector
+
+    def structure(self, relations=None):
+        factors = self.invariant_factors(relations)
+        rank = factors.count(0)
+        summands = ['Z/' + str(d) for d in factors if d]
+        if rank:
+            summands.append('Z' + ('^' + str(rank) if rank > 1 else ''))
+        return ' x '.join(summands) or '1'
 
 
 class OpenSet(ABC):
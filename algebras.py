@@ -1,6 +1,12 @@
 from polynomials import *
 import modules
 import arrows
+import groebner
+import interpolation
+import lattices
+import numeric
+import scipy.linalg
+import scipy.sparse
 
 
 class Algebra(BaseRing):
@@ -46,7 +52,7 @@ class Algebra(BaseRing):
             element = self.base_ring.from_canonical_subring(element)
         if element.ring == self:
             return element
-        return self(Polynomial.from_constant(element, None, self.order))
+        return self(Polynomial.from_constant(element, self.no_generators, self.order))
 
     def info(self):
         print(self.name + ': ' + str(self.base_ring) + '-algebra')
@@ -125,19 +131,245 @@ class QuotientAlgebra(AlgebraFP):
 
 
 class QuotientKAlgebra(QuotientAlgebra, KAlgebraFP):
-    def __init__(self, ideal, name=None):
+    """
+        Quotient of a polynomial algebra over a field. If the ideal is zero-dimensional, elements are coefficient
+        vectors (NumPy arrays) w.r.t. the standard monomials and multiplication uses precomputed multiplication
+        matrices, so no division is done after the algebra is set up.
+    """
+    def __init__(self, ideal, name=None, normal_form_cache_size=4096):
         QuotientAlgebra.__init__(self, ideal, name)
-        KAlgebraFP.__init__(self, name, ideal.ring, ideal.ring.generators, ideal.generators, order=ideal.order)
+        self.set_normal_form_cache_size(normal_form_cache_size)
 
     def __call__(self, polynomial):
+        if isinstance(polynomial, np.ndarray):
+            return BaseElement(self, self.base_ring.normalize_numpy(polynomial))
+        if isinstance(polynomial, BaseElement):
+            polynomial = polynomial.value
         if isinstance(polynomial, Monomial):
-            return BaseElement(self, Polynomial(polynomial, order=self.order))
-        polynomial.order = self.order
-        if self.ideal.groebner_basis is not None:
-            polynomial = self.ideal.groebner_reminder(polynomial)
+            polynomial = Polynomial(polynomial, order=self.order)
+        polynomial = self.ideal.ring(polynomial)
+        if self.is_finite_dimensional:
+            return BaseElement(self, self.vector(polynomial))
+        return BaseElement(self, self.ideal.ring.from_terms(self.normal_form(polynomial)).value)
+
+    @functools.cached_property
+    def groebner_basis(self):
+        """ Reduced Groebner basis of the ideal as dicts of terms, computed once and pinned to the algebra. """
+        self.ideal.to_groebner()
+        return self.ideal.groebner_terms()
+
+    def set_normal_form_cache_size(self, maxsize):
+        """ Bounds the LRU cache of normal forms of monomials (None for unbounded), the cache is cleared. """
+        self.monomial_normal_form = functools.lru_cache(maxsize=maxsize)(self._monomial_normal_form)
+
+    def normal_form_cache_info(self):
+        return self.monomial_normal_form.cache_info()
+
+    @property
+    def normal_form_hit_rate(self):
+        info = self.normal_form_cache_info()
+        return info.hits / (info.hits + info.misses) if info.hits + info.misses else 0.
+
+    def _monomial_normal_form(self, exponents):
+        if not self.is_finite_dimensional:
+            return self.ideal.engine.normal_form({exponents: self.base_ring.one}, self.groebner_basis)
+        if exponents in self._standard_index:
+            v = self._zero_vector()
+            v[self._standard_index[exponents]] = self.base_ring.to_numpy(self.base_ring.one)
+            return v
+        v = self.monomial_normal_form((0,) * self.no_generators)
+        for i, e in enumerate(exponents):
+            v = self._power_apply(i, e, v)
+        return v
+
+    def _power_apply(self, i, e, v):
+        """ M_i^e @ v for the multiplication matrix M_i of the i-th generator: e products with v while e is at most
+            the dimension, square-and-multiply otherwise. """
+        M = self.multiplication_matrices[i]
+        if e <= self.dimension:
+            for _ in range(e):
+                v = self._product(M, v)
+            return v
+        while e:
+            if e & 1:
+                v = self._product(M, v)
+            e >>= 1
+            if e:
+                M = self._product(M, M)
+        return v
+
+    def normal_form(self, polynomial):
+        """ Normal form of an element of the polynomial algebra as a dict of terms, summed from cached normal forms of its monomials. """
+        engine, result = self.ideal.engine, {}
+        for t, c in polynomial.value.terms.items():
+            result = engine.add(result, engine.scale(self.monomial_normal_form(t), c))
+        return result
+
+    @functools.cached_property
+    def standard_monomials(self):
+        """ Exponents of monomials outside the leading ideal in increasing order, None if the quotient is infinite-dimensional. """
+        engine = self.ideal.engine
+        leads = [engine.leading_term(g) for g in self.groebner_basis]
+        n = self.no_generators
+        for i in range(n):
+            if not any(lt[i] == sum(lt) > 0 for lt in leads):
+                return None
+        basis, frontier, seen = [], [(0,) * n], {(0,) * n}
+        while frontier:
+            m = frontier.pop()
+            if any(engine.divides(lt, m) for lt in leads):
+                continue
+            basis.append(m)
+            for i in range(n):
+                m_ = m[:i] + (m[i] + 1,) + m[i+1:]
+                if m_ not in seen:
+                    seen.add(m_)
+                    frontier.append(m_)
+        return sorted(basis, key=engine.sort_key)
+
+    @property
+    def is_finite_dimensional(self):
+        return self.standard_monomials is not None
+
+    @functools.cached_property
+    def dimension(self):
+        if not self.is_finite_dimensional:
+            return None
+        return len(self.standard_monomials)
+
+    @functools.cached_property
+    def _standard_index(self):
+        return {m: i for i, m in enumerate(self.standard_monomials)}
+
+    def _zero_vector(self):
+        return np.full(self.dimension, self.base_ring.to_numpy(self.base_ring.zero), dtype=self.base_ring.numpy_dtype)
+
+    def _terms_to_vector(self, terms):
+        v = self._zero_vector()
+        for t, c in terms.items():
+            v[self._standard_index[t]] = self.base_ring.to_numpy(c)
+        return v
+
+    @functools.cached_property
+    def multiplication_matrices(self):
+        """ Matrix of multiplication by each generator in the basis of standard monomials, columns are images of basis vectors. """
+        engine, G = self.ideal.engine, self.groebner_basis
+        K = self.base_ring
+        matrices = []
+        for i in range(self.no_generators):
+            columns = []
+            for m in self.standard_monomials:
+                xm = m[:i] + (m[i] + 1,) + m[i+1:]
+                columns.append(self._terms_to_vector(engine.normal_form({xm: K.one}, G)))
+            matrices.append(np.array(columns, dtype=K.numpy_dtype).T.reshape(self.dimension, self.dimension))
+        return matrices
+
+    def vector(self, polynomial):
+        """ Coefficient vector of the normal form, reduced after every term so that int64 sums of residues cannot wrap. """
+        K, v = self.base_ring, self._zero_vector()
+        for t, c in polynomial.value.terms.items():
+            v = K.normalize_numpy(v + self.monomial_normal_form(t) * K.to_numpy(c))
+        return v
+
+    def _product(self, A, B):
+        """ Normalized A @ B, computed with Python ints when the int64 sums of products could overflow. """
+        if A.dtype.kind == 'i' and not Matrix._fits_int64(Matrix._max_abs(A), Matrix._max_abs(B), A.shape[-1]):
+            return self.base_ring.normalize_numpy(A.astype(object) @ B.astype(object))
+        return self.base_ring.normalize_numpy(A @ B)
+
+    def multiplication_matrix(self, element):
+        """ Matrix of multiplication by the element. """
+        K = self.base_ring
+        identity = np.array([[K.to_numpy(K.one if k == l else K.zero) for l in range(self.dimension)] for k in range(self.dimension)],
+                            dtype=K.numpy_dtype).reshape(self.dimension, self.dimension)
+        return self.evaluate_on(element, identity)
+
+    def evaluate_on(self, element, V):
+        """ element(M_1, ..., M_n) @ V for the multiplication matrices M_i, by Horner's scheme in one variable after the other. """
+        K = self.base_ring
+        terms = {m: c for m, c in zip(self.standard_monomials, element.value) if not K.maybe_zero_check(K.from_numpy(c))}
+        return self._horner(terms, V, 0)
+
+    def _horner(self, terms, V, i):
+        normalize = self.base_ring.normalize_numpy
+        if not terms:
+            return np.full_like(V, self.base_ring.to_numpy(self.base_ring.zero))
+        if i == self.no_generators:
+            return normalize(V * next(iter(terms.values())))
+        groups = {}
+        for m, c in terms.items():
+            groups.setdefault(m[i], {})[m] = c
+        result = self._horner(groups[max(groups)], V, i + 1)
+        for k in range(max(groups) - 1, -1, -1):
+            result = self._product(self.multiplication_matrices[i], result)
+            if k in groups:
+                result = normalize(result + self._horner(groups[k], V, i + 1))
+        return result
+
+    def to_polynomial(self, element):
+        """ Normal form of the element as an element of the polynomial algebra. """
+        if not self.is_finite_dimensional:
+            return self.ideal.ring(element.value)
+        K = self.base_ring
+        return self.ideal.ring.from_terms({m: K.from_numpy(c) for m, c in zip(self.standard_monomials, element.value)
+                                           if not K.maybe_zero_check(K.from_numpy(c))})
+
+    def solve(self, refine=True, steps=5, tol=1e-6, seed=None):
+        """
+            Points of the (zero-dimensional) variety over C as an array of shape (no_points, no_generators).
+            Eigenvectors of the transposed multiplication matrix of a random linear form are the evaluation
+            functionals at the points; coordinates are read from the multiplication matrices of the generators.
+            With `refine`, points are polished by Newton iterations on the generators of the ideal.
+        """
+        if not self.is_finite_dimensional:
+            raise ValueError("Only zero-dimensional ideals have finitely many solutions.")
+        C = CFloating()
+        to_complex = lambda c: C.from_canonical_subring(self.base_ring.from_numpy(c)).value
+        if self.base_ring.numpy_dtype == object:
+            matrices = [np.vectorize(to_complex, otypes=[np.complex128])(M) for M in self.multiplication_matrices]
+        elif self.base_ring.properties['exact_values']:
+            raise ValueError(f"Solutions over {self.base_ring} are not approximated by complex numbers.")
         else:
-            polynomial = self.ideal.reminder_wrt_family(polynomial, self.ideal.generators)
-        return BaseElement(self, polynomial)
+            matrices = [M.astype(np.complex128) for M in self.multiplication_matrices]
+        if self.dimension == 0:
+            return np.zeros((0, self.no_generators), dtype=np.complex128)
+
+        weights = np.random.default_rng(seed).normal(size=self.no_generators)
+        _, W = np.linalg.eig(sum(w * M for w, M in zip(weights, matrices)).T)
+        k = np.argmax(np.abs(W), axis=0)
+        columns = np.arange(self.dimension)
+        points = np.stack([(M.T @ W)[k, columns] / W[k, columns] for M in matrices], axis=-1)
+        if refine:
+            system = numeric.PolynomialSystem.from_polynomials([g for g in self.ideal.generators if g != self.ideal.ring.zero],
+                                                               lambda c: C.from_canonical_subring(c).value)
+            points = system.newton(points, steps)
+        return numeric.distinct_points(points, tol)
+
+    def add(self, a, b):
+        if not self.is_finite_dimensional:
+            return Algebra.add(self, a, b)
+        return self(a.value + b.value)
+
+    def mul(self, a, b):
+        if not self.is_finite_dimensional:
+            return Algebra.mul(self, a, b)
+        return self(self.evaluate_on(a, b.value))
+
+    def neg(self, a):
+        if not self.is_finite_dimensional:
+            return Algebra.neg(self, a)
+        return self(-a.value)
+
+    def eq(self, a, b):
+        if not self.is_finite_dimensional:
+            return Algebra.eq(self, a, b)
+        K = self.base_ring
+        return all(K.eq(K.from_numpy(x), K.from_numpy(y)) for x, y in zip(a.value, b.value))
+
+    def element_str(self, element):
+        if not self.is_finite_dimensional:
+            return super().element_str(element)
+        return str(self.to_polynomial(element)) + ' + ' + str(self.ideal)
 
 
 class PolynomialAlgebra(AlgebraFP):
@@ -154,7 +386,7 @@ class PolynomialAlgebra(AlgebraFP):
                           variable_names + base_ring.generators, order=order)
             return
 
-        super().__init__(name, base_ring, variable_names, [], order)
+        AlgebraFP.__init__(self, name, base_ring, variable_names, [], order)
         if self.no_generators == 1 and self.base_ring.properties['field']:
             self.properties['pid'] = True
         if self.base_ring.properties['ufd']:
@@ -167,8 +399,20 @@ class PolynomialAlgebra(AlgebraFP):
     def element_str(self, element):
         return str(element.value)
 
+    def from_terms(self, terms):
+        return self(Polynomial.from_terms(terms, self.no_generators, self.base_ring, self.generators, self.order))
+
+    @functools.cached_property
+    def groebner_engine(self):
+        return groebner.GroebnerEngine(self.base_ring, self.order.key)
+
     def truediv(self, f, g):
-        return self(f.value/g.value)
+        if g.value.monomial:
+            return self(f.value/g.value)
+        quotients, remainder = self.groebner_engine.divide(f.value.terms, [g.value.terms])
+        if remainder:
+            raise ValueError(f"{f} is not divisible by {g}")
+        return self.from_terms(quotients[0])
 
     def lcm_lead(self, f, g):
         leading_f = f.value.leading_monomial()
@@ -185,47 +429,109 @@ class PolynomialAlgebra(AlgebraFP):
 
 class KPolynomialAlgebra(PolynomialAlgebra, QuotientKAlgebra):
     def __init__(self, field, no_variables, variable_names=None, order=grlex):
+        assert field.properties['field']
         PolynomialAlgebra.__init__(self, field, no_variables, variable_names, order)
-        QuotientKAlgebra.__init__(self, modules.Ideal.zero_ideal(self), name=self.name)
+        self.ideal = modules.Ideal.zero_ideal(self)
+
+    def __call__(self, polynomial):
+        return Algebra.__call__(self, polynomial)
+
+    @property
+    def standard_monomials(self):
+        return None
 
     def multi_long_div(self, f, g_list):
-        a = [copy.copy(self.zero)]*len(g_list)
-        r = copy.copy(self.zero)
-        p = self(Polynomial(*f.value.monomials))
-        while not p == self.zero:
-            i = 0
-            occurred = False
-            while i < len(g_list) and not occurred:
-                if g_list[i] != self.zero and p.value.leading_monomial().divisible_by(g_list[i].value.leading_monomial()):
-                    occurred = True
-                    quotient = self(p.value.leading_monomial() / g_list[i].value.leading_monomial())
-                    a[i] = a[i] + quotient
-                    p = p - g_list[i] * quotient
-                else:
-                    i += 1
-            if not occurred:
-                r = r + self(Polynomial(p.value.leading_monomial()))
-                p = p - self(Polynomial(p.value.leading_monomial()))
-        return a, r
+        divisors = [(i, g.value.terms) for i, g in enumerate(g_list) if g != self.zero]
+        quotients, r = self.groebner_engine.divide(f.value.terms, [g for _, g in divisors])
+        a = [self.zero] * len(g_list)
+        for (i, _), q in zip(divisors, quotients):
+            a[i] = self.from_terms(q)
+        return a, self.from_terms(r)
 
 
 class Matrix:
-    def __init__(self, coefficients):
-        self.coefficients = coefficients
+    """
+        Dense matrix over a ring. Over Z, R, C and prime fields the entries are kept in a NumPy array (int64, or
+        object holding Python ints when int64 could overflow, float64, complex128, int64 modulo p) and arithmetic
+        runs on it; entries are boxed to ring elements only when they are accessed.
+    """
+    def __init__(self, coefficients, ring=None):
+        if isinstance(coefficients, np.ndarray):
+            self.ring = ring
+            self.array = ring.normalize_numpy(coefficients)
+            self._coefficients = None
+            self.no_rows, self.no_columns = coefficients.shape
+            return
+        self._coefficients = coefficients
         self.no_rows = len(coefficients)
         self.no_columns = len(coefficients[0])
-        self.ring = coefficients[0][0].ring
+        self.ring = ring or coefficients[0][0].ring
+        self.array = None
+        if Matrix.has_numpy_backend(self.ring):
+            self.array = Matrix._to_array([[self.ring.to_numpy(c) for c in row] for row in coefficients], self.ring.numpy_dtype)
+
+    @staticmethod
+    def has_numpy_backend(ring):
+        return ring.numpy_dtype is not object or isinstance(ring, (ZRing, FpField))
+
+    @staticmethod
+    def _to_array(values, dtype):
+        if dtype == np.int64 and any(abs(int(v)) >= Matrix._int64_bound for row in values for v in row):
+            dtype = object
+        return np.array(values, dtype=dtype)
+
+    _int64_bound = 2**62
+
+    @staticmethod
+    def _fits_int64(*bounds):
+        return functools.reduce(lambda x, y: x * y, [int(b) for b in bounds], 1) < Matrix._int64_bound
+
+    @staticmethod
+    def _max_abs(array):
+        return int(np.max(np.abs(array), initial=0))
+
+    def _integer_operands(self, other, bound):
+        """ Operands for integer arithmetic, switched to Python ints when the result could overflow int64. """
+        if self.array.dtype != object and other.array.dtype != object and bound < Matrix._int64_bound:
+            return self.array, other.array
+        return self.array.astype(object), other.array.astype(object)
+
+    @property
+    def coefficients(self):
+        if self._coefficients is None:
+            self._coefficients = [[self.ring.from_numpy(x) for x in row] for row in self.array]
+        return self._coefficients
 
     def __add__(self, other):
         assert self.no_rows == other.no_rows and self.no_columns == other.no_columns
+        if self.array is not None and other.array is not None and self.ring == other.ring:
+            a, b = self.array, other.array
+            if a.dtype.kind in 'iO':
+                a, b = self._integer_operands(other, self._max_abs(a) + self._max_abs(b))
+            return Matrix(a + b, self.ring)
         return Matrix([[self.coefficients[i][j] + other.coefficients[i][j] for j in range(self.no_columns)] for i in range(self.no_rows)])
 
     def __mul__(self, scalar):
+        if isinstance(scalar, int):
+            scalar = self.ring.from_canonical_subring(ZRing()(scalar))
+        if self.array is not None:
+            if scalar.ring != self.ring:
+                scalar = self.ring.from_canonical_subring(scalar)
+            value = self.ring.to_numpy(scalar)
+            a = self.array
+            if a.dtype.kind == 'i' and not self._fits_int64(self._max_abs(a), abs(int(value)) + 1):
+                a = a.astype(object)
+            return Matrix(a * value, self.ring)
         return Matrix([[scalar * self.coefficients[i][j] for j in range(self.no_columns)] for i in range(self.no_rows)])
 
     def __matmul__(self, other):
         assert self.no_columns == other.no_rows
-        return Matrix([[sum([self.coefficients[i][k] * other.coefficients[k][j] for k in range(self.no_columns)], self.ring.one) for j in range(other.no_columns)] for i in range(self.no_rows)])
+        if self.array is not None and other.array is not None and self.ring == other.ring:
+            a, b = self.array, other.array
+            if a.dtype.kind in 'iO':
+                a, b = self._integer_operands(other, self._max_abs(a) * self._max_abs(b) * max(self.no_columns, 1))
+            return Matrix(a @ b, self.ring)
+        return Matrix([[sum([self.coefficients[i][k] * other.coefficients[k][j] for k in range(self.no_columns)], self.ring.zero) for j in range(other.no_columns)] for i in range(self.no_rows)])
 
     def vanishing_ideal_of_coefs(self):
         return modules.Ideal([self.coefficients[i][j] for i in range(self.no_rows) for j in range(self.no_columns)], name='vanishing ideal of coefficients')
@@ -239,27 +545,385 @@ class Matrix:
             return Matrix([[self.coefficients[i][j] for j in range(self.no_columns) if j in columns] for i in range(self.no_rows) if i in rows])
         return Matrix([[self.coefficients[i][j] for j in range(self.no_columns) if j not in columns] for i in range(self.no_rows) if i not in rows])
 
-    def det(self):
+    def _pivot(self, entries, r, c):
+        rows = [i for i in range(r, self.no_rows) if not self.ring.maybe_zero_check(entries[i][c])]
+        if not rows:
+            return None
+        if not self.ring.properties['exact_values']:
+            return max(rows, key=lambda i: abs(entries[i][c].value))
+        return rows[0]
+
+    def _eliminate(self, reduced=False):
+        """
+            Row echelon form by Gaussian elimination over fields and by fraction-free (Bareiss) elimination over
+            integral domains, where every division is exact. Returns entries, pivot columns and the sign of the
+            row permutation. With `reduced` the entries above pivots are eliminated as well; the pivots are then 1
+            over fields and all equal to the last pivot over integral domains.
+        """
+        R = self.ring
+        field = R.properties['field']
+        M = [row[:] for row in self.coefficients]
+        pivots, sign, previous, r = [], 1, R.one, 0
+        for c in range(self.no_columns):
+            if r == self.no_rows:
+                break
+            i = self._pivot(M, r, c)
+            if i is None:
+                continue
+            if i != r:
+                M[r], M[i] = M[i], M[r]
+                sign = -sign
+            p = M[r][c]
+            rows = range(self.no_rows) if reduced else range(r + 1, self.no_rows)
+            if field:
+                if reduced:
+                    M[r] = [R.truediv(x, p) for x in M[r]]
+                    p = R.one
+                for i in rows:
+                    if i == r or R.maybe_zero_check(M[i][c]):
+                        continue
+                    f = R.truediv(M[i][c], p)
+                    M[i] = [R.add(x, R.neg(R.mul(f, y))) for x, y in zip(M[i], M[r])]
+                    M[i][c] = R.zero
+            else:
+                for i in rows:
+                    if i == r:
+                        continue
+                    M[i] = [R.truediv(R.add(R.mul(p, x), R.neg(R.mul(M[i][c], y))), previous) for x, y in zip(M[i], M[r])]
+                previous = p
+            pivots.append(c)
+            r += 1
+        return M, pivots, sign
+
+    def _eliminate_array(self, reduced=False):
+        """ Vectorized counterpart of `_eliminate` on the NumPy backend, rows are updated all at once. """
+        R = self.ring
+        M = self.array.copy()
+        field = R.properties['field']
+        exact = R.properties['exact_values']
+        if isinstance(R, ZRing) and M.dtype != object:
+            hadamard = functools.reduce(lambda x, y: x * y, [int(np.sqrt(np.sum(row.astype(float)**2))) + 1 for row in M], 1)
+            if not self._fits_int64(hadamard, hadamard, 2):
+                M = M.astype(object)
+        if isinstance(R, FpField) and M.dtype != object and not self._fits_int64(R.p, R.p):
+            M = M.astype(object)
+        pivots, sign, previous, r = [], 1, 1, 0
+        for c in range(self.no_columns):
+            if r == self.no_rows:
+                break
+            column = M[r:, c]
+            if exact:
+                nonzero = np.flatnonzero(column != 0)
+                if not nonzero.size:
+                    continue
+                i = r + int(nonzero[0])
+            else:
+                i = r + int(np.argmax(np.abs(column)))
+                if R.maybe_zero_check(R.from_numpy(M[i, c])):
+                    continue
+            if i != r:
+                M[[r, i]] = M[[i, r]]
+                sign = -sign
+            targets = np.array([i for i in (range(self.no_rows) if reduced else range(r + 1, self.no_rows)) if i != r], dtype=int)
+            if isinstance(R, FpField):
+                inverse = pow(int(M[r, c]), -1, R.p)
+                if reduced:
+                    M[r] = M[r] * inverse % R.p
+                    inverse = 1
+                factors = M[targets, c] * inverse % R.p
+                M[targets] = (M[targets] - factors[:, None] * M[r]) % R.p
+            elif field:
+                if reduced:
+                    M[r] = M[r] / M[r, c]
+                factors = M[targets, c] / M[r, c]
+                M[targets] = M[targets] - factors[:, None] * M[r]
+                M[targets, c] = 0
+            else:
+                p = M[r, c]
+                M[targets] = (p * M[targets] - M[targets, c][:, None] * M[r]) // previous
+                previous = p
+            pivots.append(c)
+            r += 1
+        return M, pivots, sign
+
+    def det(self, processes=None):
+        """
+            Determinant. Matrices of polynomials over Z, Q or F_p from 4x4 on are evaluated at points modulo primes
+            and the determinant is interpolated; `processes` runs the evaluations in a process pool.
+        """
         assert self.no_rows == self.no_columns
+        if self.array is not None:
+            return self._det_array()
+        if self._interpolable():
+            entries, scales = self._integral_entries()
+            f = self._interpolate(entries, self.ring.no_generators, processes)
+            return self._from_integral(f, functools.reduce(lambda x, y: x * y, scales, 1))
+        if not self.ring.properties['integral'] or isinstance(self.ring, PolynomialAlgebra):
+            return self._berkowitz_det()
+        M, pivots, sign = self._eliminate()
+        if len(pivots) < self.no_rows:
+            return self.ring.zero
+        if self.ring.properties['field']:
+            det = functools.reduce(self.ring.mul, [M[i][i] for i in range(self.no_rows)], self.ring.one)
+        else:
+            det = M[-1][-1]
+        return det if sign == 1 else self.ring.neg(det)
+
+    _interpolation_size = 4
+
+    def _interpolable(self):
+        if not isinstance(self.ring, PolynomialAlgebra) or self.no_rows < Matrix._interpolation_size:
+            return False
+        base = self.ring.base_ring
+        return isinstance(base, (ZRing, QField)) or isinstance(base, FpField) and base.p >= 2**16
+
+    def _integral_entries(self, common=False):
+        """
+            Entries as dicts {exponent: int} (residues over F_p) and the denominators the rows were scaled by to make
+            them integral; with `common` the whole matrix is scaled by one denominator.
+        """
+        terms = [[c.value.terms for c in row] for row in self.coefficients]
+        if not isinstance(self.ring.base_ring, QField):
+            return [[{e: c.value for e, c in f.items()} for f in row] for row in terms], [1] * self.no_rows
+        if common:
+            scales = [math.lcm(*[c.value[1] for row in terms for f in row for c in f.values()], 1)] * self.no_rows
+        else:
+            scales = [math.lcm(*[c.value[1] for f in row for c in f.values()], 1) for row in terms]
+        return [[{e: c.value[0] * (d // c.value[1]) for e, c in f.items()} for f in row] for row, d in zip(terms, scales)], scales
+
+    def _interpolate(self, entries, no_variables, processes=None):
+        """
+            Determinant of the matrix of integral (over F_p: residue) entries {exponent: int}, interpolated from its
+            values modulo primes at points, as a dict {exponent: int}. `processes` evaluates in a process pool.
+        """
+        base = self.ring.base_ring
+        k = no_variables
+        bounds = [min(sum(max([e[i] for f in line for e in f] + [0]) for line in lines) for lines in (entries, list(zip(*entries))))
+                  for i in range(k)]
+
+        with interpolation.pool(processes) as executor:
+            def evaluate(points, p):
+                return interpolation.evaluate_in_pool(functools.partial(interpolation.det_values, entries, p), points, executor, processes)
+
+            def check(f, p, point):
+                return interpolation.evaluate_polynomial(f, point, p) == int(evaluate(np.array([point]), p)[0]) % p
+
+            if isinstance(base, FpField):
+                return interpolation.modular_interpolate(lambda points: evaluate(points, base.p), k, bounds, base.p, check)
+            return interpolation.integer_interpolate(evaluate, k, bounds, check)
+
+    def _interpolate_charpoly(self, processes=None):
+        """ Coefficients of det(t*I - D*A), D the common denominator, interpolated at once as one polynomial in the
+            variables and t; the coefficient of t^(n - j) is divided by D^j. """
+        entries, scales = self._integral_entries(common=True)
+        k, n = self.ring.no_generators, self.no_rows
+        shifted = [[{e + (0,): -c for e, c in f.items()} for f in row] for row in entries]
+        for i in range(n):
+            shifted[i][i][(0,) * k + (1,)] = 1
+        f = self._interpolate(shifted, k + 1, processes)
+        return [self._from_integral({e[:-1]: c for e, c in f.items() if e[-1] == n - j}, scales[0]**j) for j in range(n + 1)]
+
+    def _from_integral(self, f, scale):
+        R, base = self.ring, self.ring.base_ring
+        if isinstance(base, QField):
+            return R.from_terms({e: base(c, scale) for e, c in f.items()})
+        return R.from_terms({e: base(c) for e, c in f.items()})
+
+    def _berkowitz_det(self):
+        det = self.charpoly()[-1]
+        return det if self.no_rows % 2 == 0 else self.ring.neg(det)
+
+    def _laplace_det(self):
         if self.no_rows == 1:
             return self.coefficients[0][0]
         if self.no_rows == 2:
             return self.coefficients[0][0] * self.coefficients[1][1] - self.coefficients[0][1] * self.coefficients[1][0]
-        return sum([(-1)**i*self.ring.one * self.coefficients[0][i] * self.submatrix(0, i).det() for i in range(self.no_columns)])
+        return sum([self.ring.one * (-1)**i * self.coefficients[0][i] * self.submatrix(0, i)._laplace_det() for i in range(self.no_columns)], self.ring.zero)
+
+    def _det_array(self):
+        R = self.ring
+        if not R.properties['exact_values']:
+            return R.from_numpy(np.linalg.det(self.array))
+        M, pivots, sign = self._eliminate_array()
+        if len(pivots) < self.no_rows:
+            return R.zero
+        if isinstance(R, FpField):
+            det = functools.reduce(lambda x, y: x * y % R.p, [int(M[i, i]) for i in range(self.no_rows)], 1)
+        else:
+            det = int(M[-1, -1])
+        return R.from_numpy(sign * det)
+
+    def charpoly(self, processes=None):
+        """
+            Coefficients [1, c_1, ..., c_n] of det(t*I - self), leading one first, by Berkowitz's algorithm. No division
+            is used, so any commutative ring works (polynomial entries included) with O(n^4) ring operations.
+            Polynomial matrices handled by `det` through interpolation get their coefficients the same way.
+        """
+        assert self.is_square
+        if self._interpolable():
+            return self._interpolate_charpoly(processes)
+        if self.array is not None:
+            return [self.ring.from_numpy(x) for x in self._charpoly_array()]
+        R = self.ring
+        if isinstance(R, PolynomialAlgebra):
+            # sparse term dicts are much cheaper to multiply than Polynomial objects
+            engine = R.groebner_engine
+            minus_one = R.base_ring.neg(R.base_ring.one)
+            entries = [[c.value.terms for c in row] for row in self.coefficients]
+            c = Matrix._berkowitz(entries, engine.add, engine.mul, lambda f: engine.scale(f, minus_one), {},
+                                  {(0,) * R.no_generators: R.base_ring.one})
+            return [R.from_terms(f) for f in c]
+        return Matrix._berkowitz(self.coefficients, R.add, R.mul, R.neg, R.zero, R.one)
+
+    @staticmethod
+    def _berkowitz(A, add, mul, neg, zero, one):
+        def dot(row, vector):
+            return functools.reduce(add, [mul(x, y) for x, y in zip(row, vector)], zero)
+
+        c = [one]
+        for r in range(len(A)):
+            column = [one, neg(A[r][r])]
+            v = [A[i][r] for i in range(r)]
+            for k in range(r):
+                column.append(neg(dot(A[r][:r], v)))
+                if k < r - 1:
+                    v = [dot(A[i][:r], v) for i in range(r)]
+            c = [dot([column[i - j] for j in range(max(0, i - len(column) + 1), min(i, len(c) - 1) + 1)],
+                     c[max(0, i - len(column) + 1):min(i, len(c) - 1) + 1]) for i in range(r + 2)]
+        return c
+
+    def _charpoly_array(self):
+        R = self.ring
+        A = self.array.astype(object) if self.array.dtype.kind == 'i' else self.array
+        reduce = (lambda x: x % R.p) if isinstance(R, FpField) else (lambda x: x)
+        c = np.ones(1, dtype=A.dtype)
+        for r in range(self.no_rows):
+            column = [1, -A[r, r]]
+            v = A[:r, r]
+            for k in range(r):
+                column.append(reduce(-(A[r, :r] @ v)))
+                if k < r - 1:
+                    v = reduce(A[:r, :r] @ v)
+            c = reduce(np.convolve(np.array(column, dtype=A.dtype), c)[:r + 2])
+        return c
+
+    def rank(self):
+        if self.array is not None:
+            if not self.ring.properties['exact_values']:
+                return int(np.linalg.matrix_rank(self.array))
+            return len(self._eliminate_array()[1])
+        return len(self._eliminate()[1])
+
+    def row_echelon(self):
+        if self.array is not None:
+            return Matrix(self._eliminate_array()[0], self.ring)
+        return Matrix(self._eliminate()[0])
+
+    def nullspace(self):
+        """ Basis of the kernel as a list of column vectors; over integral domains the vectors have entries in the ring. """
+        if self.array is not None and not self.ring.properties['exact_values']:
+            kernel = scipy.linalg.null_space(self.array)
+            return [Matrix(kernel[:, [i]], self.ring) for i in range(kernel.shape[1])]
+        if self.array is not None:
+            M, pivots, _ = self._eliminate_array(reduced=True)
+            M = [[self.ring.from_numpy(x) for x in row] for row in M]
+        else:
+            M, pivots, _ = self._eliminate(reduced=True)
+        d = M[len(pivots) - 1][pivots[-1]] if pivots else self.ring.one
+        basis = []
+        for f in range(self.no_columns):
+            if f in pivots:
+                continue
+            vector = [self.ring.zero] * self.no_columns
+            vector[f] = d
+            for i, c in enumerate(pivots):
+                vector[c] = self.ring.neg(M[i][f])
+            basis.append(Matrix([[x] for x in vector]))
+        return basis
+
+    def _integer_rows(self):
+        assert isinstance(self.ring, ZRing), "Hermite and Smith normal forms are implemented over Z"
+        return [[int(x) for x in row] for row in self.array]
+
+    def _from_integer_rows(self, rows, no_rows, no_columns):
+        rows = rows + [[0] * no_columns for _ in range(no_rows - len(rows))]
+        return Matrix(Matrix._to_array(rows, np.int64).reshape(no_rows, no_columns), self.ring)
+
+    def hermite_form(self, transform=False):
+        """
+            Row-style Hermite normal form H over Z (zero rows last), or (H, U) with U unimodular and U*self = H.
+            Matrices of full column rank are reduced modulo their determinant, so entries stay bounded by it.
+        """
+        rows = self._integer_rows()
+        if transform:
+            H, U = lattices.hermite_normal_form(rows, self.no_columns, transform=True)
+            return self._from_integer_rows(H, self.no_rows, self.no_columns), self._from_integer_rows(U, self.no_rows, self.no_rows)
+        return self._from_integer_rows(lattices.hermite_normal_form(rows, self.no_columns), self.no_rows, self.no_columns)
+
+    def smith_form(self, transform=False):
+        """ Smith normal form S over Z, or (S, U, V) with U, V unimodular and U*self*V = S. """
+        rows = self._integer_rows()
+        if transform:
+            S, U, V = lattices.smith_normal_form(rows, self.no_columns, transform=True)
+            return (self._from_integer_rows(S, self.no_rows, self.no_columns), self._from_integer_rows(U, self.no_rows, self.no_rows),
+                    self._from_integer_rows(V, self.no_columns, self.no_columns))
+        return self._from_integer_rows(lattices.smith_normal_form(rows, self.no_columns), self.no_rows, self.no_columns)
+
+    def invariant_factors(self):
+        """ Diagonal entries d_1 | d_2 | ... of the Smith normal form over Z. """
+        return [self.ring(d) for d in lattices.invariant_factors(self._integer_rows(), self.no_columns)]
 
     def __str__(self):
         return '\n'.join(['|' + ', '.join([str(self.coefficients[i][j]) for j in range(self.no_columns)]) + '|' for i in range(self.no_rows)])
 
     def __pow__(self, power):
         assert self.no_rows == self.no_columns
+        if self.no_rows > 1 and power.bit_length() > 2 * self.no_rows and self.ring.properties['exact_values']:
+            return self._cayley_hamilton_power(power)
         if power == 0:
-            return Matrix([[self.ring.one if i == j else self.ring.zero for j in range(self.no_columns)] for i in range(self.no_rows)])
+            return self.identity_matrix(self.no_rows)
         if power == 1:
             return self
         if power % 2 == 0:
             return (self@self)**(power//2)
         return self@(self@self)**((power-1)//2)
 
+    def _cayley_hamilton_power(self, power):
+        """
+            self**power as r(self) with r = t**power mod charpoly(t). The charpoly is monic, so the reduction needs no
+            division; this costs O(n^2 log(power)) ring operations and n matrix products instead of 2 log(power) products.
+        """
+        R, n = self.ring, self.no_rows
+        chi = self.charpoly()[::-1]
+
+        def mulmod(a, b):
+            product = [R.zero] * (2 * n - 1)
+            for i, x in enumerate(a):
+                if R.maybe_zero_check(x):
+                    continue
+                for j, y in enumerate(b):
+                    product[i + j] = R.add(product[i + j], R.mul(x, y))
+            for d in range(2 * n - 2, n - 1, -1):
+                q = product[d]
+                if R.maybe_zero_check(q):
+                    continue
+                for i in range(n):
+                    product[d - n + i] = R.add(product[d - n + i], R.neg(R.mul(q, chi[i])))
+            return product[:n]
+
+        result, base = [R.one] + [R.zero] * (n - 1), [R.zero, R.one] + [R.zero] * (n - 2)
+        while power:
+            if power & 1:
+                result = mulmod(result, base)
+            power >>= 1
+            if power:
+                base = mulmod(base, base)
+        identity = self.identity_matrix(n)
+        M = identity * result[-1]
+        for c in result[-2::-1]:
+            M = M @ self + identity * c
+        return M
+
     def zero_matrix(self, no_rows, no_columns):
         return Matrix([[self.ring.zero for j in range(no_columns)] for i in range(no_rows)])
 
@@ -267,24 +931,32 @@ class Matrix:
         return Matrix([[self.ring.one if i == j else self.ring.zero for j in range(no_rows)] for i in range(no_rows)])
 
     def __eq__(self, other):
-        if other == 0:
+        if isinstance(other, int) and other == 0:
             return self == self.zero_matrix(self.no_rows, self.no_columns)
-        if other == 1:
+        if isinstance(other, int) and other == 1:
             return self.is_square and self == self.identity_matrix(self.no_rows)
         if self.no_rows != other.no_rows or self.no_columns != other.no_columns:
             return False
+        if self.array is not None and other.array is not None and self.ring == other.ring:
+            if not self.ring.properties['exact_values']:
+                return bool(np.allclose(self.array, other.array))
+            return bool(np.array_equal(self.array, other.array))
         return all([self.coefficients[i][j] == other.coefficients[i][j] for i in range(self.no_rows) for j in range(self.no_columns)])
 
     def __ne__(self, other):
         return not self == other
 
     def __neg__(self):
+        if self.array is not None:
+            return Matrix(-self.array, self.ring)
         return self * -self.ring.one
 
     def __sub__(self, other):
         return self + (-other)
 
     def transpose(self):
+        if self.array is not None:
+            return Matrix(self.array.T.copy(), self.ring)
         return Matrix([[self.coefficients[j][i] for j in range(self.no_rows)] for i in range(self.no_columns)])
 
     @property
@@ -293,7 +965,9 @@ class Matrix:
 
     def trace(self):
         assert self.is_square
-        return sum([self.coefficients[i][i] for i in range(self.no_rows)])
+        if self.array is not None:
+            return self.ring.from_numpy(self.ring.normalize_numpy(np.trace(self.array)))
+        return sum([self.coefficients[i][i] for i in range(self.no_rows)], self.ring.zero)
 
     @staticmethod
     def fill_free_coefficients(ring, *shapes, order=grlex):
@@ -309,7 +983,7 @@ class Matrix:
                 elif shape[0] == 1 or shape[1] == 1:
                     varnames += [name + '_' + str(i) for i in range(max(shape[0], shape[1]))]
                 else:
-                    varnames += [name + '_' + str(i)+str(j) for i in range(shapes[0][0]) for j in range(shapes[0][1])]
+                    varnames += [name + '_' + str(i)+str(j) for i in range(shape[0]) for j in range(shape[1])]
         else:
             for k, shape in enumerate(shapes):
                 name = 'x_' + str(k)
@@ -318,13 +992,16 @@ class Matrix:
                 elif shape[0] == 1 or shape[1] == 1:
                     varnames += [name + '_' + str(i) for i in range(max(shape[0], shape[1]))]
                 else:
-                    varnames += [name + '_' + str(i)+str(j) for i in range(shapes[0][0]) for j in range(shapes[0][1])]
-        algebra = PolynomialAlgebra(ring, no_vars, varnames, order=order)
+                    varnames += [name + '_' + str(i)+str(j) for i in range(shape[0]) for j in range(shape[1])]
+        if ring.properties['field']:
+            algebra = KPolynomialAlgebra(ring, no_vars, varnames, order=order)
+        else:
+            algebra = PolynomialAlgebra(ring, no_vars, varnames, order=order)
 
         used_vars = 0
         for shape in shapes:
             coefficients = []
-            for i in range(shape[1]):
+            for i in range(shape[0]):
                 row = algebra.generator_elements[used_vars + i*shape[1]:used_vars + (i+1)*shape[1]]
                 coefficients.append(row)
             used_vars += shape[0]*shape[1]
@@ -333,17 +1010,305 @@ class Matrix:
 
     def vanishing_ideal(self, name=None):
         coefs = sum(self.coefficients, [])
+        if isinstance(self.ring, KPolynomialAlgebra):
+            return modules.KPolynomialIdeal(coefs, name=name)
         return modules.Ideal(coefs, name=name)
 
     def vanishing_algebra(self, name=None):
         return self.vanishing_ideal().quotient_algebra(name)
 
+    def to_sparse(self):
+        return SparseMatrix.from_matrix(self)
+
+
+class _ModularArithmetic:
+    """ Arithmetic of F_p on plain ints, used by sparse elimination instead of boxed ring elements. """
+    properties = {'field': True, 'exact_values': True}
+    one = 1
+
+    def __init__(self, p):
+        self.p = p
+
+    def add(self, a, b):
+        return (a + b) % self.p
+
+    def mul(self, a, b):
+        return a * b % self.p
+
+    def neg(self, a):
+        return -a % self.p
+
+    def truediv(self, a, b):
+        return a * pow(b, -1, self.p) % self.p
+
+    @staticmethod
+    def maybe_zero_check(a):
+        return a == 0
+
+
+class SparseMatrix:
+    """
+        Sparse matrix over any ring, stored as a list of rows, each a dict {column: nonzero entry}.
+        Elimination chooses pivots by the Markowitz criterion to keep fill-in low; it is Gaussian over fields
+        and fraction-free (Bareiss) over integral domains.
+    """
+    def __init__(self, rows, no_columns, ring):
+        self.ring = ring
+        self.rows = [{j: c for j, c in row.items() if not ring.maybe_zero_check(c)} for row in rows]
+        self.no_rows = len(rows)
+        self.no_columns = no_columns
+
+    @staticmethod
+    def from_matrix(matrix):
+        return SparseMatrix([dict(enumerate(row)) for row in matrix.coefficients], matrix.no_columns, matrix.ring)
+
+    @staticmethod
+    def from_entries(entries, no_rows, no_columns, ring):
+        """ Matrix from a dict {(row, column): entry}. """
+        rows = [{} for _ in range(no_rows)]
+        for (i, j), c in entries.items():
+            rows[i][j] = c
+        return SparseMatrix(rows, no_columns, ring)
+
+    def to_matrix(self):
+        return Matrix([[row.get(j, self.ring.zero) for j in range(self.no_columns)] for row in self.rows], self.ring)
+
+    def to_scipy(self):
+        """ scipy.sparse CSR matrix, for rings with a NumPy backend. """
+        if not Matrix.has_numpy_backend(self.ring):
+            raise ValueError(f"Entries of {self.ring} have no machine representation.")
+        data, indices, indptr = [], [], [0]
+        for row in self.rows:
+            for j in sorted(row):
+                indices.append(j)
+                data.append(self.ring.to_numpy(row[j]))
+            indptr.append(len(indices))
+        return scipy.sparse.csr_matrix((np.array(data, dtype=self.ring.numpy_dtype), indices, indptr), shape=(self.no_rows, self.no_columns))
+
+    def __getitem__(self, index):
+        i, j = index
+        return self.rows[i].get(j, self.ring.zero)
+
+    @property
+    def nnz(self):
+        return sum(len(row) for row in self.rows)
 
+    @property
+    def density(self):
+        return self.nnz / max(1, self.no_rows * self.no_columns)
 
+    def __str__(self):
+        return str(self.to_matrix())
 
+    def __eq__(self, other):
+        if isinstance(other, Matrix):
+            other = SparseMatrix.from_matrix(other)
+        if (self.no_rows, self.no_columns) != (other.no_rows, other.no_columns):
+            return False
+        return all(a.keys() == b.keys() and all(a[j] == b[j] for j in a) for a, b in zip(self.rows, other.rows))
+
+    def __ne__(self, other):
+        return not self == other
+
+    def transpose(self):
+        rows = [{} for _ in range(self.no_columns)]
+        for i, row in enumerate(self.rows):
+            for j, c in row.items():
+                rows[j][i] = c
+        return SparseMatrix(rows, self.no_rows, self.ring)
+
+    #  ------ sparse row operations ------
+    def _add_rows(self, a, b, factor=None, ring=None):
+        """ a + factor*b for sparse rows. """
+        R = ring or self.ring
+        result = dict(a)
+        for j, c in b.items():
+            c = R.mul(factor, c) if factor is not None else c
+            if j in result:
+                c = R.add(result[j], c)
+                if R.maybe_zero_check(c):
+                    del result[j]
+                    continue
+            result[j] = c
+        return result
+
+    def add_row_multiple(self, target, source, factor):
+        """ row[target] += factor * row[source], in place. """
+        self.rows[target] = self._add_rows(self.rows[target], self.rows[source], factor)
+
+    def scale_row(self, i, factor):
+        self.rows[i] = {j: self.ring.mul(factor, c) for j, c in self.rows[i].items() if not self.ring.maybe_zero_check(self.ring.mul(factor, c))}
+
+    def swap_rows(self, i, k):
+        self.rows[i], self.rows[k] = self.rows[k], self.rows[i]
+
+    #  ------ arithmetic ------
+    def __add__(self, other):
+        assert (self.no_rows, self.no_columns) == (other.no_rows, other.no_columns)
+        return SparseMatrix([self._add_rows(a, b) for a, b in zip(self.rows, other.rows)], self.no_columns, self.ring)
+
+    def __neg__(self):
+        return SparseMatrix([{j: self.ring.neg(c) for j, c in row.items()} for row in self.rows], self.no_columns, self.ring)
 
+    def __sub__(self, other):
+        return self + (-other)
 
+    def __mul__(self, scalar):
+        return SparseMatrix([{j: self.ring.mul(scalar, c) for j, c in row.items()} for row in self.rows], self.no_columns, self.ring)
+
+    def apply(self, vector):
+        """ Product with a dense vector (list of entries) or a sparse vector (dict {index: entry}), of the same kind. """
+        R = self.ring
+        if isinstance(vector, dict):
+            result = {}
+            for i, row in enumerate(self.rows):
+                terms = [R.mul(c, vector[j]) for j, c in row.items() if j in vector]
+                if terms:
+                    value = functools.reduce(R.add, terms)
+                    if not R.maybe_zero_check(value):
+                        result[i] = value
+            return result
+        return [functools.reduce(R.add, [R.mul(c, vector[j]) for j, c in row.items()], R.zero) for row in self.rows]
 
+    def __matmul__(self, other):
+        if isinstance(other, (list, dict)):
+            return self.apply(other)
+        assert self.no_columns == other.no_rows
+        if isinstance(other, Matrix):
+            other_rows = [dict(enumerate(row)) for row in other.coefficients]
+        else:
+            other_rows = other.rows
+        rows = []
+        for row in self.rows:
+            result = {}
+            for k, c in row.items():
+                result = self._add_rows(result, other_rows[k], c)
+            rows.append(result)
+        product = SparseMatrix(rows, other.no_columns, self.ring)
+        return product.to_matrix() if isinstance(other, Matrix) else product
+
+    #  ------ elimination ------
+    def _markowitz_pivot(self, rows, active, column_rows, search=4):
+        """ Nonzero entry (row, column) minimizing (r - 1)(c - 1) among the `search` shortest active rows. """
+        best, best_score = None, None
+        inexact = not self.ring.properties['exact_values']
+        for i in sorted(active, key=lambda i: len(rows[i]))[:search]:
+            row = rows[i]
+            if inexact:
+                largest = max(abs(c.value) for c in row.values())
+            for j, c in row.items():
+                if inexact and abs(c.value) < 0.1 * largest:
+                    continue
+                score = (len(row) - 1) * (len(column_rows[j]) - 1)
+                if best_score is None or score < best_score:
+                    best, best_score = (i, j), score
+        return best
+
+    def eliminate(self, reduced=False):
+        """
+            Elimination with Markowitz pivoting. Returns the rows after elimination and the list of pivots
+            (row, column) in the order they were chosen. With `reduced` pivot columns are cleared in all other rows;
+            over fields the pivots are then 1, over integral domains all of them equal the last pivot.
+        """
+        R = self.ring
+        field = R.properties['field']
+        if isinstance(R, FpField):
+            R = _ModularArithmetic(R.p)
+            rows = [{j: c.value for j, c in row.items()} for row in self.rows]
+        else:
+            rows = [dict(row) for row in self.rows]
+        column_rows = {}
+        for i, row in enumerate(rows):
+            for j in row:
+                column_rows.setdefault(j, set()).add(i)
+        active = {i for i, row in enumerate(rows) if row}
+        pivots, previous = [], R.one
+
+        def replace(i, new_row):
+            for j in rows[i].keys() - new_row.keys():
+                column_rows[j].discard(i)
+            for j in new_row.keys() - rows[i].keys():
+                column_rows.setdefault(j, set()).add(i)
+            rows[i] = new_row
+            if not new_row:
+                active.discard(i)
+
+        while active:
+            p, c = self._markowitz_pivot(rows, active, column_rows)
+            active.discard(p)
+            pivot = rows[p][c]
+            if field:
+                if reduced:
+                    replace(p, {j: R.truediv(x, pivot) for j, x in rows[p].items()})
+                    pivot = R.one
+                for i in list(column_rows[c] - {p}):
+                    if i in active or reduced:
+                        replace(i, self._add_rows(rows[i], rows[p], R.neg(R.truediv(rows[i][c], pivot)), R))
+            else:
+                targets = set(range(len(rows))) - {p} if reduced else set(active)
+                for i in targets:
+                    if not rows[i]:
+                        continue
+                    factor = rows[i].get(c)
+                    new_row = {j: R.mul(pivot, x) for j, x in rows[i].items()}
+                    if factor is not None:
+                        new_row = self._add_rows(new_row, rows[p], R.neg(factor), R)
+                    replace(i, {j: R.truediv(x, previous) for j, x in new_row.items()})
+                previous = pivot
+            pivots.append((p, c))
+        if isinstance(R, _ModularArithmetic):
+            rows = [{j: self.ring(c) for j, c in row.items()} for row in rows]
+        return rows, pivots
+
+    def rank(self):
+        return len(self.eliminate()[1])
 
+    def det(self):
+        assert self.no_rows == self.no_columns
+        rows, pivots = self.eliminate()
+        if len(pivots) < self.no_rows:
+            return self.ring.zero
+        permutation = [0] * self.no_rows
+        for p, c in pivots:
+            permutation[p] = c
+        sign, seen = 1, set()
+        for start in range(self.no_rows):
+            length = 0
+            while start not in seen:
+                seen.add(start)
+                start = permutation[start]
+                length += 1
+            if length and length % 2 == 0:
+                sign = -sign
+        if self.ring.properties['field']:
+            det = functools.reduce(self.ring.mul, [rows[p][c] for p, c in pivots], self.ring.one)
+        else:
+            p, c = pivots[-1]
+            det = rows[p][c]
+        return det if sign == 1 else self.ring.neg(det)
+
+    def nullspace(self, elimination=None):
+        """
+            Basis of the kernel as sparse vectors {index: entry}; over integral domains the entries are in the ring.
+            The result of `eliminate(reduced=True)` can be passed in when it is already known.
+        """
+        rows, pivots = elimination or self.eliminate(reduced=True)
+        pivot_columns = {c for _, c in pivots}
+        d = rows[pivots[-1][0]][pivots[-1][1]] if pivots else self.ring.one
+        basis = []
+        for f in range(self.no_columns):
+            if f in pivot_columns:
+                continue
+            vector = {f: d}
+            for p, c in pivots:
+                if f in rows[p]:
+                    vector[c] = self.ring.neg(rows[p][f])
+            basis.append(vector)
+        return basis
 
+    def vanishing_ideal(self, name=None):
+        coefs = [c for row in self.rows for c in row.values()] or [self.ring.zero]
+        if isinstance(self.ring, KPolynomialAlgebra):
+            return modules.KPolynomialIdeal(coefs, name=name)
+        return modules.Ideal(coefs, name=name)
 
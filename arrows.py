@@ -1,5 +1,9 @@
 from modules import *
 from algebras import *
+import modules
+import algebras
+import lattices
+import groebner
 
 
 class Morphism(ABC):
@@ -33,14 +37,144 @@ class ModuleMorphism(Morphism):
         self.images = [self.function_on_generators(g) for g in self.domain.generators]
 
     def __call__(self, element):
-        return sum([c * g for c, g in zip(element.coefficients, self.images)], start=self.codomain.zero)
-
-    def matrix(self):
-        return [self(g) for g in self.domain.generators]
+        """ Image of an element or of a ModuleElementBatch; on the NumPy backend this is one product with the matrix. """
+        matrix = self._matrix
+        if isinstance(element, modules.ModuleElementBatch):
+            if matrix is not None and matrix.array is not None:
+                return self.codomain.batch(self._product(element.array, matrix.array.T))
+            return self.codomain.batch([self(e) for e in element])
+        if element.array is not None and matrix is not None and matrix.array is not None:
+            return self.codomain(self._product(matrix.array, element.array))
+        return sum([g * c for c, g in zip(element.coefficients, self.images)], start=self.codomain.zero)
+
+    def _product(self, a, b):
+        if a.dtype.kind == 'i' and not algebras.Matrix._fits_int64(algebras.Matrix._max_abs(a), algebras.Matrix._max_abs(b), a.shape[-1] or 1):
+            a, b = a.astype(object), b.astype(object)
+        return self.codomain.ring.normalize_numpy(a @ b)
+
+    @functools.cached_property
+    def _matrix(self):
+        if not isinstance(self.codomain, modules.FGModule) or not getattr(self.codomain, 'numpy_backend', False):
+            return None
+        if not all(isinstance(image, modules.ModuleElement) for image in self.images):
+            return None
+        return self.matrix()
+
+    def _image_coefficients(self, image):
+        if isinstance(image, modules.ModuleElement):
+            return image.coefficients
+        return [image]
+
+    def matrix(self, sparse=False):
+        """ Matrix whose j-th column holds the coefficients of the image of the j-th generator of the domain. """
+        if not sparse and self.images and all(isinstance(image, modules.ModuleElement) and image.array is not None for image in self.images):
+            return algebras.Matrix(np.stack([image.array for image in self.images], axis=1), self.codomain.ring)
+        columns = [self._image_coefficients(image) for image in self.images]
+        if sparse:
+            return algebras.SparseMatrix.from_entries({(i, j): c for j, column in enumerate(columns) for i, c in enumerate(column)},
+                                             self.codomain.no_generators, self.domain.no_generators, self.codomain.ring)
+        return algebras.Matrix([list(row) for row in zip(*columns)], self.codomain.ring)
 
     def __str__(self):
         return str(self.matrix())
 
+    #  ------ kernel, image and cokernel ------
+    @functools.cached_property
+    def _sparse(self):
+        """ SparseMatrix of the morphism built from the nonzero entries of the images only. """
+        R = self.codomain.ring
+        matrix = self._matrix
+        if matrix is not None and matrix.array is not None:
+            rows, columns = np.nonzero(matrix.array)
+            entries = {(i, j): R.from_numpy(matrix.array[i, j]) for i, j in zip(rows.tolist(), columns.tolist())}
+        else:
+            entries = {(i, j): c for j, image in enumerate(self.images) for i, c in enumerate(self._image_coefficients(image))
+                       if not R.maybe_zero_check(c)}
+        return algebras.SparseMatrix.from_entries(entries, self.codomain.no_generators, self.domain.no_generators, R)
+
+    @functools.cached_property
+    def _decomposition(self):
+        """
+            Generators of the kernel and of the image as sparse vectors {index: entry} over the domain and the
+            codomain. Over fields one reduced sparse elimination gives both: the nullspace, and the images of the
+            pivot columns as a basis of the image. Over Z the Hermite form of the images with its transformation
+            gives Z-bases of both, over polynomial rings the kernel is the module of syzygies of the images.
+        """
+        R = self.codomain.ring
+        sparse = self._sparse
+        n, m = sparse.no_rows, sparse.no_columns
+        if R.properties['field']:
+            elimination = sparse.eliminate(reduced=True)
+            columns = sparse.transpose().rows
+            return sparse.nullspace(elimination), [columns[c] for c in sorted(c for _, c in elimination[1])]
+        if isinstance(R, algebras.ZRing):
+            rows = [[0] * n for _ in range(m)]
+            for i, row in enumerate(sparse.rows):
+                for j, c in row.items():
+                    rows[j][i] = int(c.value)
+            H, U = lattices.hermite_normal_form(rows, n, transform=True)
+            vectors = lambda rows: [{i: R(x) for i, x in enumerate(row) if x} for row in rows]
+            return vectors(U[len(H):]), vectors(H)
+        if isinstance(R, algebras.KPolynomialAlgebra):
+            columns = sparse.transpose().rows
+            vectors = [{(i, e): t for i, c in column.items() for e, t in c.value.terms.items()} for column in columns]
+            engine = groebner.ModuleGroebnerEngine(R.base_ring, R.order.key)
+            kernel = [{j: R.from_terms(f) for j, f in self._positions(v).items()} for v in engine.syzygy_module(vectors, n, R.no_generators)]
+            return kernel, [c for c in columns if c]
+        raise NotImplementedError("Kernels and images are implemented over fields, Z and polynomial rings over fields.")
+
+    @staticmethod
+    def _positions(vector):
+        polynomials = {}
+        for (i, e), c in vector.items():
+            polynomials.setdefault(i, {})[e] = c
+        return polynomials
+
+    def _submodule(self, module, vectors):
+        R = module.ring
+        if getattr(module, 'numpy_backend', False):
+            elements = []
+            for v in vectors:
+                array = np.zeros(module.no_generators, dtype=R.numpy_dtype)
+                for i, c in v.items():
+                    array[i] = R.to_numpy(c)
+                elements.append(module(array))
+        else:
+            elements = [module([v.get(i, R.zero) for i in range(module.no_generators)]) for v in vectors]
+        if isinstance(module, modules.FreeFGModule) and isinstance(R, algebras.KPolynomialAlgebra):
+            submodule = module.submodule(elements or [module.zero])
+            return ModuleMorphism(submodule, module, lambda x: x)
+        return module.span_submodule(elements)
+
+    @functools.cached_property
+    def _kernel(self):
+        return self._submodule(self.domain, self._decomposition[0])
+
+    @functools.cached_property
+    def _image(self):
+        return self._submodule(self.codomain, self._decomposition[1])
+
+    @functools.cached_property
+    def _cokernel(self):
+        module = self.codomain
+        relations = [[v.get(i, module.ring.zero) for i in range(module.no_generators)] for v in self._decomposition[1]]
+        quotient = module.quotient(relations, name=f'{module}/im')
+        position = {id(g): i for i, g in enumerate(module.generators)}
+        unit = lambda i: [quotient.ring.one if k == i else quotient.ring.zero for k in range(module.no_generators)]
+        return ModuleMorphism(module, quotient, lambda g: quotient(unit(position[id(g)])))
+
+    def kernel(self):
+        """ Inclusion of the kernel into the domain; the kernel is its domain. """
+        return self._kernel
+
+    def image(self):
+        """ Inclusion of the image into the codomain. """
+        return self._image
+
+    def cokernel(self):
+        """ Projection of the codomain onto the cokernel, an FPModule with the image as relations. """
+        return self._cokernel
+
     @staticmethod
     def identity(module):
         return ModuleMorphism(module, module, lambda x: x)
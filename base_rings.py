@@ -1,9 +1,11 @@
 from abstract import *
-import functools, itertools
+import functools, itertools, math
 import numpy as np
 
 
 class ZRing(BaseRing):
+    numpy_dtype = np.int64
+
     def __init__(self):
         super().__init__(name='Z', euclidean=True, integral=True, pid=True, ufd=True, normed=True)
 
@@ -67,6 +69,12 @@ class ZRing(BaseRing):
     def abs(self, a):
         return self(abs(a.value))
 
+    def to_numpy(self, element):
+        return element.value
+
+    def from_numpy(self, value):
+        return self(int(value))
+
     @staticmethod
     def element_str(element):
         return str(element.value)
@@ -87,7 +95,7 @@ class QField(Field):
         else:
             numerator = -abs(numerator)
             denominator = abs(denominator)
-        gcd = np.gcd(numerator, denominator)
+        gcd = math.gcd(numerator, denominator)
         return BaseElement(self, (numerator//gcd, denominator//gcd))
 
     def add(self, a, b):
@@ -139,6 +147,7 @@ class QField(Field):
 
 
 class RFloating(Field):
+    numpy_dtype = np.float64
 
     def __init__(self):
         super().__init__([QField(), ZRing()], 'R', exact_values=False, characteristics=0, normed=True)
@@ -187,12 +196,20 @@ class RFloating(Field):
     def eq(self, a, b):
         return np.isclose(a.value, b.value)
 
+    def to_numpy(self, element):
+        return element.value
+
+    def from_numpy(self, value):
+        return self(float(value))
+
     @staticmethod
     def element_str(element):
         return str(element.value)
 
 
 class CFloating(RFloating):
+    numpy_dtype = np.complex128
+
     def __init__(self):
         super().__init__()
         self.canonical_subrings = [ZRing(), QField(), RFloating()]
@@ -202,13 +219,78 @@ class CFloating(RFloating):
     def __call__(self, real, imaginary=0, denominator=1):
         return BaseElement(self, complex(real, imaginary)/denominator)
 
+    def from_canonical_subring(self, element):
+        if element.ring == self:
+            return element
+        if element.ring == RFloating():
+            return self(element.value)
+        return super().from_canonical_subring(element)
+
+    def from_numpy(self, value):
+        return self(complex(value))
+
+
+class FpField(Field):
+    numpy_dtype = np.int64
+
+    def __init__(self, p):
+        if p < 2 or any(p % d == 0 for d in range(2, math.isqrt(p) + 1)):
+            raise ValueError(f"{p} is not a prime.")
+        super().__init__([ZRing()], 'F_' + str(p), characteristics=p)
+        self.p = p
+        if p >= 2**31:
+            self.numpy_dtype = object
+
+    def __call__(self, value):
+        return BaseElement(self, int(value) % self.p)
+
+    def add(self, a, b):
+        return self(a.value + b.value)
+
+    def mul(self, a, b):
+        return self(a.value * b.value)
+
+    @property
+    def one(self):
+        return self(1)
 
+    @property
+    def zero(self):
+        return self(0)
 
+    def neg(self, a):
+        return self(-a.value)
+
+    def eq(self, a, b):
+        return a.value == b.value
 
+    def maybe_zero_check(self, element):
+        return element.value == 0
 
+    def force_zero_check(self, element):
+        return element.value == 0
 
+    def truediv(self, a, b):
+        if b.value == 0:
+            raise ZeroDivisionError()
+        return self(a.value * pow(b.value, -1, self.p))
 
+    def from_canonical_subring(self, element):
+        if element.ring == ZRing() or element.ring == self:
+            return self(element.value)
+        raise ValueError(f"Only canonical subrings are Z and {self}.")
 
+    def to_numpy(self, element):
+        return element.value
 
+    def from_numpy(self, value):
+        return self(int(value))
 
+    def normalize_numpy(self, array):
+        if isinstance(array, np.ndarray) and array.dtype == object:
+            return np.vectorize(lambda x: int(x) % self.p, otypes=[object])(array).astype(self.numpy_dtype)
+        return array % self.p
 
+    @staticmethod
+    def element_str(element):
+        return str(element.value)
@@ -0,0 +1,295 @@
+"""
+    Todd-Coxeter coset enumeration for finitely presented groups.
+
+    Words are lists of letters: letter 2*i stands for the generator x_i and 2*i + 1 for its inverse, so the inverse of a
+    letter l is l ^ 1. The coset table has one row per coset of the subgroup H and one column per letter; coset 0 is H
+    itself and table[c, l] is the coset c * l. The enumeration works on Python lists (scalar access is the hot path),
+    the finished table is standardized and returned as a compact NumPy int32 array.
+"""
+import numpy as np
+
+
+def letters(word):
+    """ Letters of a word given as a list of (generator index, exponent) pairs. """
+    result = []
+    for i, n in word:
+        result.extend([2 * i + (n < 0)] * abs(n))
+    return result
+
+
+def inverse(word):
+    return [l ^ 1 for l in reversed(word)]
+
+
+class CosetEnumeration:
+    """
+        Coset table of the subgroup generated by `subgroup` in <x_0, ..., x_{n-1} | relators>. The 'hlt' strategy
+        (Haselgrove, Leech and Trotter) scans every relator at every coset and defines cosets as needed; 'felsch'
+        defines the first undefined entry only and processes all deductions before the next definition, which uses
+        fewer cosets. Coincidences are merged with union-find (Holt, Handbook of computational group theory, 5.1).
+    """
+    def __init__(self, no_generators, relators, subgroup=(), strategy='hlt', max_cosets=2**24):
+        if strategy not in ('hlt', 'felsch'):
+            raise ValueError(f"Unknown strategy {strategy}, use 'hlt' or 'felsch'.")
+        self.no_columns = 2 * no_generators
+        self.relators = [list(r) for r in relators if r]
+        self.subgroup = [list(w) for w in subgroup if w]
+        self.strategy = strategy
+        self.max_cosets = max_cosets
+        self.table = [[-1] * self.no_columns]
+        self.parent = [0]
+        self.deductions = None
+
+    #  ------ basic operations ------
+    def define(self, c, x):
+        d = len(self.table)
+        if d >= self.max_cosets:
+            raise RuntimeError(f"Coset enumeration exceeded {self.max_cosets} cosets.")
+        self.table.append([-1] * self.no_columns)
+        self.parent.append(d)
+        self.table[c][x] = d
+        self.table[d][x ^ 1] = c
+        if self.deductions is not None:
+            self.deductions.append((c, x))
+
+    def representative(self, c):
+        parent = self.parent
+        root = c
+        while parent[root] != root:
+            root = parent[root]
+        while parent[c] != root:
+            parent[c], c = root, parent[c]
+        return root
+
+    def _merge(self, a, b, queue):
+        a, b = self.representative(a), self.representative(b)
+        if a != b:
+            a, b = min(a, b), max(a, b)
+            self.parent[b] = a
+            queue.append(b)
+
+    def coincidence(self, a, b):
+        table, queue = self.table, []
+        self._merge(a, b, queue)
+        k = 0
+        while k < len(queue):
+            g = queue[k]
+            k += 1
+            for x in range(self.no_columns):
+                d = table[g][x]
+                if d < 0:
+                    continue
+                table[d][x ^ 1] = -1
+                mu, nu = self.representative(g), self.representative(d)
+                if table[mu][x] >= 0:
+                    self._merge(nu, table[mu][x], queue)
+                elif table[nu][x ^ 1] >= 0:
+                    self._merge(mu, table[nu][x ^ 1], queue)
+                else:
+                    table[mu][x], table[nu][x ^ 1] = nu, mu
+                    if self.deductions is not None:
+                        self.deductions.append((mu, x))
+
+    def scan(self, c, word, fill=True):
+        """ Scans `word` at coset c from both ends, defining cosets when `fill`; deductions close the gap. """
+        table = self.table
+        f, b, i, j = c, c, 0, len(word) - 1
+        while True:
+            while i <= j and table[f][word[i]] >= 0:
+                f = table[f][word[i]]
+                i += 1
+            if i > j:
+                if f != c:
+                    self.coincidence(f, c)
+                return
+            while j >= i and table[b][word[j] ^ 1] >= 0:
+                b = table[b][word[j] ^ 1]
+                j -= 1
+            if j < i:
+                self.coincidence(f, b)
+                return
+            if j == i:
+                table[f][word[i]], table[b][word[i] ^ 1] = b, f
+                if self.deductions is not None:
+                    self.deductions.append((f, word[i]))
+                return
+            if not fill:
+                return
+            self.define(f, word[i])
+
+    def is_live(self, c):
+        return self.parent[c] == c
+
+    #  ------ strategies ------
+    def run(self):
+        for w in self.subgroup:
+            self.scan(0, w)
+        if self.strategy == 'hlt':
+            self._hlt()
+        else:
+            self._felsch()
+        return self.standardize()
+
+    def _hlt(self):
+        table, parent, scan = self.table, self.parent, self.scan
+        c = 0
+        while c < len(table):
+            for w in self.relators:
+                if parent[c] != c:
+                    break
+                scan(c, w)
+            if parent[c] == c:
+                row = table[c]
+                for x in range(self.no_columns):
+                    if row[x] < 0:
+                        self.define(c, x)
+            c += 1
+
+    def _felsch(self):
+        self.deductions = []
+        conjugates = [[] for _ in range(self.no_columns)]
+        for r in self.relators:
+            for w in (r, inverse(r)):
+                for k in range(len(w)):
+                    conjugate = w[k:] + w[:k]
+                    if conjugate not in conjugates[conjugate[0]]:
+                        conjugates[conjugate[0]].append(conjugate)
+        for w in self.relators:
+            self.scan(0, w, fill=False)
+        self._process_deductions(conjugates)
+        c = 0
+        while c < len(self.table):
+            if self.is_live(c):
+                for x in range(self.no_columns):
+                    if self.is_live(c) and self.table[c][x] < 0:
+                        self.define(c, x)
+                        self._process_deductions(conjugates)
+            c += 1
+
+    def _process_deductions(self, conjugates):
+        while self.deductions:
+            c, x = self.deductions.pop()
+            if not self.is_live(c):
+                continue
+            for w in conjugates[x]:
+                if not self.is_live(c):
+                    break
+                self.scan(c, w, fill=False)
+            d = self.table[c][x]
+            if d >= 0 and self.is_live(d):
+                for w in conjugates[x ^ 1]:
+                    if not self.is_live(d):
+                        break
+                    self.scan(d, w, fill=False)
+
+    def standardize(self):
+        """ Live cosets renumbered in breadth-first order from coset 0, as an int32 array (-1 stays undefined). """
+        number = {0: 0}
+        order = [0]
+        for c in order:
+            for y in self.table[c]:
+                if y < 0:
+                    continue
+                y = self.representative(y)
+                if y not in number:
+                    number[y] = len(order)
+                    order.append(y)
+        representative = np.array([self.representative(c) for c in range(len(self.table))])
+        renumber = np.full(len(self.table), -1, dtype=np.int32)
+        renumber[order] = np.arange(len(order), dtype=np.int32)
+        rows = np.array([self.table[c] for c in order], dtype=np.int64).reshape(len(order), self.no_columns)
+        result = np.full(rows.shape, -1, dtype=np.int32)
+        defined = rows >= 0
+        result[defined] = renumber[representative[rows[defined]]]
+        return result
+
+
+def coset_table(no_generators, relators, subgroup=(), strategy='hlt', max_cosets=2**24):
+    """ Standardized coset table of <subgroup> in the finitely presented group, see `CosetEnumeration`. """
+    return CosetEnumeration(no_generators, relators, subgroup, strategy, max_cosets).run()
+
+
+def stallings_graph(no_generators, subgroup):
+    """
+        Folded Stallings graph of the subgroup of the free group generated by the words `subgroup`, as a partial
+        standardized coset table (-1 for missing edges). Scanning the generators at coset 0 without relators traces
+        each of them as a loop, and the coincidences fold edges with the same label at the same vertex (Stallings).
+        A word lies in the subgroup iff it can be read from 0 back to 0, the index is the number of vertices when
+        the table is complete and infinite otherwise.
+    """
+    enumeration = CosetEnumeration(no_generators, [], subgroup)
+    for w in enumeration.subgroup:
+        enumeration.scan(0, w)
+    return enumeration.standardize()
+
+
+def trace(table, word, start=0):
+    """ Coset reached from `start` (an int or an array of cosets) along the letters of `word`. """
+    for l in word:
+        start = table[start, l]
+    return start
+
+
+def schreier_tree(table):
+    """
+        Arrays (parent coset, letter) of the breadth-first spanning tree of a standardized table, so that
+        coset c = parent[c] * letter[c]; the entries of coset 0 are -1.
+    """
+    n = len(table)
+    parent, letter = np.full(n, -1, dtype=np.int32), np.full(n, -1, dtype=np.int32)
+    seen = np.zeros(n, dtype=bool)
+    seen[0] = True
+    frontier = np.array([0])
+    while frontier.size:
+        targets = table[frontier]
+        sources = np.repeat(frontier, table.shape[1])
+        columns = np.tile(np.arange(table.shape[1]), len(frontier))
+        targets = targets.ravel()
+        new = ~seen[targets]
+        targets, sources, columns = targets[new], sources[new], columns[new]
+        targets, first = np.unique(targets, return_index=True)
+        parent[targets], letter[targets] = sources[first], columns[first]
+        seen[targets] = True
+        frontier = targets
+    return parent, letter
+
+
+def representatives(table):
+    """ Word (list of letters) of every coset along the Schreier tree, coset 0 has the empty word. """
+    parent, letter = schreier_tree(table)
+    words = [[]]
+    for c in range(1, len(table)):
+        words.append(words[parent[c]] + [int(letter[c])])
+    return words
+
+
+def inverses(table):
+    """ Array of the cosets c^-1 of a regular representation (the coset table of the trivial subgroup). """
+    parent, letter = schreier_tree(table)
+    result = np.zeros(len(table), dtype=np.int32)
+    node = np.arange(len(table))
+    active = node != 0
+    while active.any():
+        # the word of c^-1 is the inverse of the last letter of c followed by the word of parent(c)^-1
+        result[active] = table[result[active], letter[node[active]] ^ 1]
+        node[active] = parent[node[active]]
+        active = node != 0
+    return result
+
+
+def multiplication_table(table):
+    """
+        Products of a regular representation: entry [i, j] is the index of i * j. Column j is column parent(j)
+        moved by the last letter of j, so the columns are filled one breadth-first level at a time.
+    """
+    parent, letter = schreier_tree(table)
+    n = len(table)
+    result = np.empty((n, n), dtype=np.int32)
+    result[:, 0] = np.arange(n)
+    depth = np.zeros(n, dtype=np.int32)
+    for c in range(1, n):
+        depth[c] = depth[parent[c]] + 1
+    for d in range(1, depth.max(initial=0) + 1):
+        level = np.flatnonzero(depth == d)
+        result[:, level] = table[result[:, parent[level]], letter[level]]
+    return result
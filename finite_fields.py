@@ -0,0 +1,239 @@
+"""
+    Finite fields F_q, q = p^r, and counting of the F_q-points of systems of polynomial equations.
+
+    An element of F_q = F_p[x]/(f), f a primitive polynomial of degree r, is coded by the integer sum c_k p^k of its
+    coefficient vector (c_0, ..., c_{r-1}), so F_p is embedded as the codes 0, ..., p - 1. Nonzero elements are
+    powers of the class of x: multiplication adds logarithms, addition adds coefficient vectors modulo p. Polynomials
+    are dicts {exponent tuple: int} with coefficients in Z (read modulo p), they are evaluated on arrays of points with
+    every monomial computed in logarithmic form.
+"""
+import functools
+
+import numpy as np
+
+import groebner
+import interpolation
+from base_rings import FpField, QField, ZRing
+from polynomials import lex_key
+
+MAX_FIELD_SIZE = 2**26
+
+
+def prime_factors(n):
+    factors, d = [], 2
+    while d * d <= n:
+        if n % d == 0:
+            factors.append(d)
+            while n % d == 0:
+                n //= d
+        d += 1
+    return factors + [n] if n > 1 else factors
+
+
+def _mulmod(a, b, f, p):
+    """ Product of coefficient lists (lowest first) modulo the monic polynomial f and p. """
+    r = len(f) - 1
+    product = [0] * (len(a) + len(b) - 1)
+    for i, x in enumerate(a):
+        for j, y in enumerate(b):
+            product[i + j] = (product[i + j] + x * y) % p
+    for k in range(len(product) - 1, r - 1, -1):
+        c = product[k]
+        if c:
+            for j in range(r + 1):
+                product[k - r + j] = (product[k - r + j] - c * f[j]) % p
+    return (product + [0] * r)[:r]
+
+
+def _powmod(a, e, f, p):
+    result = [1] + [0] * (len(f) - 2)
+    while e:
+        if e & 1:
+            result = _mulmod(result, a, f, p)
+        a = _mulmod(a, a, f, p)
+        e >>= 1
+    return result
+
+
+def primitive_polynomial(p, r):
+    """ Least monic f of degree r over F_p (coefficients lowest first, coded base p) such that x generates (F_p[x]/f)^*. """
+    q = p**r
+    one = [1] + [0] * (r - 1)
+    x = [0, 1] + [0] * (r - 2) if r > 1 else None
+    exponents = [(q - 1) // l for l in prime_factors(q - 1)]
+    for code in range(1, q):
+        f = [code // p**k % p for k in range(r)] + [1]
+        generator = x if r > 1 else [-f[0] % p]
+        if _powmod(generator, q - 1, f, p) == one and all(_powmod(generator, e, f, p) != one for e in exponents):
+            return f
+    raise ArithmeticError(f"No primitive polynomial of degree {r} over F_{p}.")
+
+
+class GaloisField:
+    """
+        F_q for q = p^r with the tables exp (codes of x^k as coefficient vectors, shape (q - 1, r)) and log (log[c]
+        the k with x^k = c, 0 for c = 0). The table of powers is filled by doubling: the block x^(2^j), ..., x^(2^(j+1)-1)
+        is the previous one times the matrix of multiplication by x^(2^j).
+    """
+    def __init__(self, p, r=1):
+        q = p**r
+        if not interpolation.is_prime(p) or r < 1:
+            raise ValueError(f"F_{p}^{r} is not a finite field.")
+        if q > MAX_FIELD_SIZE:
+            raise ValueError(f"F_{q} has more than {MAX_FIELD_SIZE} elements.")
+        self.p, self.r, self.q = p, r, q
+        self.modulus = primitive_polynomial(p, r)
+        self.weights = p**np.arange(r, dtype=np.int64)
+        exp = np.zeros((q - 1, r), dtype=np.int32)
+        exp[0, 0] = 1
+        power = [0, 1] + [0] * (r - 2) if r > 1 else [-self.modulus[0] % p]
+        filled = 1
+        while filled < q - 1:
+            # row k: x^(2^j) * x^k for the basis x^k, k < r
+            matrix = np.array([_mulmod(power, [int(k == j) for j in range(r)], self.modulus, p) for k in range(r)], dtype=np.int64)
+            block = min(filled, q - 1 - filled)
+            exp[filled:filled + block] = exp[:block] @ matrix % p
+            filled += block
+            power = _mulmod(power, power, self.modulus, p)
+        self.exp = exp
+        self.log = np.zeros(q, dtype=np.int32)
+        self.log[exp.astype(np.int64) @ self.weights] = np.arange(q - 1, dtype=np.int32)
+
+    def __str__(self):
+        return f'F_{self.q}'
+
+    def values(self, polynomial, points):
+        """ Coefficient vectors (shape (N, r)) of the polynomial {exponent: int} at the points, codes of shape (N, k). """
+        points = np.asarray(points, dtype=np.int64)
+        total = np.zeros((len(points), self.r), dtype=np.int64)
+        if not polynomial:
+            return total
+        exponents = np.array(list(polynomial), dtype=np.int64).reshape(len(polynomial), points.shape[1])
+        coefficients = np.array([c % self.p for c in polynomial.values()], dtype=np.int64)
+        exponents, coefficients = exponents[coefficients != 0], coefficients[coefficients != 0]
+        logs = (self.log[points] @ exponents.T + self.log[coefficients]) % (self.q - 1)
+        live = (points == 0).astype(np.int64) @ (exponents > 0).T.astype(np.int64) == 0
+        for t in range(len(coefficients)):
+            total += self.exp[logs[:, t]] * live[:, t, None]
+        return total % self.p
+
+    def vanishing(self, polynomials, points):
+        """ Mask of the points (codes, shape (N, k)) at which all polynomials vanish. """
+        mask = np.ones(len(points), dtype=bool)
+        for f in polynomials:
+            rows = np.flatnonzero(mask)
+            if not rows.size:
+                break
+            mask[rows] = ~self.values(f, points[rows]).any(axis=1)
+        return mask
+
+
+@functools.lru_cache(maxsize=16)
+def galois_field(p, r=1):
+    return GaloisField(p, r)
+
+
+def residues(polynomials, p):
+    """ Polynomials over Z, Q or F_p (ring elements) as dicts {exponent: int} of residues modulo p. """
+    result = []
+    for f in polynomials:
+        terms = {}
+        for e, c in f.value.terms.items():
+            if isinstance(c.ring, QField):
+                if c.value[1] % p == 0:
+                    raise ValueError(f"{p} divides the denominator of {c}.")
+                terms[e] = c.value[0] * pow(c.value[1], -1, p) % p
+            elif isinstance(c.ring, FpField) and c.ring.p != p or not isinstance(c.ring, (ZRing, FpField)):
+                raise ValueError(f"Coefficients in {c.ring} cannot be reduced modulo {p}.")
+            else:
+                terms[e] = c.value % p
+        result.append(terms)
+    return result
+
+
+def grid(q, no_variables, start, stop):
+    """ Points number start, ..., stop - 1 of F_q^n in mixed radix, as codes of shape (stop - start, n). """
+    index = np.arange(start, stop, dtype=np.int64)
+    return index[:, None] // q**np.arange(no_variables, dtype=np.int64) % q
+
+
+def _count_chunk(field, polynomials, no_variables, bounds):
+    return int(field.vanishing(polynomials, grid(field.q, no_variables, *bounds)).sum())
+
+
+def lex_basis(polynomials, no_variables, p):
+    """ Reduced lex Groebner basis (x_0 > ... > x_{n-1}) over F_p, as dicts {exponent: int}. """
+    F = FpField(p)
+    engine = groebner.GroebnerEngine(F, lex_key)
+    polynomials = [{e: F(c) for e, c in f.items() if c % p} for f in polynomials]
+    basis = engine.reduced_basis([f for f in polynomials if f])
+    return [{e: c.value for e, c in g.items()} for g in basis]
+
+
+def _count_triangular(field, polynomials, no_variables, chunk_size):
+    """
+        Points of a lex Groebner basis found variable by variable from x_{n-1} to x_0: the partial points in the
+        variables x_k, ..., x_{n-1} are extended by all of F_q and kept when the basis elements in these variables
+        vanish. Those generate the elimination ideals, so few partial points survive for zero-dimensional systems.
+    """
+    n, q = no_variables, field.q
+    levels = [[] for _ in range(n + 1)]
+    for f in polynomials:
+        used = [i for i in range(n) if any(e[i] for e in f)]
+        k = min(used, default=n)
+        levels[k].append({e[k:]: c for e, c in f.items()})
+    partial = np.zeros((1, 0), dtype=np.int64)
+    if not field.vanishing(levels[n], partial).all():
+        return 0
+    values = np.arange(q, dtype=np.int64)
+    for k in range(n - 1, -1, -1):
+        blocks = []
+        step = max(1, chunk_size // q)
+        for start in range(0, len(partial), step):
+            block = partial[start:start + step]
+            extended = np.concatenate([np.repeat(values, len(block))[:, None], np.tile(block, (q, 1))], axis=1)
+            blocks.append(extended[field.vanishing(levels[k], extended)])
+        partial = np.concatenate(blocks) if blocks else np.zeros((0, n - k), dtype=np.int64)
+        if not len(partial):
+            return 0
+    return len(partial)
+
+
+def count_points(polynomials, no_variables, p, r=1, method='grid', chunk_size=2**16, processes=None):
+    """
+        Number of common zeros in F_q^n, q = p^r, of the polynomials ({exponent: int}, read modulo p). The 'grid'
+        method evaluates them on all q^n points in chunks of `chunk_size` points, which `processes` distributes over
+        a process pool; 'triangular' enumerates the points of their lex Groebner basis over F_p.
+    """
+    if method not in ('grid', 'triangular'):
+        raise ValueError(f"Unknown method {method}, use 'grid' or 'triangular'.")
+    field = galois_field(p, r)
+    polynomials = [f for f in polynomials if any(c % p for c in f.values())]
+    if not polynomials:
+        return field.q**no_variables
+    if method == 'triangular':
+        return _count_triangular(field, lex_basis(polynomials, no_variables, p), no_variables, chunk_size)
+    total = field.q**no_variables
+    bounds = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    count = functools.partial(_count_chunk, field, polynomials, no_variables)
+    with interpolation.pool(processes) as executor:
+        return sum(map(count, bounds) if executor is None else executor.map(count, bounds))
+
+
+def count_projective_points(polynomials, no_variables, p, r=1, method='grid', chunk_size=2**16, processes=None):
+    """
+        Number of common zeros in P^(n-1)(F_q) of homogeneous polynomials in n variables. P^(n-1) is the disjoint union
+        of the affine spaces x_0 = ... = x_{k-1} = 0, x_k = 1, so q^(n-1) + q^(n-2) + ... + 1 points are evaluated.
+    """
+    total = 0
+    for k in range(no_variables):
+        stratum = []
+        for f in polynomials:
+            terms = {}
+            for e, c in f.items():
+                if not any(e[:k]):
+                    terms[e[k + 1:]] = terms.get(e[k + 1:], 0) + c
+            stratum.append(terms)
+        total += count_points(stratum, no_variables - k - 1, p, r, method, chunk_size, processes)
+    return total
+
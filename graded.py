@@ -49,8 +49,8 @@ class GradedAlgebraFG(AlgebraFG):
 
 
 class GradedFGModule(FGModule, ABC):
-    def __init__(self, base_ring, no_generators, generators_gradation, name="AbstractGradedModule", generator_names=None, **properties):
-        super().__init__(base_ring, no_generators, name=name, generator_names=generator_names, **properties)
+    def __init__(self, base_ring, generators, generators_gradation=None, name="AbstractGradedModule", **properties):
+        super().__init__(base_ring, generators, name=name, **properties)
         self.generators_grades = generators_gradation
 
     @abstractmethod
@@ -69,10 +69,14 @@ class GradedFGModule(FGModule, ABC):
         return max(self.generators_grades)
 
 
-class HomogeneousIdeal(Ideal, GradedFGModule):
+class HomogeneousIdeal(KPolynomialIdeal, GradedFGModule):
+    """ Ideal of a KPolynomialAlgebra generated by polynomials homogeneous w.r.t. the total degree. """
     def __init__(self, generators, name="", **properties):
-        GradedFGModule.__init__(self, generators[0].ring, [g.degree() for g in generators], name, generators, **properties)
-        Ideal.__init__(self, generators, name=name, **properties)
+        degrees = [{sum(e) for e in g.value.terms} for g in generators]
+        if any(len(d) > 1 for d in degrees):
+            raise ValueError("Generators of a homogeneous ideal have to be homogeneous.")
+        KPolynomialIdeal.__init__(self, generators, name=name, **properties)
+        self.generators_grades = [g.value.degree for g in self.generators]
 
     def scalar_mul(self, element, scalar):
         return self([scalar * c for c in element.coefficients])
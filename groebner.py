@@ -0,0 +1,404 @@
+import heapq
+import itertools
+
+
+class GroebnerEngine:
+    """
+        Buchberger's algorithm on sparse polynomials stored as dicts {exponent tuple: coefficient}.
+
+        Coefficients are elements of the field `ring` and terms are compared by `key` (key of a monomial order).
+        Term arithmetic is kept in separate methods, so that submodules of free modules can reuse reduction
+        and pair criteria by overriding them.
+    """
+    def __init__(self, ring, key):
+        self.ring = ring
+        self.key = key
+        self._keys = {}
+
+    def sort_key(self, term):
+        k = self._keys.get(term)
+        if k is None:
+            k = self.key(term)
+            self._keys[term] = k
+        return k
+
+    #  ------ term arithmetic ------
+    @staticmethod
+    def divides(a, b):
+        return all(x <= y for x, y in zip(a, b))
+
+    @staticmethod
+    def quotient(b, a):
+        return tuple(y - x for x, y in zip(a, b))
+
+    @staticmethod
+    def lcm(a, b):
+        return tuple(max(x, y) for x, y in zip(a, b))
+
+    @staticmethod
+    def shift(term, monomial):
+        return tuple(x + y for x, y in zip(term, monomial))
+
+    @staticmethod
+    def coprime(a, b):
+        return all(x == 0 or y == 0 for x, y in zip(a, b))
+
+    #  ------ polynomial arithmetic ------
+    def is_zero(self, coefficient):
+        return self.ring.maybe_zero_check(coefficient)
+
+    def leading_term(self, f):
+        return max(f, key=self.sort_key)
+
+    def sorted_terms(self, f):
+        return sorted(f, key=self.sort_key, reverse=True)
+
+    def monic(self, f):
+        if not f:
+            return f
+        lc = f[self.leading_term(f)]
+        if lc == self.ring.one:
+            return f
+        return {t: self.ring.truediv(c, lc) for t, c in f.items()}
+
+    def add(self, f, g):
+        h = dict(f)
+        for t, c in g.items():
+            if t in h:
+                s = self.ring.add(h[t], c)
+                if self.is_zero(s):
+                    del h[t]
+                else:
+                    h[t] = s
+            else:
+                h[t] = c
+        return h
+
+    def scale(self, f, coefficient, monomial=None):
+        if monomial is None:
+            return {t: self.ring.mul(coefficient, c) for t, c in f.items()}
+        return {self.shift(t, monomial): self.ring.mul(coefficient, c) for t, c in f.items()}
+
+    def mul(self, f, g):
+        h = {}
+        for t, c in g.items():
+            h = self.add(h, self.scale(f, c, t))
+        return h
+
+    def sub_multiple(self, f, g, coefficient, monomial):
+        """ f -= coefficient * monomial * g, in place. """
+        for t, c in g.items():
+            t = self.shift(t, monomial)
+            value = self.ring.neg(self.ring.mul(coefficient, c))
+            if t in f:
+                value = self.ring.add(f[t], value)
+                if self.is_zero(value):
+                    del f[t]
+                    continue
+            f[t] = value
+
+    def divide(self, f, divisors, full=True):
+        """
+            Multivariate division of f by the list `divisors`, returns (quotients, remainder).
+            With full=False only the leading terms are reduced (the rest of f is returned untouched).
+        """
+        p = dict(f)
+        quotients = [{} for _ in divisors]
+        remainder = {}
+        leads = self._leads(divisors)
+        while p:
+            t = self.leading_term(p)
+            c = p[t]
+            for i, (lt, lc) in enumerate(leads):
+                if self.divides(lt, t):
+                    m = self.quotient(t, lt)
+                    q = self.ring.truediv(c, lc)
+                    quotients[i][m] = q
+                    self.sub_multiple(p, divisors[i], q, m)
+                    p.pop(t, None)
+                    break
+            else:
+                if not full:
+                    remainder.update(p)
+                    break
+                remainder[t] = p.pop(t)
+        return quotients, remainder
+
+    def _leads(self, divisors):
+        leads = []
+        for g in divisors:
+            lt = self.leading_term(g)
+            leads.append((lt, g[lt]))
+        return leads
+
+    def normal_form(self, f, basis):
+        return self.divide(f, basis)[1]
+
+    def normal_forms(self, polynomials, basis):
+        """ Remainders of many polynomials, the leading terms of the basis are computed once. """
+        leads = self._leads(basis)
+        return [self._remainder(f, basis, leads) for f in polynomials]
+
+    def _remainder(self, f, basis, leads):
+        p, remainder = dict(f), {}
+        while p:
+            t = self.leading_term(p)
+            c = p[t]
+            for (lt, lc), g in zip(leads, basis):
+                if self.divides(lt, t):
+                    self.sub_multiple(p, g, self.ring.truediv(c, lc), self.quotient(t, lt))
+                    p.pop(t, None)
+                    break
+            else:
+                remainder[t] = p.pop(t)
+        return remainder
+
+    def s_polynomial(self, f, g):
+        lf, lg = self.leading_term(f), self.leading_term(g)
+        lcm = self.lcm(lf, lg)
+        s = self.scale(f, self.ring.truediv(self.ring.one, f[lf]), self.quotient(lcm, lf))
+        self.sub_multiple(s, g, self.ring.truediv(self.ring.one, g[lg]), self.quotient(lcm, lg))
+        s.pop(lcm, None)
+        return s
+
+    #  ------ Buchberger ------
+    def basis(self, polynomials, bases=()):
+        """
+            Groebner basis of the ideal generated by `polynomials` and all elements of `bases`.
+            Every member of `bases` has to be a Groebner basis already: S-pairs inside of it are never formed,
+            which is how bases computed earlier are reused. Uses the product criterion, Buchberger's chain
+            criterion and the normal selection strategy. The result is in general neither minimal nor reduced.
+        """
+        G, leads, blocks = [], [], []
+        pending, heap = set(), []
+        counter = itertools.count()
+
+        def insert(h, block):
+            k = len(G)
+            lt = self.leading_term(h)
+            for i in range(k):
+                if block is not None and blocks[i] == block:
+                    continue
+                if self.coprime(leads[i], lt):
+                    continue
+                lcm = self.lcm(leads[i], lt)
+                if lcm is None:
+                    continue
+                pending.add((i, k))
+                heapq.heappush(heap, (self.sort_key(lcm), next(counter), i, k, lcm))
+            G.append(h)
+            leads.append(lt)
+            blocks.append(block)
+
+        def chain_criterion(i, j, lcm):
+            for k in range(len(G)):
+                if k == i or k == j or not self.divides(leads[k], lcm):
+                    continue
+                if (min(i, k), max(i, k)) not in pending and (min(j, k), max(j, k)) not in pending:
+                    return True
+            return False
+
+        for b, block in enumerate(bases):
+            for g in block:
+                if g:
+                    insert(self.monic(g), b)
+        for f in polynomials:
+            if f:
+                f = self.monic(self.normal_form(f, G)) if G else self.monic(f)
+                if f:
+                    insert(f, None)
+
+        while heap:
+            _, _, i, j, lcm = heapq.heappop(heap)
+            pending.discard((i, j))
+            if chain_criterion(i, j, lcm):
+                continue
+            h = self.normal_form(self.s_polynomial(G[i], G[j]), G)
+            if h:
+                insert(self.monic(h), None)
+        return G
+
+    def reduce_basis(self, G):
+        """ Reduced Groebner basis from any Groebner basis, sorted decreasingly by leading terms. """
+        G = sorted([g for g in G if g], key=lambda g: self.sort_key(self.leading_term(g)))
+        minimal = []
+        for g in G:
+            lt = self.leading_term(g)
+            if not any(self.divides(self.leading_term(h), lt) for h in minimal):
+                minimal.append(g)
+        reduced = [self.monic(self.normal_form(g, minimal[:i] + minimal[i+1:])) for i, g in enumerate(minimal)]
+        return reduced[::-1]
+
+    def reduced_basis(self, polynomials, bases=()):
+        return self.reduce_basis(self.basis(polynomials, bases))
+
+    def is_basis(self, G):
+        G = [g for g in G if g]
+        for f, g in itertools.combinations(G, 2):
+            if self.coprime(self.leading_term(f), self.leading_term(g)):
+                continue
+            if self.lcm(self.leading_term(f), self.leading_term(g)) is None:
+                continue
+            if self.normal_form(self.s_polynomial(f, g), G):
+                return False
+        return True
+
+
+class ModuleGroebnerEngine(GroebnerEngine):
+    """
+        Groebner bases of submodules of a free module R^n, R = k[x_1, ..., x_m]. A term is a pair (position, exponent
+        tuple) standing for x^exponent * e_position, vectors are dicts {term: coefficient}. Only the term arithmetic
+        differs from ideals: terms in different positions never divide each other and have no lcm, so their
+        S-pairs are never formed, and there is no product criterion. Orders are 'pot' (position over term, e_0 > e_1 > ...)
+        and 'top' (term over position) on top of the monomial order `key`.
+    """
+    def __init__(self, ring, key, order='pot'):
+        if order == 'pot':
+            module_key = lambda term: (-term[0], key(term[1]))
+        elif order == 'top':
+            module_key = lambda term: (key(term[1]), -term[0])
+        else:
+            raise ValueError(f"Unknown module order {order}, use 'pot' or 'top'.")
+        super().__init__(ring, module_key)
+        self.order = order
+        self.monomial_key = key
+
+    @staticmethod
+    def divides(a, b):
+        return a[0] == b[0] and all(x <= y for x, y in zip(a[1], b[1]))
+
+    @staticmethod
+    def quotient(b, a):
+        return tuple(y - x for x, y in zip(a[1], b[1]))
+
+    @staticmethod
+    def lcm(a, b):
+        if a[0] != b[0]:
+            return None
+        return a[0], tuple(max(x, y) for x, y in zip(a[1], b[1]))
+
+    @staticmethod
+    def shift(term, monomial):
+        return term[0], tuple(x + y for x, y in zip(term[1], monomial))
+
+    @staticmethod
+    def coprime(a, b):
+        return False
+
+    #  ------ syzygies and resolutions ------
+    def syzygy_module(self, vectors, rank, no_variables):
+        """
+            Generators of the syzygies of `vectors` (elements of R^rank) as vectors in R^len(vectors): the vectors
+            extended by unit vectors e_{rank + i}, whose Groebner basis in position over term order contains a
+            basis of the syzygies in the positions >= rank.
+        """
+        engine = ModuleGroebnerEngine(self.ring, self.monomial_key, 'pot')
+        zero = (0,) * no_variables
+        G = engine.reduced_basis([self.add(v, {(rank + i, zero): self.ring.one}) for i, v in enumerate(vectors)])
+        return [{(p - rank, e): c for (p, e), c in g.items()} for g in G if engine.leading_term(g)[0] >= rank]
+
+    def syzygies(self, G):
+        """
+            Groebner basis of the syzygies of the Groebner basis G w.r.t. Schreyer's order induced by G, together
+            with the engine of that order. The quotients of the reduction of each S-pair to zero give a syzygy
+            with leading term (lcm / lt(g_i)) * e_i, i < j (Schreyer); pairs whose leading term is a multiple of
+            another one are not reduced at all.
+        """
+        leads = self._leads(G)
+        candidates = {}
+        for i, j in itertools.combinations(range(len(G)), 2):
+            lcm = self.lcm(leads[i][0], leads[j][0])
+            if lcm is not None:
+                candidates.setdefault(i, []).append((self.quotient(lcm, leads[i][0]), j, lcm))
+        syzygies = []
+        for i, pairs in candidates.items():
+            kept = []
+            for m, j, lcm in sorted(pairs, key=lambda pair: (sum(pair[0]), pair[1])):
+                if not any(self.divides((0, n), (0, m)) for n, _, _ in kept):
+                    kept.append((m, j, lcm))
+            for m, j, lcm in kept:
+                a = self.ring.truediv(self.ring.one, leads[i][1])
+                b = self.ring.truediv(self.ring.one, leads[j][1])
+                s = self.scale(G[i], a, m)
+                self.sub_multiple(s, G[j], b, self.quotient(lcm, leads[j][0]))
+                quotients, remainder = self.divide(s, G)
+                if remainder:
+                    raise ValueError("Syzygies need a Groebner basis.")
+                syzygy = self.add({(i, m): a}, {(j, self.quotient(lcm, leads[j][0])): self.ring.neg(b)})
+                for k, q in enumerate(quotients):
+                    syzygy = self.add(syzygy, {(k, t): self.ring.neg(c) for t, c in q.items()})
+                syzygies.append(syzygy)
+        return syzygies, SchreyerEngine(self, [lt for lt, _ in leads])
+
+    def resolution(self, G):
+        """
+            Schreyer's free resolution of R^rank / <G> for a Groebner basis G: the differentials d_1, d_2, ... as
+            lists of columns, d_k being vectors over the basis of F_{k-1}. Every basis is the syzygy basis of the
+            previous one w.r.t. the induced order, no Groebner basis is computed from scratch. Within a position
+            the generators are sorted lexicographically decreasing, so the resolution has length at most the
+            number of variables.
+        """
+        differentials, engine = [], self
+        while G:
+            G = sorted(G, key=lambda g: (engine.leading_term(g)[0], tuple(-e for e in engine.leading_term(g)[1])))
+            differentials.append(G)
+            G, engine = engine.syzygies(G)
+        return differentials
+
+    def minimize_resolution(self, differentials, rank):
+        """
+            Removes the trivial summands 0 <- R <-u- R <- 0 of a free resolution with F_0 = R^rank while some
+            differential has a unit entry u: the column of u clears its row, then the row and column are dropped
+            together with the matching column of the previous and row of the next differential (a row of d_1 is a
+            summand of F_0). Returns the differentials and the remaining rank of F_0; for graded resolutions the
+            result is minimal.
+        """
+        d = [[dict(column) for column in D] for D in differentials]
+        k = 0
+        while k < len(d):
+            pivot = self._unit_entry(d[k])
+            if pivot is None:
+                k += 1
+                continue
+            i, j, zero = pivot
+            columns = d[k]
+            u = columns[j][(i, zero)]
+            for l, column in enumerate(columns):
+                if l != j:
+                    for e, c in [(e, c) for (p, e), c in column.items() if p == i]:
+                        self.sub_multiple(column, columns[j], self.ring.truediv(c, u), e)
+            del columns[j]
+            d[k] = [self._drop_position(column, i) for column in columns]
+            if k > 0:
+                del d[k - 1][i]
+            else:
+                rank -= 1
+            if k + 1 < len(d):
+                d[k + 1] = [self._drop_position(column, j) for column in d[k + 1]]
+        while d and not d[-1]:
+            d.pop()
+        return d, rank
+
+    @staticmethod
+    def _unit_entry(columns):
+        for j, column in enumerate(columns):
+            for (p, e), c in column.items():
+                if not any(e) and all(q != p or f == e for q, f in column):
+                    return p, j, e
+        return None
+
+    @staticmethod
+    def _drop_position(vector, i):
+        return {(p - (p > i), e): c for (p, e), c in vector.items() if p != i}
+
+
+class SchreyerEngine(ModuleGroebnerEngine):
+    """
+        Schreyer's order induced by a Groebner basis g_0, g_1, ... w.r.t. `engine`: x^a * e_i > x^b * e_j when
+        lt(x^a * g_i) > lt(x^b * g_j), and for equal leading terms when i < j.
+    """
+    def __init__(self, engine, leads):
+        key = lambda term: (engine.sort_key(engine.shift(leads[term[0]], term[1])), -term[0])
+        GroebnerEngine.__init__(self, engine.ring, key)
+        self.order = 'schreyer'
+        self.monomial_key = engine.monomial_key
@@ -1,139 +1,661 @@
 from modules import *
+import cosets
+import permutations
+import random
+import rewriting
+
+class FiniteGroupElement(GroupElement):
+    """ Handle of an element of a FiniteGroup: `value` is its index, the shortlex word is looked up when needed. """
+    def __init__(self, group, index):
+        self.group = group
+        self.value = index
+
+    @property
+    def sequence_of_generators(self):
+        return self.group.words[self.value]
+
 
 class FiniteGroup(FPGroup):
-    def __init__(self, generators, relations, name=None, **properties):
+    """
+        Finite group <generators | relations>. Elements and relations are words: sequences of generators and
+        (generator, exponent) pairs. Order, indices of elements and the multiplication table come from the
+        Todd-Coxeter enumeration of the cosets of the trivial subgroup, i.e. from the regular representation.
+        Elements are interned as indices: products and inverses are lookups in an int32 table (materialized up to
+        `max_table_order` elements, larger groups trace words through the coset table) and an inverse array.
+        Shortlex normal forms of single words come from a Knuth-Bendix rewriting system of at most `max_rules` rules,
+        without enumerating the cosets.
+    """
+    def __init__(self, generators, relations, name=None, strategy='hlt', max_rules=500, max_table_order=2**12,
+                 **properties):
+        relations = [self.reduce_sequence(self._pairs(r)) for r in relations]
         super().__init__(generators, relations, name=name, **properties)
+        self.strategy = strategy
+        self.max_rules = max_rules
+        self.max_table_order = max_table_order
+        self._generator_index = {g: i for i, g in enumerate(generators)}
 
     def __call__(self, sequence_of_generators):
-        sequence_of_generators = self.reduce_sequence(sequence_of_generators)
-        x = GroupElement(self, sequence_of_generators, sequence_of_generators)
-        return self.reduce(x)
+        if isinstance(sequence_of_generators, (int, np.integer)):
+            return FiniteGroupElement(self, int(sequence_of_generators))
+        letters = self._letters(self.reduce_sequence(self._pairs(sequence_of_generators)))
+        return FiniteGroupElement(self, int(cosets.trace(self.coset_table, letters)))
+
+    @staticmethod
+    def _pairs(sequence):
+        return [s if isinstance(s, tuple) else (s, 1) for s in sequence]
 
     @staticmethod
     def reduce_sequence(sequence):
-        if len(sequence) < 2:
-            return sequence
-        for i, a, b in enumerate(zip(sequence[:-1], sequence[1:])):
-            x, y = a[0], b[0]
-            if x == y:
-                sequence = sequence[:i] + [(x, a[1] + b[1])] + sequence[i + 2:]
-                return FiniteGroup.reduce_sequence(sequence)
+        """ Free reduction: adjacent powers of the same generator are merged, zero exponents dropped. """
+        reduced = []
+        for g, n in sequence:
+            if reduced and reduced[-1][0] == g:
+                n += reduced.pop()[1]
+            if n:
+                reduced.append((g, n))
+        return reduced
 
     def reduce(self, element):
-        length = len(element.sequence_of_generators)
-        for relation in self.relations:
-            rel_len = len(relation)
-            for i in range(length - rel_len + 1):
-                if element.sequence_of_generators[i:i + rel_len] == relation:
-                    element.sequence_of_generators = element.sequence_of_generators[:i] + element.sequence_of_generators[i + rel_len:]
-                    return self.reduce(element)
+        """ Handle of the element given by a word, whose sequence is then the shortlex normal form. """
+        return self(element.sequence_of_generators)
+
+    @functools.cached_property
+    def rewriting_system(self):
+        """ Confluent shortlex rewriting system by Knuth-Bendix completion, None when it needs more than `max_rules` rules. """
+        try:
+            return rewriting.complete(self.no_generators, self._relators, self.max_rules)
+        except RuntimeError:
+            return None
+
+    def normal_form(self, sequence_of_generators):
+        """
+            Shortlex least word equal to the given word: one pass of the rewriting system or, for presentations
+            whose completion is too large, the word of the coset reached in the coset table (the same word).
+        """
+        letters = self._letters(self.reduce_sequence(self._pairs(sequence_of_generators)))
+        if self.rewriting_system is not None:
+            return self._sequence(self.rewriting_system.reduce(letters))
+        return self.words[int(cosets.trace(self.coset_table, letters))]
+
+    #  ------ coset enumeration ------
+    def _letters(self, sequence):
+        return cosets.letters([(self._generator_index[g], n) for g, n in sequence])
+
+    def _sequence(self, letters):
+        return self.reduce_sequence([(self.generators[l // 2], -1 if l % 2 else 1) for l in letters])
+
+    @functools.cached_property
+    def _relators(self):
+        return [self._letters(r) for r in self.relations]
+
+    @functools.cached_property
+    def coset_table(self):
+        """ Coset table of the trivial subgroup: row i is the element with index i, column 2k (2k + 1) multiplies by g_k (g_k^-1). """
+        return cosets.coset_table(self.no_generators, self._relators, strategy=self.strategy)
+
+    @functools.cached_property
+    def _representatives(self):
+        return cosets.representatives(self.coset_table)
+
+    @functools.cached_property
+    def words(self):
+        """
+            Shortlex normal form of every element, as a sequence of (generator, exponent) pairs: the breadth-first
+            Schreier tree scans letters in order, so the word of every coset is its shortlex least word.
+        """
+        return [self._sequence(w) for w in self._representatives]
+
+    def permutation_representation(self, subgroup=()):
+        """
+            Permutations (NumPy arrays) of the cosets of the subgroup generated by the words `subgroup`, one for each
+            generator, by right multiplication. For the trivial subgroup this is the faithful regular representation.
+        """
+        table = self.coset_table if not subgroup else cosets.coset_table(
+            self.no_generators, self._relators, [self._letters(self._pairs(w)) for w in subgroup], self.strategy)
+        return [table[:, 2 * k] for k in range(self.no_generators)]
+
+    def permutation_group(self, subgroup=()):
+        """ PermutationGroup of the action on the cosets of the subgroup generated by the words `subgroup`. """
+        return PermutationGroup(self.permutation_representation(subgroup), order=None if subgroup else self.order,
+                                name=f'{self.name} on cosets' if subgroup else self.name)
+
+    def index(self, element):
+        """ Index of the element in `elements`, 0 for the identity. """
+        if isinstance(element, FiniteGroupElement) and element.group is self:
+            return element.value
+        return int(cosets.trace(self.coset_table, self._letters(element.sequence_of_generators)))
+
+    #  ------ arithmetic on indices ------
+    @functools.cached_property
+    def table(self):
+        """ Multiplication table of indices (int32), table[i, j] = index(elements[i] * elements[j]). """
+        return cosets.multiplication_table(self.coset_table)
+
+    @functools.cached_property
+    def inverses(self):
+        """ Index array of the inverses, inverses[i] = index(~elements[i]). """
+        return cosets.inverses(self.coset_table)
+
+    def products(self, a, b):
+        """ Indices of the products of two (broadcast) arrays of indices. """
+        a, b = np.broadcast_arrays(np.asarray(a), np.asarray(b))
+        if self.order <= self.max_table_order:
+            return self.table[a, b]
+        result = a.astype(np.int32)
+        for column in np.moveaxis(self._padded_words[b], -1, 0):
+            mask = column >= 0
+            result[mask] = self.coset_table[result[mask], column[mask]]
+        return result
 
-        return element
+    @functools.cached_property
+    def _padded_words(self):
+        """ Letters of the normal forms as rows of an int32 array, padded with -1. """
+        words = self._representatives
+        padded = np.full((len(words), max(map(len, words))), -1, dtype=np.int32)
+        for i, w in enumerate(words):
+            padded[i, :len(w)] = w
+        return padded
+
+    def conjugates(self, a, g):
+        """ Indices of g^-1 * a * g for (broadcast) arrays of indices a and g. """
+        g = np.asarray(g)
+        return self.products(self.products(self.inverses[g], a), g)
+
+    #  ------ conjugacy classes ------
+    @functools.cached_property
+    def _conjugations(self):
+        """ Conjugation by each generator as a permutation of the indices, g -> s^-1 * g * s. """
+        elements = np.arange(self.order, dtype=np.int32)
+        generators = [int(self.coset_table[0, 2 * k]) for k in range(self.no_generators)]
+        return [self.coset_table[self.products(self.inverses[s], elements), 2 * k] for k, s in enumerate(generators)]
+
+    @functools.cached_property
+    def conjugacy_classes(self):
+        """ Index arrays of the conjugacy classes, the orbits of conjugation by the generators; the class of 1 comes first. """
+        seen = np.zeros(self.order, dtype=bool)
+        classes = []
+        for g in range(self.order):
+            if not seen[g]:
+                orbit = np.sort(permutations.orbit(self._conjugations, g, self.order)[0]).astype(np.int32)
+                seen[orbit] = True
+                classes.append(orbit)
+        return classes
+
+    @functools.cached_property
+    def class_index(self):
+        """ class_index[g] is the number of the conjugacy class of the element with index g. """
+        result = np.empty(self.order, dtype=np.int32)
+        for k, c in enumerate(self.conjugacy_classes):
+            result[c] = k
+        return result
+
+    @functools.cached_property
+    def class_sizes(self):
+        return np.array([len(c) for c in self.conjugacy_classes])
+
+    @functools.cached_property
+    def centralizer_orders(self):
+        return self.order // self.class_sizes
+
+    def centralizer(self, element):
+        """ Index array of the elements commuting with the element, from one comparison of g*x and x*g over all x. """
+        g, elements = self.index(element), np.arange(self.order)
+        return np.flatnonzero(self.products(g, elements) == self.products(elements, g)).astype(np.int32)
+
+    def power_map(self, n):
+        """ Array whose k-th entry is the class of the n-th power of the elements of class k. """
+        powers = np.array([c[0] for c in self.conjugacy_classes])
+        result = np.zeros(len(powers), dtype=np.int32)
+        base, e = powers, n % self.exponent
+        while e:
+            if e & 1:
+                result = self.products(result, base)
+            base, e = self.products(base, base), e >> 1
+        return self.class_index[result]
+
+    @functools.cached_property
+    def class_orders(self):
+        """ Orders of the elements of each conjugacy class, by multiplying all representatives at once. """
+        representatives = np.array([c[0] for c in self.conjugacy_classes])
+        orders, power = np.ones(len(representatives), dtype=np.int64), representatives.copy()
+        moving = power != 0
+        while moving.any():
+            power[moving] = self.products(power[moving], representatives[moving])
+            orders[moving] += 1
+            moving = power != 0
+        return orders
+
+    @functools.cached_property
+    def exponent(self):
+        return int(np.lcm.reduce(self.class_orders))
+
+    @functools.cached_property
+    def class_structure_constants(self):
+        """
+            Array c with c[i, j, k] = #{(x, y) : x in C_i, y in C_j, x*y = z_k} for a fixed z_k in C_k, the structure
+            constants of the class sums in the centre of the group algebra (the input of Burnside's and Dixon's
+            algorithms for character tables). For each z_k and class C_i the elements y = x^-1 * z_k are classified
+            at once.
+        """
+        r = len(self.conjugacy_classes)
+        constants = np.zeros((r, r, r), dtype=np.int64)
+        for k, z in enumerate(c[0] for c in self.conjugacy_classes):
+            for i, C in enumerate(self.conjugacy_classes):
+                constants[i, :, k] = np.bincount(self.class_index[self.products(self.inverses[C], z)], minlength=r)
+        return constants
 
-    @functools.lru_cache(maxsize=1000)
     def mul(self, a, b):
-        return self(a.sequence_of_generators + b.sequence_of_generators)
+        if self.order <= self.max_table_order:
+            return FiniteGroupElement(self, int(self.table[a.value, b.value]))
+        return FiniteGroupElement(self, int(cosets.trace(self.coset_table, self._representatives[b.value], a.value)))
 
     def eq(self, g, h):
-        return g.sequence_of_generators == h.sequence_of_generators
+        return g.value == h.value
+
+    def hash(self, a):
+        return hash(a.value)
 
     def generator_elements(self):
         return [self([g]) for g in self.generators]
 
     @functools.cached_property
     def elements(self):
-        def add_multiples(list_of_elements):
-            new_list = []
-            for g in list_of_elements:
-                for h in self.generators:
-                    if g*h not in new_list:
-                        new_list.append(g*h)
-            return new_list
-
-        list_of_elements = self.generator_elements()
-        while True:
-            new_list = add_multiples(list_of_elements)
-            if len(new_list) == len(list_of_elements):
-                return list_of_elements
-            list_of_elements = new_list
+        """ All elements, the i-th one given by a shortest word of the coset with index i. """
+        return [FiniteGroupElement(self, i) for i in range(self.order)]
 
     @functools.cached_property
-    def table(self):
-        return {(g, h): g*h for g, h in itertools.product(self.elements, repeat=2)}
+    def order(self):
+        return len(self.coset_table)
+
+    @property
+    def one(self):
+        return FiniteGroupElement(self, 0)
+
+    def inv(self, a):
+        return FiniteGroupElement(self, int(self.inverses[a.value]))
+
+    @staticmethod
+    def element_str(element):
+        return '*'.join(str(g) if n == 1 else f'{g}^{n}' for g, n in element.sequence_of_generators) or '1'
+
+
+class PermutationGroup(FGGroup):
+    """
+        Group generated by permutations of {0, ..., degree - 1}, given as arrays of images or as lists of cycles.
+        Elements hold int32 image arrays and act on the right. Order, membership, uniformly random elements and
+        stabilizers come from a Schreier-Sims stabilizer chain, so the elements are never enumerated. The chain is
+        found by random Schreier-Sims and verified by sifting all Schreier generators unless the `order` is known
+        (see StabilizerChain). With `deterministic=False` the verification is skipped: order and membership are
+        then Monte Carlo results: the order may come out too small and members may be rejected, but non-members
+        are never accepted.
+    """
+    def __init__(self, generators, degree=None, name=None, order=None, deterministic=True, tries=20, **properties):
+        if degree is None:
+            degree = max((len(g) if not self._is_cycles(g) else max(map(max, g), default=-1) + 1
+                          for g in generators), default=0)
+        self.degree = degree
+        super().__init__([self._array(g) for g in generators], name, **properties)
+        self.generator_names = [self.element_str(g) for g in self.generator_elements()]
+        self.known_order = order
+        self.deterministic = deterministic
+        self.tries = tries
+
+    @staticmethod
+    def _is_cycles(x):
+        return not isinstance(x, np.ndarray) and (not len(x) or isinstance(x[0], tuple))
+
+    def _array(self, x):
+        if isinstance(x, GroupElement):
+            return x.value
+        if self._is_cycles(x):
+            return permutations.from_cycles(x, self.degree)
+        x = np.asarray(x, dtype=np.int32)
+        if x.shape != (self.degree,) or not (np.sort(x) == np.arange(self.degree)).all():
+            raise ValueError(f"Not a permutation of {self.degree} points: {x}.")
+        return x
+
+    def __call__(self, permutation):
+        return GroupElement(self, self._array(permutation))
+
+    def generator_elements(self):
+        return [GroupElement(self, g) for g in self.generators]
+
+    @functools.cached_property
+    def stabilizer_chain(self):
+        return permutations.StabilizerChain(self.generators, self.degree, order=self.known_order,
+                                            deterministic=self.deterministic, tries=self.tries)
+
+    @property
+    def base(self):
+        return self.stabilizer_chain.base
+
+    @property
+    def strong_generators(self):
+        return [GroupElement(self, g) for g in self.stabilizer_chain.strong_generators]
 
     @functools.cached_property
     def order(self):
-        return len(self.elements)
+        """ Order of the group; with `deterministic=False` possibly too small, with small probability. """
+        return self.stabilizer_chain.order()
+
+    def contains(self, element):
+        """ Membership test by sifting through the stabilizer chain, see `order` for `deterministic=False`. """
+        return self.stabilizer_chain.contains(self._array(element))
+
+    def __contains__(self, element):
+        return self.contains(element)
+
+    def random_element(self, rng=random):
+        return GroupElement(self, self.stabilizer_chain.random_element(rng))
+
+    def orbit(self, point):
+        """ Orbit of the point, in breadth-first order. """
+        return permutations.orbit(self.generators, point, self.degree)[0]
+
+    def orbits(self):
+        seen = np.zeros(self.degree, dtype=bool)
+        result = []
+        for point in range(self.degree):
+            if not seen[point]:
+                result.append(self.orbit(point))
+                seen[result[-1]] = True
+        return result
+
+    def stabilizer(self, point):
+        """ Stabilizer of the point, from a stabilizer chain whose base starts with it. """
+        chain = permutations.StabilizerChain(self.generators, self.degree, base=[point], order=self.known_order,
+                                             deterministic=self.deterministic, tries=self.tries)
+        return PermutationGroup(chain._level_generators(1), self.degree, order=chain.order() // len(chain.orbit(0)),
+                                name=f'{self.name}_{point}')
+
+    def mul(self, a, b):
+        return GroupElement(self, permutations.compose(a.value, b.value))
+
+    def eq(self, a, b):
+        return bool((a.value == b.value).all())
+
+    def hash(self, a):
+        return hash(a.value.tobytes())
 
     @property
     def one(self):
-        return self([])
+        return GroupElement(self, permutations.identity(self.degree))
 
-    @functools.lru_cache(maxsize=1000)
     def inv(self, a):
-        multiples = [(g, self.table[(a, g)]) for g in self.elements]
-        for g, h in multiples:
-            if h == self.one:
-                return g
+        return GroupElement(self, permutations.invert(a.value))
 
     @staticmethod
     def element_str(element):
-        return "*".join(element.sequence_of_generators)
+        return ''.join('(' + ' '.join(map(str, c)) + ')' for c in permutations.cycles(element.value)) or '()'
+
+
+class FreeGroupElement(GroupElement):
+    """ Element of a FreeGroup: `value` is the freely reduced word as an int32 array of letters (see `cosets`). """
+    def __init__(self, group, letters):
+        self.group = group
+        self.value = letters
+
+    @property
+    def sequence_of_generators(self):
+        return self.group.sequence(self.value)
 
 
 class FreeGroup(FPGroup):
+    """
+        Free group on `generators`. Words are stored freely reduced as int32 arrays of letters: letter 2i is the
+        i-th generator and 2i + 1 its inverse. Subgroups are given by generating words; their folded Stallings
+        graphs are cached and answer membership and index questions.
+    """
+    def __init__(self, generators, name=None, **properties):
+        super().__init__(generators, [], name=name, **properties)
+        self._generator_index = {g: i for i, g in enumerate(generators)}
+        self._stallings_graphs = {}
+
     def __call__(self, sequence_of_generators):
-        x = GroupElement(self, sequence_of_generators, sequence_of_generators)
-        return x
+        if isinstance(sequence_of_generators, np.ndarray):
+            return FreeGroupElement(self, self.free_reduction(sequence_of_generators))
+        pairs = [s if isinstance(s, tuple) else (s, 1) for s in sequence_of_generators]
+        letters = cosets.letters([(self._generator_index[g], n) for g, n in pairs])
+        return FreeGroupElement(self, self.free_reduction(letters))
+
+    @staticmethod
+    def free_reduction(letters):
+        """ Freely reduced word of the letters by one pass with a stack, as an int32 array; the pass is a Python loop over the letters. """
+        stack = []
+        for l in map(int, letters):
+            if stack and stack[-1] == l ^ 1:
+                stack.pop()
+            else:
+                stack.append(l)
+        return np.array(stack, dtype=np.int32)
+
+    def sequence(self, letters):
+        """ Sequence of (generator, exponent) pairs of a word of letters. """
+        if not len(letters):
+            return []
+        breaks = np.flatnonzero(np.diff(letters)) + 1
+        starts = np.concatenate([[0], breaks])
+        lengths = np.diff(np.concatenate([starts, [len(letters)]]))
+        return [(self.generators[int(letters[i]) // 2], -int(n) if letters[i] % 2 else int(n))
+                for i, n in zip(starts, lengths)]
+
+    def generator_elements(self):
+        return [FreeGroupElement(self, np.array([2 * i], dtype=np.int32)) for i in range(self.no_generators)]
 
     def mul(self, a, b):
-        return self(a.sequence_of_generators + b.sequence_of_generators)
+        """ Concatenation cancelling the longest suffix of a that is inverse to a prefix of b. """
+        u, v = a.value, b.value
+        m = min(len(u), len(v))
+        cancelling = u[len(u) - m:][::-1] ^ 1 == v[:m]
+        k = m if cancelling.all() else int(np.argmin(cancelling))
+        return FreeGroupElement(self, np.concatenate([u[:len(u) - k], v[k:]]))
 
     def eq(self, g, h):
-        return g.sequence_of_generators == h.sequence_of_generators
+        return np.array_equal(g.value, h.value)
+
+    def hash(self, a):
+        return hash(a.value.tobytes())
 
     @property
     def one(self):
-        return self([])
+        return FreeGroupElement(self, np.zeros(0, dtype=np.int32))
 
     def inv(self, a):
-        return self(list(map(lambda s: (s[0], -s[1]), a.sequence_of_generators[::-1])))
+        return FreeGroupElement(self, a.value[::-1] ^ 1)
 
+    @staticmethod
+    def element_str(element):
+        return '*'.join(str(g) if n == 1 else f'{g}^{n}' for g, n in element.sequence_of_generators) or '1'
+
+    #  ------ subgroups ------
+    def stallings_graph(self, subgroup):
+        """
+            Folded Stallings graph (partial coset table) of the subgroup generated by the elements `subgroup`. The
+            folding scans every letter of the generators in Python, its cost is linear in their total length.
+        """
+        return self._stallings_entry(subgroup)[0]
+
+    def _stallings_entry(self, subgroup):
+        """ (graph, graph as nested lists), cached by the words of the generators. """
+        key = tuple(sorted(self(w).value.tobytes() if not isinstance(w, GroupElement) else w.value.tobytes()
+                           for w in subgroup))
+        if key not in self._stallings_graphs:
+            words = [np.frombuffer(w, dtype=np.int32).tolist() for w in key]
+            graph = cosets.stallings_graph(self.no_generators, words)
+            self._stallings_graphs[key] = (graph, graph.tolist())
+        return self._stallings_graphs[key]
+
+    def subgroup_contains(self, subgroup, element):
+        """ Whether the element lies in the subgroup generated by `subgroup`: its word is read from 0 back to 0. """
+        graph = self._stallings_entry(subgroup)[1]
+        c = 0
+        for l in element.value.tolist():
+            c = graph[c][l]
+            if c < 0:
+                return False
+        return c == 0
+
+    def subgroup_index(self, subgroup):
+        """ Index of the subgroup generated by `subgroup`, math.inf unless its Stallings graph is a complete cover. """
+        graph = self.stallings_graph(subgroup)
+        return len(graph) if (graph >= 0).all() else math.inf
+
+
+def _integer_array(rows, no_columns=None):
+    """ Integer rows as an int64 array, or as an object array of Python ints when an entry exceeds the int64 range. """
+    array = rows if isinstance(rows, np.ndarray) else np.array(rows, dtype=object)
+    if array.dtype.kind == 'u':
+        array = array.astype(object)
+    elif array.dtype != object:
+        array = array.astype(np.int64)
+    if no_columns is not None:
+        array = array.reshape(-1, no_columns)
+    if array.dtype == object and Matrix._fits_int64(Matrix._max_abs(array) + 1):
+        array = array.astype(np.int64)
+    return array
+
+
+class AbelianGroupElement(GroupElement):
+    """ Element of an FPAbelianGroup: `value` is its exponent vector in normal form (a NumPy array). """
+    def __init__(self, group, vector):
+        self.group = group
+        self.value = vector
 
-class FreeAbelianGroup(FGAbelianGroup, FPGroup):
-    def __init__(self, generators, name=None, **properties):
-        AbelianGroup.__init__(self, name, **properties)
-        FPGroup.__init__(self, generators, [], name=name, abelian=True, **properties)
-        self.generators.sort(key=lambda x: str(x))
+    @property
+    def sequence_of_generators(self):
+        return [(g, int(n)) for g, n in zip(self.group.generators, self.value) if n]
+
+
+class AbelianGroupElementBatch:
+    """
+        N elements of an FPAbelianGroup stored as the rows of one array of exponent vectors in normal form, so that
+        addition, negation, comparison and deduplication act on all rows at once.
+    """
+    def __init__(self, group, array):
+        self.group = group
+        self.array = group.normal_forms(array)
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return AbelianGroupElement(self.group, self.array[index].copy())
+        return AbelianGroupElementBatch(self.group, self.array[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def _other_array(self, other):
+        return other.value[None, :] if isinstance(other, GroupElement) else other.array
+
+    def __add__(self, other):
+        return AbelianGroupElementBatch(self.group, self.array + self._other_array(other))
+
+    def __neg__(self):
+        return AbelianGroupElementBatch(self.group, -self.array)
+
+    def __sub__(self, other):
+        return AbelianGroupElementBatch(self.group, self.array - self._other_array(other))
+
+    def equal(self, other):
+        """ Boolean array comparing the rows with the rows of another batch (or with one element). """
+        return (self.array == self._other_array(other)).all(axis=1)
+
+    def __eq__(self, other):
+        return bool(self.equal(other).all())
+
+    def unique(self):
+        """ Distinct elements in order of first appearance; normal forms are canonical, so rows are compared as bytes. """
+        array = np.ascontiguousarray(self.array)
+        if array.dtype == object:
+            first = list({tuple(row): i for i, row in reversed(list(enumerate(array.tolist())))}.values())
+            return AbelianGroupElementBatch(self.group, array[sorted(first)])
+        keys = array.view(np.dtype((np.void, array.dtype.itemsize * array.shape[1]))).ravel()
+        _, first = np.unique(keys, return_index=True)
+        return AbelianGroupElementBatch(self.group, array[np.sort(first)])
+
+    def __str__(self):
+        return '\n'.join(str(e) for e in self)
+
+
+class FPAbelianGroup(FGAbelianGroup, FPGroup):
+    """
+        Z^n / L for the lattice L spanned by the exponent vectors of `relations`. Reducing a vector by the rows of the
+        Hermite normal form H of L, in the order of their pivots, leaves every pivot coordinate in [0, p) for the pivot
+        p, which gives a canonical representative of every class with bounded torsion coordinates. `moduli` are the
+        invariant factors of L. Elements are these representatives as int64 vectors, or as object vectors of Python
+        ints when an entry exceeds the int64 range.
+    """
+    def __init__(self, generators, relations, name=None, **properties):
+        FPGroup.__init__(self, generators, relations, name=name, abelian=True, **properties)
+        rows = [self._exponent_vector(r) for r in relations]
+        S = lattices.smith_normal_form(rows, self.no_generators)
+        self.moduli = _integer_array([[S[i][i] if i < len(S) else 0 for i in range(self.no_generators)]])[0]
+        H = lattices.hermite_normal_form(rows, self.no_generators) if rows else []
+        self._pivots = [next(c for c, x in enumerate(h) if x) for h in H]
+        self._hermite = _integer_array(H, self.no_generators)
 
     def __call__(self, sequence_of_generators):
-        if isinstance(sequence_of_generators[0], tuple):
-            appeared = set(map(lambda x: x[0], sequence_of_generators))
-            rest = set(self.generators) - appeared
-            sequence_of_generators.extend([(g, 0) for g in rest])
-            seq = sorted(sequence_of_generators, key=lambda g: str(g[0]))
-            x = GroupElement(self, np.array(list(map(lambda x: x[1], seq))).astype(int), seq)
-            return x
+        if isinstance(sequence_of_generators, np.ndarray):
+            vector = sequence_of_generators
+        elif not len(sequence_of_generators):
+            vector = np.zeros(self.no_generators, dtype=np.int64)
         else:
-            return GroupElement(self, np.array(sequence_of_generators).astype(int), [(g, n) for g, n in zip(self.generators, sequence_of_generators) if n != 0])
+            vector = self._exponent_vector(sequence_of_generators)
+        return AbelianGroupElement(self, self.normal_forms(_integer_array([vector]))[0])
+
+    def normal_forms(self, array):
+        """
+            Canonical representatives of the rows of an (N, n) array of exponent vectors. The rows are switched to
+            Python ints before a reduction step that could overflow int64.
+        """
+        array = _integer_array(array, self.no_generators)
+        for c, h in zip(self._pivots, self._hermite):
+            if array.dtype != object and not Matrix._fits_int64(Matrix._max_abs(array) + 1, Matrix._max_abs(h) + 1):
+                array = array.astype(object)
+            array = array - (array[:, c] // h[c])[:, None] * h.astype(array.dtype)[None, :]
+        return _integer_array(array, self.no_generators)
+
+    def batch(self, elements):
+        """ AbelianGroupElementBatch from an array of shape (N, no_generators) or from a list of elements. """
+        if not isinstance(elements, np.ndarray):
+            elements = _integer_array([e.value.tolist() for e in elements], self.no_generators)
+        return AbelianGroupElementBatch(self, elements)
+
+    def generator_elements(self):
+        return [self([g]) for g in self.generators]
+
+    def quotient(self, relations):
+        return FPAbelianGroup(self.generators, self.relations + list(relations))
 
     def mul(self, a, b):
-        return self(a.value + b.value)
+        return AbelianGroupElement(self, self.normal_forms((a.value + b.value)[None, :])[0])
 
     def eq(self, g, h):
-        return g.sequence_of_generators == h.sequence_of_generators
+        return np.array_equal(g.value, h.value)
+
+    def hash(self, a):
+        return hash(a.value.tobytes() if a.value.dtype != object else tuple(a.value.tolist()))
 
     @property
     def one(self):
-        return self([])
+        return AbelianGroupElement(self, np.zeros(self.no_generators, dtype=np.int64))
 
     def inv(self, a):
-        return self(list(map(lambda s: (s[0], -s[1]), a.sequence_of_generators[::-1])))
-
-
-
+        return AbelianGroupElement(self, self.normal_forms(-a.value[None, :])[0])
 
+    @staticmethod
+    def element_str(element):
+        return '*'.join(str(g) if n == 1 else f'{g}^{n}' for g, n in element.sequence_of_generators) or '1'
 
 
+class FreeAbelianGroup(FPAbelianGroup):
+    def __init__(self, generators, name=None, **properties):
+        super().__init__(sorted(generators, key=str), [], name=name, **properties)
 
+    def mul(self, a, b):
+        return AbelianGroupElement(self, a.value + b.value)
 
+    def inv(self, a):
+        return AbelianGroupElement(self, -a.value)
@@ -0,0 +1,339 @@
+"""
+    Evaluation and interpolation modulo word-sized primes: batched determinants and characteristic polynomials of
+    stacks of matrices, and Zippel's sparse interpolation of a polynomial given by a black box that evaluates it on
+    arrays of points. Residues are kept in int64 arrays; primes stay below 2**26, so a product of two residues
+    fits into 52 bits and sums of up to 2**10 such products are accumulated without overflow. Larger primes
+    (coefficients in a big prime field) fall back to object arrays of Python ints.
+"""
+import concurrent.futures
+import contextlib
+import functools
+import math
+import random
+
+import numpy as np
+
+
+PRIME_BOUND = 2**26
+_CHUNK = 2**10
+
+
+def is_prime(n):
+    if n < 2:
+        return False
+    for d in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        if n % d == 0:
+            return n == d
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d, s = d // 2, s + 1
+    for a in (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37):
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def primes(bound=PRIME_BOUND):
+    """ Primes below `bound`, in decreasing order. """
+    n = bound - 1
+    while n > 2:
+        if is_prime(n):
+            yield n
+        n -= 1
+
+
+def dtype(p):
+    return np.int64 if p < PRIME_BOUND else object
+
+
+def power_mod(a, e, p):
+    result = np.ones_like(a)
+    a = a % p
+    while e:
+        if e & 1:
+            result = result * a % p
+        a = a * a % p
+        e >>= 1
+    return result
+
+
+def matmul_mod(A, B, p):
+    """ A @ B mod p, splitting the inner dimension so that int64 sums do not overflow. """
+    if A.dtype == object or A.shape[-1] <= _CHUNK:
+        return (A @ B) % p
+    result = np.zeros(A.shape[:-1] + B.shape[-1:], dtype=A.dtype)
+    for k in range(0, A.shape[-1], _CHUNK):
+        result = (result + A[..., k:k + _CHUNK] @ B[k:k + _CHUNK]) % p
+    return result
+
+
+def det_mod(stack, p):
+    """ Determinants of a stack of square matrices (shape (N, n, n)) modulo p, by Gaussian elimination on all of them at once. """
+    M = stack % p
+    N, n, _ = M.shape
+    det = np.ones(N, dtype=M.dtype)
+    index = np.arange(N)
+    for c in range(n):
+        nonzero = M[:, c:, c] != 0
+        found = nonzero.any(axis=1)
+        i = c + np.argmax(nonzero, axis=1)
+        det[~found] = 0
+        swapped = i != c
+        row = M[index, c].copy()
+        M[index, c] = M[index, i]
+        M[index, i] = row
+        det[swapped] = (p - det[swapped]) % p
+        pivot = np.where(found, M[:, c, c], 1)
+        det = det * pivot % p
+        factors = M[:, c + 1:, c] * power_mod(pivot, p - 2, p)[:, None] % p
+        M[:, c + 1:, c:] = (M[:, c + 1:, c:] - factors[:, :, None] * M[:, c, c:][:, None, :]) % p
+    return det
+
+
+def charpoly_mod(stack, p):
+    """ Coefficients of det(t*I - A) modulo p, leading one first (shape (N, n + 1)), by Berkowitz's algorithm on the whole stack. """
+    A = stack % p
+    N, n, _ = A.shape
+    c = np.ones((N, 1), dtype=A.dtype)
+    for r in range(n):
+        column = [np.ones(N, dtype=A.dtype), -A[:, r, r] % p]
+        v = A[:, :r, r]
+        for k in range(r):
+            column.append(-np.einsum('ni,ni->n', A[:, r, :r], v) % p)
+            if k < r - 1:
+                v = np.einsum('nij,nj->ni', A[:, :r, :r], v) % p
+        column = np.stack(column, axis=1)
+        new = np.zeros((N, r + 2), dtype=A.dtype)
+        for j in range(c.shape[1]):
+            new[:, j:] = (new[:, j:] + column[:, :r + 2 - j] * c[:, j:j + 1]) % p
+        c = new
+    return c
+
+
+def evaluate_terms(entries, points, p):
+    """
+        Values modulo p of a table of polynomials, each a dict {exponent tuple: int}, at the points (shape (N, k)).
+        Returns an array of shape (N,) + shape of the table; powers and monomials are shared between entries.
+    """
+    rows = len(entries)
+    columns = len(entries[0])
+    points = np.asarray(points, dtype=dtype(p)) % p
+    N, k = points.shape
+    degrees = [max([e[i] for row in entries for f in row for e in f] + [0]) for i in range(k)]
+    powers = []
+    for i in range(k):
+        table = np.ones((degrees[i] + 1, N), dtype=points.dtype)
+        for d in range(1, degrees[i] + 1):
+            table[d] = table[d - 1] * points[:, i] % p
+        powers.append(table)
+
+    @functools.lru_cache(maxsize=None)
+    def monomial(exponent):
+        value = np.ones(N, dtype=points.dtype)
+        for i, e in enumerate(exponent):
+            if e:
+                value = value * powers[i][e] % p
+        return value
+
+    values = np.zeros((N, rows, columns), dtype=points.dtype)
+    for r in range(rows):
+        for s in range(columns):
+            for exponent, coefficient in entries[r][s].items():
+                values[:, r, s] = (values[:, r, s] + coefficient % p * monomial(exponent)) % p
+    return values
+
+
+def interpolate_univariate(xs, ys, p):
+    """ Coefficients (lowest first, shape (d + 1, T)) of the polynomials of degree <= d taking values ys[j] at xs[j]. """
+    xs = [int(x) % p for x in xs]
+    d = len(xs) - 1
+    table = np.array(ys, dtype=dtype(p)) % p
+    for k in range(1, d + 1):
+        for j in range(d, k - 1, -1):
+            inverse = pow(xs[j] - xs[j - k], p - 2, p)
+            table[j] = (table[j] - table[j - 1]) * inverse % p
+    coefficients = np.zeros_like(table)
+    coefficients[0] = table[d]
+    for k in range(d - 1, -1, -1):
+        shifted = np.zeros_like(coefficients)
+        shifted[1:] = coefficients[:-1]
+        coefficients = (shifted - xs[k] * coefficients) % p
+        coefficients[0] = (coefficients[0] + table[k]) % p
+    return coefficients
+
+
+def solve_transposed_vandermonde(nodes, values, p):
+    """
+        Solution c of sum_t c_t * nodes[t]**i = values[i] (i < T) for every column of `values` (shape (T, K)),
+        in O(T^2) via the master polynomial M = prod (z - nodes[t]): c_t = (sum_i q_ti values[i]) / M'(nodes[t]) with
+        M = (z - nodes[t]) * sum_i q_ti z^i. The nodes have to be distinct.
+    """
+    T = len(nodes)
+    b = np.array([int(x) % p for x in nodes], dtype=dtype(p))
+    master = np.zeros(T + 1, dtype=b.dtype)
+    master[0] = 1
+    for t in range(T):
+        shifted = np.zeros_like(master)
+        shifted[1:] = master[:-1]
+        master = (shifted - b[t] * master) % p
+    values = np.asarray(values, dtype=b.dtype) % p
+    q = np.ones(T, dtype=b.dtype)
+    solution = q[:, None] * values[T - 1] % p
+    for i in range(T - 1, 0, -1):
+        q = (master[i] + b * q) % p
+        solution = (solution + q[:, None] * values[i - 1]) % p
+    derivative = np.zeros(T, dtype=b.dtype)
+    for i in range(T, 0, -1):
+        derivative = (derivative * b + i * master[i]) % p
+    return solution * power_mod(derivative, p - 2, p)[:, None] % p
+
+
+def _distinct_nodes(support, no_variables, p, rng):
+    for _ in range(20):
+        gamma = [rng.randrange(2, p) for _ in range(no_variables)]
+        exponents = np.array(support, dtype=np.int64).reshape(len(support), no_variables)
+        nodes = np.ones(len(support), dtype=dtype(p))
+        for i, g in enumerate(gamma):
+            powers = np.array([pow(g, e, p) for e in range(int(exponents[:, i].max(initial=0)) + 1)], dtype=dtype(p))
+            nodes = nodes * powers[exponents[:, i]] % p
+        nodes = [int(x) for x in nodes]
+        if len(set(nodes)) == len(nodes):
+            return gamma, nodes
+    raise ArithmeticError("No distinct evaluation nodes found, the prime is too small.")
+
+
+def _geometric_points(gamma, count, p):
+    """ Rows (gamma_1**i, ..., gamma_k**i) for i < count. """
+    points = np.ones((count, len(gamma)), dtype=dtype(p))
+    for i in range(1, count):
+        points[i] = points[i - 1] * np.array(gamma, dtype=dtype(p)) % p
+    return points
+
+
+def sparse_interpolate(evaluate, no_variables, bounds, p, rng=None):
+    """
+        Zippel's interpolation of f modulo p, where evaluate(points) returns f at every row of `points` and bounds[i]
+        bounds the degree of f in the i-th variable. Variables are added one at a time: the support found so far
+        is assumed for the new values of the next variable, its coefficients come from a transposed Vandermonde
+        system and are interpolated densely in that variable. Returns {exponent tuple: residue}. The result is
+        correct with high probability; callers should check it at a random point.
+    """
+    rng = rng or random.Random()
+    alpha = [rng.randrange(1, p) for _ in range(no_variables)]
+    value = int(evaluate(np.array([alpha], dtype=dtype(p)))[0]) % p
+    current = {(): value} if value else {}
+    for k in range(no_variables):
+        support = sorted(current)
+        T, d = len(support), bounds[k]
+        if not T:
+            return {}
+        betas = [alpha[k]]
+        while len(betas) < d + 1:
+            beta = rng.randrange(1, p)
+            if beta not in betas:
+                betas.append(beta)
+        values = np.zeros((d + 1, T), dtype=dtype(p))
+        values[0] = [current[m] for m in support]
+        if d:
+            gamma, nodes = _distinct_nodes(support, k, p, rng)
+            geometric = _geometric_points(gamma, T, p)
+            points = np.zeros((d, T, no_variables), dtype=dtype(p))
+            points[:, :, :k] = geometric
+            points[:, :, k] = np.array(betas[1:], dtype=dtype(p))[:, None]
+            points[:, :, k + 1:] = alpha[k + 1:]
+            evaluated = evaluate(points.reshape(d * T, no_variables)).reshape(d, T)
+            values[1:] = solve_transposed_vandermonde(nodes, evaluated.T, p).T
+        coefficients = interpolate_univariate(betas, values, p)
+        current = {m + (e,): int(coefficients[e, t]) for t, m in enumerate(support) for e in range(d + 1) if coefficients[e, t]}
+    return current
+
+
+def interpolate_with_support(evaluate, support, no_variables, p, rng=None):
+    """ Coefficients modulo p of the polynomial f with known support, from len(support) evaluations. """
+    rng = rng or random.Random()
+    support = sorted(support)
+    if not support:
+        return {}
+    gamma, nodes = _distinct_nodes(support, no_variables, p, rng)
+    values = evaluate(_geometric_points(gamma, len(support), p))
+    coefficients = solve_transposed_vandermonde(nodes, np.asarray(values)[:, None], p)[:, 0]
+    return {m: int(c) for m, c in zip(support, coefficients) if c}
+
+
+def symmetric(residue, modulus):
+    residue %= modulus
+    return residue - modulus if 2 * residue > modulus else residue
+
+
+def integer_interpolate(evaluate, no_variables, bounds, check, rng=None, attempts=3):
+    """
+        Polynomial with integer coefficients from its values modulo primes: evaluate(points, p) gives them modulo p.
+        The support is found by sparse interpolation modulo one prime; further primes only solve for coefficients
+        (Chinese remaindering) until the symmetric lift stabilises. `check(f, p, point)` verifies a candidate at a
+        random point modulo a fresh prime; returns {exponent tuple: int}.
+    """
+    rng = rng or random.Random()
+    source = primes()
+    for _ in range(attempts):
+        p = next(source)
+        residues = sparse_interpolate(lambda points: evaluate(points, p), no_variables, bounds, p, rng)
+        support, modulus = sorted(residues), p
+        lifted = {m: symmetric(c, p) for m, c in residues.items()}
+        while True:
+            p = next(source)
+            image = interpolate_with_support(lambda points: evaluate(points, p), support, no_variables, p, rng)
+            residues = {m: _crt(residues.get(m, 0), modulus, image.get(m, 0), p) for m in support}
+            modulus *= p
+            new = {m: symmetric(c, modulus) for m, c in residues.items() if c}
+            if new == lifted:
+                break
+            lifted = new
+        p = next(source)
+        if check(lifted, p, [rng.randrange(p) for _ in range(no_variables)]):
+            return lifted
+    raise ArithmeticError("Interpolation did not converge.")
+
+
+def _crt(a, m, b, n):
+    return (a + (b - a) * pow(m, -1, n) % n * m) % (m * n)
+
+
+def modular_interpolate(evaluate, no_variables, bounds, p, check, rng=None, attempts=3):
+    """ Sparse interpolation modulo p verified by `check(f, p, point)` at a random point, retried with fresh random choices. """
+    rng = rng or random.Random()
+    for _ in range(attempts):
+        f = sparse_interpolate(evaluate, no_variables, bounds, p, rng)
+        if check(f, p, [rng.randrange(p) for _ in range(no_variables)]):
+            return f
+    raise ArithmeticError("Interpolation did not converge.")
+
+
+def evaluate_polynomial(f, point, p):
+    return sum(c * functools.reduce(lambda x, y: x * y % p, [pow(v, e, p) for v, e in zip(point, m)], 1) for m, c in f.items()) % p
+
+
+def det_values(entries, p, points):
+    """ Determinants modulo p of the polynomial matrix `entries` (dicts {exponent: int}) at the points. """
+    return det_mod(evaluate_terms(entries, points, p), p)
+
+
+def pool(processes):
+    """ Process pool for `evaluate_in_pool`, or a context yielding None when `processes` is not set. """
+    if not processes:
+        return contextlib.nullcontext()
+    return concurrent.futures.ProcessPoolExecutor(processes)
+
+
+def evaluate_in_pool(function, points, executor, processes):
+    """ function(points) computed on `processes` chunks of the points by `executor`; `function` has to be picklable. """
+    if executor is None or len(points) < 2 * processes:
+        return function(points)
+    chunks = np.array_split(points, processes)
+    return np.concatenate(list(executor.map(function, chunks)))
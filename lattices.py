@@ -0,0 +1,239 @@
+"""
+    Hermite and Smith normal forms of integer matrices given as lists of rows of Python ints.
+
+    Rows are generators of a lattice: the Hermite form H = U*A is upper triangular and the Smith form
+    S = U*A*V is diagonal with S[0][0] | S[1][1] | ... for unimodular U, V. When the transformation matrices are
+    not needed and the rows span a lattice of full rank, both forms are computed modulo a multiple D of the
+    lattice determinant. D*Z^n lies in the lattice, so entries can be reduced mod D and never grow beyond it.
+"""
+import math
+
+
+def xgcd(a, b):
+    """ (u, v, d) with u*a + v*b = d = gcd(a, b) >= 0. """
+    u0, v0, u1, v1 = 1, 0, 0, 1
+    while b:
+        q, r = divmod(a, b)
+        a, b = b, r
+        u0, v0, u1, v1 = u1, v1, u0 - q * u1, v0 - q * v1
+    if a < 0:
+        return -u0, -v0, -a
+    return u0, v0, a
+
+
+def identity(n):
+    return [[int(i == j) for j in range(n)] for i in range(n)]
+
+
+def _combine_rows(A, i, k, c, others=()):
+    """ Unimodular operation on rows i, k of A (and of every matrix in `others`) leaving gcd in A[i][c] and 0 in A[k][c]. """
+    if A[i][c] and A[k][c] % A[i][c] == 0:
+        q = A[k][c] // A[i][c]
+        for M in (A, *others):
+            M[k] = [y - q * x for x, y in zip(M[i], M[k])]
+        return
+    u, v, d = xgcd(A[i][c], A[k][c])
+    a, b = A[i][c] // d, A[k][c] // d
+    for M in (A, *others):
+        M[i], M[k] = [u * x + v * y for x, y in zip(M[i], M[k])], [a * y - b * x for x, y in zip(M[i], M[k])]
+
+
+def _combine_columns(A, i, k, r, others=()):
+    """ Column counterpart of `_combine_rows`, leaving gcd in A[r][i] and 0 in A[r][k]. """
+    if A[r][i] and A[r][k] % A[r][i] == 0:
+        q = A[r][k] // A[r][i]
+        for M in (A, *others):
+            for row in M:
+                row[k] -= q * row[i]
+        return
+    u, v, d = xgcd(A[r][i], A[r][k])
+    a, b = A[r][i] // d, A[r][k] // d
+    for M in (A, *others):
+        for row in M:
+            row[i], row[k] = u * row[i] + v * row[k], a * row[k] - b * row[i]
+
+
+def independent_rows(rows, no_columns):
+    """ Indices of a maximal linearly independent set of rows (by Bareiss elimination) and the determinant of these rows when they form a square matrix. """
+    M = [list(column) for column in zip(*rows)]
+    pivots, previous, r = [], 1, 0
+    for c in range(len(rows)):
+        if r == no_columns:
+            break
+        i = next((i for i in range(r, no_columns) if M[i][c]), None)
+        if i is None:
+            continue
+        M[r], M[i] = M[i], M[r]
+        p = M[r][c]
+        for i in range(r + 1, no_columns):
+            M[i] = [(p * x - M[i][c] * y) // previous for x, y in zip(M[i], M[r])]
+        previous = p
+        pivots.append(c)
+        r += 1
+    return pivots, previous
+
+
+def hermite_normal_form(rows, no_columns, transform=False):
+    """
+        Row-style Hermite normal form: the nonzero rows H of U*A, or (H, U). Pivots are positive and the entries
+        above a pivot p lie in [0, p). Lattices of full rank are handled modulo their determinant, otherwise rows
+        are added one at a time and the form is kept reduced after each of them (Kannan and Bachem).
+    """
+    if not transform and rows and no_columns:
+        pivots, det = independent_rows(rows, no_columns)
+        if len(pivots) == no_columns:
+            return _modular_hermite_form(rows, no_columns, abs(det))
+    A = [list(row) for row in rows]
+    U = identity(len(A))
+    others = (U,) if transform else ()
+    pivots = []
+    for k in range(len(A)):
+        while True:
+            c = next((c for c in range(no_columns) if A[k][c]), None)
+            if c is None:
+                break
+            r = next((r for d, r in pivots if d == c), None)
+            if r is None:
+                pivots = sorted(pivots + [(c, k)])
+                break
+            _combine_rows(A, r, k, c, others)
+        for c, r in pivots:
+            if A[r][c] < 0:
+                for M in (A, *others):
+                    M[r] = [-x for x in M[r]]
+            for _, i in pivots[:pivots.index((c, r))]:
+                q = A[i][c] // A[r][c]
+                if q:
+                    for M in (A, *others):
+                        M[i] = [x - q * y for x, y in zip(M[i], M[r])]
+    order = [r for _, r in pivots]
+    H = [A[r] for r in order]
+    if transform:
+        return H, [U[r] for r in order] + [U[r] for r in range(len(A)) if r not in order]
+    return H
+
+
+def _modular_hermite_form(rows, n, D):
+    """ Hermite form of a lattice of rank n whose determinant divides D (Domich, Kannan and Trotter; Cohen, Algorithm 2.4.8). """
+    R = D
+    A = [[x % R for x in row] for row in rows]
+    H = []
+    for c in range(n):
+        if not A[c][c]:
+            A[c][c] = R
+        for k in range(c + 1, len(A)):
+            if A[k][c]:
+                _combine_rows(A, c, k, c)
+                A[c] = [x % R for x in A[c]]
+                A[k] = [x % R for x in A[k]]
+        u, _, d = xgcd(A[c][c], R)
+        w = [u * x % R for x in A[c]]
+        if not w[c]:
+            w[c] = R
+        H.append(w)
+        R //= d
+    for c in range(n):
+        for i in range(c):
+            q = H[i][c] // H[c][c]
+            if q:
+                H[i] = [x - q * y for x, y in zip(H[i], H[c])]
+    return H
+
+
+def _diagonalize(A, others=(), modulus=None):
+    """ Diagonal form of A by unimodular row and column operations, `others` = (U, V) receive the same operations. """
+    U, V = others if others else (None, None)
+    rows = (U,) if others else ()
+    columns = (V,) if others else ()
+    m, n = len(A), len(A[0]) if A else 0
+    for t in range(min(m, n)):
+        while True:
+            entries = [(abs(A[i][j]), i, j) for i in range(t, m) for j in range(t, n) if A[i][j]]
+            if not entries:
+                return
+            _, i, j = min(entries)
+            for M in (A, *rows):
+                M[t], M[i] = M[i], M[t]
+            for M in (A, *columns):
+                for row in M:
+                    row[t], row[j] = row[j], row[t]
+            for k in range(t + 1, m):
+                if A[k][t]:
+                    _combine_rows(A, t, k, t, rows)
+            for k in range(t + 1, n):
+                if A[t][k]:
+                    _combine_columns(A, t, k, t, columns)
+            if modulus is not None:
+                for row in A:
+                    row[:] = [x % modulus for x in row]
+            if any(A[k][t] for k in range(t + 1, m)):
+                continue
+            if others:
+                p = A[t][t]
+                bad = next((i for i in range(t + 1, m) for j in range(t + 1, n) if A[i][j] % p), None)
+                if bad is not None:
+                    for M in (A, U):
+                        M[t] = [x + y for x, y in zip(M[t], M[bad])]
+                    continue
+            break
+        if A[t][t] < 0:
+            for M in (A, *rows):
+                M[t] = [-x for x in M[t]]
+
+
+def divisibility_chain(diagonal):
+    """ Replaces pairs (a, b) by (gcd, lcm) until every entry divides the next one; zeros move to the end. """
+    d = [abs(x) for x in diagonal]
+    for i in range(len(d)):
+        for j in range(i + 1, len(d)):
+            g = math.gcd(d[i], d[j])
+            d[i], d[j] = g, d[i] * d[j] // g if g else 0
+    return d
+
+
+def smith_normal_form(rows, no_columns, transform=False):
+    """
+        Smith normal form S of the len(rows) x no_columns matrix A, or (S, U, V) with U*A*V = S. Transformations
+        are found by alternating Hermite forms of rows and columns (Kannan and Bachem), which keeps the entries
+        reduced modulo the pivots.
+    """
+    m, n = len(rows), no_columns
+    if not transform:
+        d = invariant_factors(rows, n)
+        return [[d[i] if i == j else 0 for j in range(n)] for i in range(m)]
+    S = [list(row) for row in rows]
+    U, V = identity(m), identity(n)
+    while any(S[i][j] for i in range(m) for j in range(n) if i != j):
+        H, W = hermite_normal_form(S, n, transform=True)
+        S, U = H + [[0] * n for _ in range(m - len(H))], _product(W, U)
+        H, W = hermite_normal_form(_transpose(S, n), m, transform=True)
+        S, V = _transpose(H + [[0] * m for _ in range(n - len(H))], m), _product(V, _transpose(W, n))
+    _diagonalize(S, (U, V))
+    return S, U, V
+
+
+def _transpose(rows, no_columns):
+    return [list(column) for column in zip(*rows)] if rows else [[] for _ in range(no_columns)]
+
+
+def _product(A, B):
+    columns = list(zip(*B))
+    return [[sum(x * y for x, y in zip(row, column)) for column in columns] for row in A]
+
+
+def invariant_factors(rows, no_columns):
+    """ Diagonal d_1 | d_2 | ... of the Smith normal form (min(len(rows), no_columns) entries, zeros last). """
+    m, n = len(rows), no_columns
+    if not m or not n:
+        return []
+    H = hermite_normal_form(rows, n)
+    if len(H) == n:
+        D = 1
+        for i in range(n):
+            D *= H[i][i]
+        _diagonalize(H, modulus=D)
+        diagonal = [math.gcd(H[i][i], D) for i in range(n)]
+    else:
+        _diagonalize(H)
+        diagonal = [H[i][i] for i in range(len(H))]
+    return divisibility_chain(diagonal + [0] * (min(m, n) - len(diagonal)))
@@ -2,12 +2,16 @@ import warnings
 
 from algebras import *
 from base_rings import *
+import algebras
 import arrows
+import groebner
+import numeric
 
 
 class Module:
     def __init__(self, base_ring, name=None, no_generators=None, custom_mul=None, **properties):
         assert isinstance(base_ring, BaseRing)
+        self.default_mul = custom_mul is None
         if custom_mul is None:
             custom_mul = lambda c, g: c
         self.name = name or 'G' + str(random.randint(0, 1000000))
@@ -69,15 +73,27 @@ class Module:
 
 
 class FGModule(Module):
+    """
+        Module with finitely many generators, elements are lists of coefficients. Over Z, R, C and prime fields (and
+        without a custom scalar multiplication) the coefficients are kept in NumPy arrays and arithmetic is vectorized.
+    """
     def __init__(self, base_ring, generators, name=None, custom_mul=None, **properties):
         super().__init__(base_ring, name=name, no_generators=len(generators), custom_mul=custom_mul, **properties)
         self.generators = generators
+        self.numpy_backend = self.default_mul and algebras.Matrix.has_numpy_backend(base_ring)
 
     def __call__(self, coefficients):
         if isinstance(coefficients, dict):
             coefficients = [coefficients[g] if g in coefficients else self.ring.zero for g in self.generators]
         return ModuleElement(self, coefficients)
 
+    def batch(self, elements):
+        """ ModuleElementBatch from an array of shape (N, no_generators) or from a list of elements. """
+        if not isinstance(elements, np.ndarray):
+            elements = [e.array if e.array is not None else [self.ring.to_numpy(c) for c in e.coefficients] for e in elements]
+            elements = algebras.Matrix._to_array(elements, self.ring.numpy_dtype).reshape(len(elements), self.no_generators)
+        return ModuleElementBatch(self, elements)
+
     @property
     def zero(self):
         return self([self.ring.zero] * self.no_generators)
@@ -86,10 +102,17 @@ class FGModule(Module):
         return self.name
 
     def add(self, a, b):
+        if a.array is not None and b.array is not None:
+            return self(_add_arrays(self.ring, a.array, b.array))
         return self([a + b for a, b in zip(a.coefficients, b.coefficients)])
 
     def scalar_mul(self, element, scalar):
-        return self([c*self.custom_mul(scalar, g) for g, c in zip(element.generators, element.coefficients)])
+        if element.array is not None and self.default_mul:
+            return self(_scale_array(self.ring, element.array, scalar))
+        return self([c*self.custom_mul(scalar, g) for g, c in zip(self.generators, element.coefficients)])
+
+    def quotient(self, relations, name=None):
+        return FPModule(self.ring, self.generators, relations, name=name, custom_mul=None if self.default_mul else self.custom_mul)
 
     def info(self):
         print(self.name + ': finitely generated ' + str(self.ring) + '-module')
@@ -114,19 +137,257 @@ class FreeFGModule(FGModule):
             name = str(base_ring)
         super().__init__(base_ring, generators, name=name, **properties)
 
+    def submodule(self, generators, name=None, order='pot'):
+        return FreeSubmodule(self, generators, name=name, order=order)
+
+    def from_terms(self, terms):
+        """ Element of R^n, R = KPolynomialAlgebra, from a dict {(position, exponent): coefficient}. """
+        coefficients = [{} for _ in range(self.no_generators)]
+        for (i, e), c in terms.items():
+            coefficients[i][e] = c
+        return self([self.ring.from_terms(f) for f in coefficients])
+
+
+class FPModule(FGModule):
+    """
+        Module given by generators and relations; a relation is a list of coefficients, a dict {generator: coefficient}
+        or an element of a module with the same generators. Over Z and over fields it is classified by the invariant
+        factors of its relation matrix: M = R/(d_1) + ... + R/(d_k) with d_1 | d_2 | ... and d_i = 0 for free summands.
+    """
+    def __init__(self, base_ring, generators, relations, name=None, custom_mul=None, **properties):
+        super().__init__(base_ring, generators, name=name, custom_mul=custom_mul, **properties)
+        self.relations = [self._relation_coefficients(r) for r in relations]
+        self.no_relations = len(self.relations)
+
+    def _relation_coefficients(self, relation):
+        if isinstance(relation, ModuleElement):
+            relation = relation.coefficients_dict if relation.coefficients is None else relation.coefficients
+        if isinstance(relation, dict):
+            relation = [relation[g] if g in relation else self.ring.zero for g in self.generators]
+        return [c if isinstance(c, BaseElement) else self.ring(c) for c in relation]
+
+    @functools.cached_property
+    def relation_matrix(self):
+        if not self.relations:
+            return None
+        return Matrix(self.relations, self.ring)
+
+    @functools.cached_property
+    def invariant_factors(self):
+        """ Non-unit invariant factors, zeros (free summands) last. """
+        if self.relation_matrix is None:
+            return [self.ring.zero] * self.no_generators
+        if self.ring.properties['field']:
+            return [self.ring.zero] * (self.no_generators - self.relation_matrix.rank())
+        if not isinstance(self.ring, ZRing):
+            raise NotImplementedError("Invariant factors are implemented over Z and over fields.")
+        factors = self.relation_matrix.invariant_factors()
+        factors += [self.ring.zero] * (self.no_generators - len(factors))
+        return [d for d in factors if not self.ring.maybe_unit_check(d)]
+
+    @property
+    def rank(self):
+        return len([d for d in self.invariant_factors if self.ring.maybe_zero_check(d)])
+
+    @property
+    def torsion_invariants(self):
+        return [d for d in self.invariant_factors if not self.ring.maybe_zero_check(d)]
+
+    def structure(self):
+        summands = [str(self.ring) + '/' + str(d) for d in self.torsion_invariants]
+        if self.rank:
+            summands.append(str(self.ring) + ('^' + str(self.rank) if self.rank > 1 else ''))
+        return ' + '.join(summands) or '0'
+
+
+class FreeSubmodule(FGModule):
+    """
+        Submodule of a free module R^n over R = KPolynomialAlgebra spanned by `generators` (elements of R^n or lists
+        of polynomials). Membership and equality use Groebner bases of submodules, computed by the same engine
+        as for ideals with terms x^a * e_i; `order` is 'pot' (position over term) or 'top' (term over position).
+    """
+    def __init__(self, ambient, generators, name=None, order='pot', **properties):
+        assert isinstance(ambient.ring, KPolynomialAlgebra)
+        self.ambient = ambient
+        generators = [g if isinstance(g, ModuleElement) else ambient(list(g)) for g in generators]
+        name = name or '<' + ', '.join(['(' + ', '.join(str(c) for c in g.coefficients) + ')' for g in generators]) + '>'
+        super().__init__(ambient.ring, generators, name=name, **properties)
+        self.order = order
+        self._groebner_cache = {}
+        self._resolutions = {}
+
+    def engine(self, order=None):
+        return groebner.ModuleGroebnerEngine(self.ring.base_ring, self.ring.order.key, order or self.order)
+
+    def to_terms(self, element):
+        if not isinstance(element, ModuleElement):
+            element = self.ambient(list(element))
+        return {(i, e): c for i, f in enumerate(element.coefficients) for e, c in f.value.terms.items()}
+
+    def from_terms(self, terms):
+        return self.ambient.from_terms(terms)
+
+    def groebner_terms(self, order=None):
+        """ Reduced Groebner basis of the submodule as dicts {(position, exponent): coefficient}, cached per order. """
+        order = order or self.order
+        if order not in self._groebner_cache:
+            self._groebner_cache[order] = self.engine(order).reduced_basis([self.to_terms(g) for g in self.generators])
+        return self._groebner_cache[order]
+
+    def groebner_basis(self, order=None):
+        return [self.from_terms(g) for g in self.groebner_terms(order)]
+
+    def reduce(self, element):
+        """ Normal form of an element of the ambient module, zero exactly for members. """
+        return self.from_terms(self.engine().normal_form(self.to_terms(element), self.groebner_terms()))
+
+    def contains(self, elements):
+        """ Membership of each of the elements; the basis and its leading terms are shared by the whole batch. """
+        remainders = self.engine().normal_forms([self.to_terms(e) for e in elements], self.groebner_terms())
+        return [not r for r in remainders]
+
+    def __contains__(self, element):
+        return self.contains([element])[0]
+
+    def __le__(self, other):
+        return all(other.contains(self.generators))
+
+    def __eq__(self, other):
+        if not isinstance(other, FreeSubmodule) or self.ambient.no_generators != other.ambient.no_generators:
+            return False
+        key = lambda g: sorted((t, c.value) for t, c in g.items())
+        return sorted(map(key, self.groebner_terms(self.order))) == sorted(map(key, other.groebner_terms(self.order)))
+
+    def __hash__(self):
+        return id(self)
+
+    def syzygies(self):
+        """ Submodule of R^s of the relations among the s generators. """
+        F = FreeFGModule(self.ring, self.no_generators)
+        vectors = [self.to_terms(g) for g in self.generators]
+        syzygies = self.engine('pot').syzygy_module(vectors, self.ambient.no_generators, self.ring.no_generators)
+        return F.submodule([F.from_terms(g) for g in syzygies] or [F.zero])
+
+    def resolution(self, minimal=True):
+        """ Free resolution of the quotient of the ambient module by the submodule, see `FreeResolution`. """
+        if minimal not in self._resolutions:
+            self._resolutions[minimal] = FreeResolution(self.ring, self.engine(), self.groebner_terms(), self.ambient.no_generators, minimal)
+        return self._resolutions[minimal]
+
+    def betti_numbers(self):
+        return self.resolution().betti_numbers()
+
+
+class FreeResolution:
+    """
+        Free resolution 0 <- R^r / M <- F_0 <- F_1 <- ... <- F_n <- 0 of the quotient of R^r = F_0 by a submodule
+        M with Groebner basis G, R = KPolynomialAlgebra. The syzygies of every step form a Groebner basis
+        w.r.t. Schreyer's order induced by the previous step (`GroebnerEngine.resolution`); with `minimal` the
+        trivial summands are split off, which gives the minimal free resolution when M is homogeneous. Basis
+        vectors of F_k are graded by the total degree of their images, F_0 is generated in degree 0.
+    """
+    def __init__(self, ring, engine, G, rank, minimal=True):
+        self.ring = ring
+        self.terms = engine.resolution(G)
+        if minimal:
+            self.terms, rank = engine.minimize_resolution(self.terms, rank)
+        self.ranks = [rank] + [len(D) for D in self.terms]
+        self.degrees = [[0] * rank]
+        for D in self.terms:
+            degrees = [{sum(e) + self.degrees[-1][p] for p, e in column} for column in D]
+            if any(len(d) != 1 for d in degrees):
+                self.degrees = None
+                break
+            self.degrees.append([d.pop() for d in degrees])
+
+    @property
+    def length(self):
+        return len(self.terms)
+
+    @property
+    def is_graded(self):
+        return self.degrees is not None
+
+    def differential(self, k):
+        """ Matrix of d_k: F_k -> F_{k-1}, k = 1, ..., length. """
+        rows = [[{} for _ in range(self.ranks[k])] for _ in range(self.ranks[k - 1])]
+        for j, column in enumerate(self.terms[k - 1]):
+            for (p, e), c in column.items():
+                rows[p][j][e] = c
+        return algebras.Matrix([[self.ring.from_terms(f) for f in row] for row in rows], self.ring)
+
+    def betti_numbers(self):
+        """ Graded Betti numbers {(i, j): b_ij}, F_i = sum over j of R(-j)^b_ij. """
+        if not self.is_graded:
+            raise ValueError("Graded Betti numbers need a homogeneous resolution.")
+        betti = {}
+        for i, degrees in enumerate(self.degrees):
+            for d in degrees:
+                betti[i, d] = betti.get((i, d), 0) + 1
+        return betti
+
+    def betti_table(self):
+        """ Betti numbers in the usual layout: b_ij in column i and row j - i. """
+        betti = self.betti_numbers()
+        rows = sorted({j - i for i, j in betti})
+        width = max((len(str(b)) for b in betti.values()), default=1) + 1
+        lines = ['      ' + ''.join(str(i).rjust(width) for i in range(len(self.ranks)))]
+        lines.append('total:' + ''.join(str(r).rjust(width) for r in self.ranks))
+        for r in rows:
+            lines.append(f'{r:>5}:' + ''.join(str(betti.get((i, i + r), '.')).rjust(width) for i in range(len(self.ranks))))
+        return '\n'.join(lines)
+
+    def __str__(self):
+        return ' <- '.join(f'{self.ring}^{r}' for r in self.ranks)
+
+
+def _add_arrays(ring, a, b):
+    if a.dtype.kind == 'i' and algebras.Matrix._max_abs(a) + algebras.Matrix._max_abs(b) >= algebras.Matrix._int64_bound:
+        a, b = a.astype(object), b.astype(object)
+    return ring.normalize_numpy(a + b)
+
+
+def _scale_array(ring, a, scalar):
+    if isinstance(scalar, int):
+        scalar = ring.from_canonical_subring(ZRing()(scalar))
+    elif scalar.ring != ring:
+        scalar = ring.from_canonical_subring(scalar)
+    value = ring.to_numpy(scalar)
+    if a.dtype.kind == 'i' and not algebras.Matrix._fits_int64(algebras.Matrix._max_abs(a), abs(int(value)) + 1):
+        a = a.astype(object)
+    return ring.normalize_numpy(a * value)
+
 
 class ModuleElement:
     def __init__(self, module, coefficients):
-        self.ring = coefficients[0].ring
         self.module = module
+        self.array = None
+        self._coefficients = None
+        self._coefficients_dict = None
+        self.fg = not isinstance(coefficients, dict)
+        if isinstance(coefficients, np.ndarray):
+            self.ring = module.ring
+            self.array = module.ring.normalize_numpy(coefficients)
+            return
+        self.ring = module.ring if isinstance(coefficients, dict) else coefficients[0].ring
         if isinstance(coefficients, dict):
-            self.coefficients_dict = coefficients
-            self.coefficients = None
-            self.fg = False
-        else:
-            self.coefficients = coefficients
-            self.coefficients_dict = {g: c for g, c in zip(self.module.generators, self.coefficients)}
-            self.fg = True
+            self._coefficients_dict = coefficients
+            return
+        self._coefficients = coefficients
+        if getattr(module, 'numpy_backend', False):
+            self.array = algebras.Matrix._to_array([[self.ring.to_numpy(c) for c in coefficients]], self.ring.numpy_dtype)[0]
+
+    @property
+    def coefficients(self):
+        if self._coefficients is None and self.array is not None:
+            self._coefficients = [self.ring.from_numpy(x) for x in self.array]
+        return self._coefficients
+
+    @property
+    def coefficients_dict(self):
+        if self._coefficients_dict is None:
+            self._coefficients_dict = {g: c for g, c in zip(self.module.generators, self.coefficients)}
+        return self._coefficients_dict
 
     def __str__(self):
         if self.module.properties['ideal']:
@@ -147,15 +408,19 @@ class ModuleElement:
         return self.module.scalar_mul(self, scalar)
 
     def __neg__(self):
-        return self.module.scalar_mul(self, -self.ring.one())
+        return self.module.scalar_mul(self, self.ring.neg(self.ring.one))
 
     def __eq__(self, other):
-        if other == 0:
+        if isinstance(other, int) and other == 0:
             return self == self.module.zero
+        if self.array is not None and other.array is not None:
+            if not self.ring.properties['exact_values']:
+                return bool(np.allclose(self.array, other.array))
+            return bool(np.array_equal(self.array, other.array))
         return self.coefficients == other.coefficients
 
     def __ne__(self, other):
-        return not self.coefficients == other.coefficients
+        return not self == other
 
     def __sub__(self, other):
         return self.module.add(self, -other)
@@ -167,6 +432,8 @@ class ModuleElement:
         return self.module.grade(self)
 
     def maybe_is_zero(self):
+        if self.array is not None and self.ring.properties['exact_values']:
+            return not self.array.any()
         return all([self.ring.maybe_zero_check(c) for c in self.coefficients])
 
     def force_is_zero(self):
@@ -176,6 +443,60 @@ class ModuleElement:
         return self.module.to_ring_element(self)
 
 
+class ModuleElementBatch:
+    """
+        N elements of a finitely generated module over Z, R, C or a prime field, stored as the rows of one NumPy
+        array of shape (N, no_generators). Addition and scaling act on all rows at once.
+    """
+    def __init__(self, module, array):
+        self.module = module
+        self.ring = module.ring
+        self.array = module.ring.normalize_numpy(array)
+
+    def __len__(self):
+        return self.array.shape[0]
+
+    def __getitem__(self, index):
+        if isinstance(index, (int, np.integer)):
+            return self.module(self.array[index].copy())
+        return ModuleElementBatch(self.module, self.array[index])
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def _other_array(self, other):
+        if isinstance(other, ModuleElement):
+            return other.array[None, :] if other.array is not None else self.module.batch([other]).array
+        return other.array
+
+    def __add__(self, other):
+        return ModuleElementBatch(self.module, _add_arrays(self.ring, self.array, self._other_array(other)))
+
+    def __neg__(self):
+        return ModuleElementBatch(self.module, self.ring.normalize_numpy(-self.array))
+
+    def __sub__(self, other):
+        return self + (-other)
+
+    def __mul__(self, scalar):
+        """ All elements times one scalar, or row i times scalars[i] for a list or array of scalars. """
+        if isinstance(scalar, (list, np.ndarray)):
+            values = np.array([self.ring.to_numpy(c) if isinstance(c, BaseElement) else c for c in scalar], dtype=self.array.dtype)
+            a = self.array
+            if a.dtype.kind == 'i' and not algebras.Matrix._fits_int64(algebras.Matrix._max_abs(a), algebras.Matrix._max_abs(values) + 1):
+                a, values = a.astype(object), values.astype(object)
+            return ModuleElementBatch(self.module, self.ring.normalize_numpy(a * values[:, None]))
+        return ModuleElementBatch(self.module, _scale_array(self.ring, self.array, scalar))
+
+    def __eq__(self, other):
+        if not self.ring.properties['exact_values']:
+            return bool(np.allclose(self.array, self._other_array(other)))
+        return bool(np.array_equal(self.array, np.broadcast_to(self._other_array(other), self.array.shape)))
+
+    def __str__(self):
+        return '\n'.join(str(e) for e in self)
+
+
 class Ideal(FGModule):
     def __init__(self, generators, name=None, **properties):
         for g in generators:
@@ -226,6 +547,13 @@ class KPolynomialIdeal(PolynomialIdeal):
     def __init__(self, generators, name="", groebner=None, find_groebner=False, **properties):
         super().__init__(generators, name=name, groebner=groebner, **properties)
         assert isinstance(self.ring, KPolynomialAlgebra)
+        self._groebner_cache = {}
+        self._operations_cache = {}
+        if groebner is not None:
+            # a given Groebner basis is brought into reduced form, which is what __eq__ compares
+            basis = self.engine.reduce_basis([g.value.terms for g in groebner if g != self.ring.zero])
+            self._groebner_cache[self.order.name] = basis
+            self.groebner_basis = [self.ring.from_terms(g) for g in basis]
         if find_groebner:
             self.to_groebner()
 
@@ -233,6 +561,10 @@ class KPolynomialIdeal(PolynomialIdeal):
     def monomial_ideal(self):
         return all([g.monomial for g in self.generators])
 
+    @property
+    def engine(self):
+        return self.ring.groebner_engine
+
     def S_polynomial(self, f, g):
         f_ = f if not isinstance(f, ModuleElement) else f()
         g_ = g if not isinstance(g, ModuleElement) else g()
@@ -240,13 +572,15 @@ class KPolynomialIdeal(PolynomialIdeal):
 
     def recalculate_groebner(self):
         self.groebner_basis = None
+        self._groebner_cache = {}
+        self._operations_cache = {}
         self.to_groebner()
 
     def check_if_groebner_minimal(self):
         if self.groebner_basis is None:
             return False
         for i, p in enumerate(self.groebner_basis):
-            if p.value.leading_coefficient() != 1:
+            if p.value.leading_coefficient() != self.ring.base_ring.one:
                 return False
             for g in self.groebner_basis[i+1:]:
                 if g.value.leading_monomial().divisible_by(p.value.leading_monomial()):
@@ -260,7 +594,7 @@ class KPolynomialIdeal(PolynomialIdeal):
             return False
         for i, p in enumerate(self.groebner_basis):
             leading_monomial = p.value.leading_monomial()
-            if leading_monomial.coefficient != 1:
+            if leading_monomial.coefficient != self.ring.base_ring.one:
                 return False
             for g in self.groebner_basis[:i] + self.groebner_basis[i+1:]:
                 for m in g.value.monomials:
@@ -271,83 +605,65 @@ class KPolynomialIdeal(PolynomialIdeal):
     def reduce_wrt_family(self, f, g, F=None):
         if F is None:
             F = self.groebner_basis
-        lm_f, lm_g = f.value.leading_monomial(), g.value.leading_monomial()
-        if lm_f.lcm(lm_g) == lm_f*lm_g:
+        f_, g_ = f.value.terms, g.value.terms
+        if self.engine.coprime(self.engine.leading_term(f_), self.engine.leading_term(g_)):
             return self.ring.zero
         return self.ring.multi_long_div(self.S_polynomial(f, g), F)[1]
 
     def groebner_to_minimal(self):
+        self.groebner_basis = [g for g in self.groebner_basis if g != self.ring.zero]
+        G = sorted(self.groebner_basis, key=lambda g: self.engine.sort_key(self.engine.leading_term(g.value.terms)))
         minimal = []
-        for p in self.groebner_basis:
-            complement = [g for g in self.groebner_basis if g != p]
-            if not p != 0 and self.reminder_wrt_family(p, complement) == self.ring.zero:
-                minimal.append(p/p.value.leading_coefficient())
-        self.groebner_basis = minimal
+        for p in G:
+            if not any([p.value.leading_monomial().divisible_by(g.value.leading_monomial()) for g in minimal]):
+                minimal.append(p)
+        self.groebner_basis = [self.ring.from_terms(self.engine.monic(p.value.terms)) for p in minimal[::-1]]
 
     def groebner_to_reduced(self):
-        self.groebner_to_minimal()
-        G = self.groebner_basis
-        H = []
-        for i, p in enumerate(G):
-            h = self.reminder_wrt_family(p, H + G[:i+1])
-            H.append(h)
-        self.groebner_basis = H
-        self.order.sort(self.groebner_basis)
+        basis = self.engine.reduce_basis([g.value.terms for g in self.groebner_basis])
+        self.groebner_basis = [self.ring.from_terms(g) for g in basis]
+
+    def groebner_terms(self, order=None):
+        """
+            Reduced Groebner basis w.r.t. `order` (the order of the ring by default) as dicts of terms.
+            Bases are cached per order, so every operation below computes each of them at most once.
+        """
+        order = order or self.order
+        if order.name not in self._groebner_cache:
+            engine = self.engine if order == self.order else groebner.GroebnerEngine(self.ring.base_ring, order.key)
+            self._groebner_cache[order.name] = engine.reduced_basis([g.value.terms for g in self.generators])
+        return self._groebner_cache[order.name]
 
     def to_groebner(self):
         if self.groebner_basis is not None:
             return
-
-        if self.no_generators == 1:
-            self.groebner_basis = copy.copy(self.generators)
-            return
-
-        basis = copy.copy(self.generators)
-        pairs = list(itertools.combinations(basis, 2))
-        while pairs:
-            f, g = pairs.pop()
-            reminder = self.reduce_wrt_family(f, g, basis)
-            if reminder != 0:
-                pairs += [(reminder, b) for b in basis]
-                basis.append(reminder)
-        self.groebner_basis = basis
-        self.groebner_to_reduced()
+        self.groebner_basis = [self.ring.from_terms(g) for g in self.groebner_terms()]
 
     def convert_basis_to_groebner(self):
         if self.groebner_basis is None:
             self.to_groebner()
-        return self.__class__(self.groebner_basis, name=self.name, groebner=self.groebner_basis, find_groebner=False, **self.properties)
+        return self.__class__(self.groebner_basis, name=self.name, groebner=self.groebner_basis, find_groebner=False, **self.properties())
 
     def check_if_basis_groebner(self, basis=None):
         if basis is None:
             basis = self.generators
-        pairs = list(itertools.combinations(basis, 2))
-        while pairs:
-            f, g = pairs.pop()
-            h = self.S_polynomial(f, g)
-            r = self.reminder_wrt_family(h, basis)
-            if r != self.ring.zero:
-                return False
-        return True
+        return self.engine.is_basis([g.value.terms for g in basis])
 
     def groebner_reminder(self, f):
-        if self.groebner_basis is None:
-            self.to_groebner()
-        return self.ring.multi_long_div(f, self.groebner_basis)[1]
+        return self.ring.from_terms(self.engine.normal_form(f.value.terms, self.groebner_terms()))
 
     def reminder_wrt_family(self, f, F):
         return self.ring.multi_long_div(f, F)[1]
 
     def check_if_belongs(self, element):
-        self.to_groebner()
-        return self.groebner_reminder(element) == self.ring.zero
+        return not self.engine.normal_form(element.value.terms, self.groebner_terms())
 
     def __contains__(self, item):
         return self.check_if_belongs(item)
 
     def _reduce_basis(self):
         if self.no_generators < 2:
-            return
+            return self
         for i, b in enumerate(self.generators):
             complementary_basis = [copy.copy(g) for g in self.generators if g != b]
             reduced_ideal = KPolynomialIdeal(complementary_basis)
@@ -371,17 +687,180 @@ class KPolynomialIdeal(PolynomialIdeal):
     def __eq__(self, other):
         if not isinstance(other, KPolynomialIdeal):
             return False
-        if self.groebner_basis is None:
-            self.to_groebner()
-        if other.groebner_basis is None:
-            other.to_groebner()
         if self.order != other.order:
             warnings.warn('Ideals are not equal due to different orders.')
             return False
-        return self.groebner_basis == other.groebner_basis
+        return self.groebner_terms() == other.groebner_terms()
+
+    def quotient_algebra(self, name=None):
+        return QuotientKAlgebra(self, name)
+
+    def homotopy_solve(self, processes=None, seed=None, tol=1e-6, **options):
+        """
+            Isolated complex zeros of a square system of generators by total degree homotopy continuation, without
+            Groebner bases; `processes` tracks the paths in a process pool. See numeric.solve_total_degree.
+        """
+        generators = [g for g in self.generators if g != self.ring.zero]
+        if len(generators) != self.ring.no_generators:
+            raise ValueError("Homotopy continuation needs as many generators as variables.")
+        C = CFloating()
+        system = numeric.PolynomialSystem.from_polynomials(generators, lambda c: C.from_canonical_subring(c).value)
+        points, status = numeric.solve_total_degree(system, processes, seed, **options)
+        return numeric.distinct_points(points[status == numeric.CONVERGED], tol)
+
+    def macaulay_matrix(self, degree):
+        """
+            Sparse Macaulay matrix in degrees up to `degree`: rows are the products m*f of generators f with monomials m,
+            deg(m*f) <= degree, columns are the monomials of degree at most `degree`, decreasing in the order of the ring.
+            Returns the matrix and the list of column monomials.
+        """
+        n = self.ring.no_generators
+        monomials = [t for d in range(degree + 1) for t in self._monomials_of_degree(n, d)]
+        columns = sorted(monomials, key=self.engine.sort_key, reverse=True)
+        index = {t: j for j, t in enumerate(columns)}
+        rows = []
+        for f in self.generators:
+            f = f.value.terms
+            if not f:
+                continue
+            f_degree = max(sum(t) for t in f)
+            for d in range(degree - f_degree + 1):
+                for m in self._monomials_of_degree(n, d):
+                    rows.append({index[self.engine.shift(t, m)]: c for t, c in f.items()})
+        return SparseMatrix(rows, len(columns), self.ring.base_ring), columns
+
+    @staticmethod
+    def _monomials_of_degree(n, d):
+        for c in itertools.combinations_with_replacement(range(n), d):
+            yield tuple(c.count(i) for i in range(n))
+
+    #  ------ syzygies and resolutions ------
+    def _module_engine(self):
+        return groebner.ModuleGroebnerEngine(self.ring.base_ring, self.order.key)
+
+    def syzygies(self):
+        """ Submodule of R^s of the relations among the s generators. """
+        F = FreeFGModule(self.ring, self.no_generators)
+        vectors = [{(0, e): c for e, c in g.value.terms.items()} for g in self.generators]
+        syzygies = self._module_engine().syzygy_module(vectors, 1, self.ring.no_generators)
+        return F.submodule([F.from_terms(g) for g in syzygies] or [F.zero])
+
+    def resolution(self, minimal=True):
+        """ Free resolution of R/I, starting from the cached Groebner basis; see `FreeResolution`. """
+        key = ('resolution', minimal)
+        if key not in self._operations_cache:
+            G = [{(0, e): c for e, c in g.items()} for g in self.groebner_terms()]
+            self._operations_cache[key] = FreeResolution(self.ring, self._module_engine(), G, 1, minimal)
+        return self._operations_cache[key]
+
+    def betti_numbers(self):
+        return self.resolution().betti_numbers()
+
+    #  ------ ideal arithmetic ------
+    def _from_groebner_terms(self, basis, name=""):
+        elements = [self.ring.from_terms(g) for g in basis]
+        return KPolynomialIdeal(elements or [self.ring.zero], name=name, groebner=elements)
+
+    def _cache_key(self):
+        return tuple(tuple(sorted((t, c.value) for t, c in g.items())) for g in self.groebner_terms())
+
+    def _cached(self, operation, other, compute):
+        key = (operation, other._cache_key() if isinstance(other, KPolynomialIdeal) else other)
+        if key not in self._operations_cache:
+            self._operations_cache[key] = compute()
+        return self._operations_cache[key]
+
+    def _principal(self, element):
+        if isinstance(element, KPolynomialIdeal):
+            return element
+        return KPolynomialIdeal([element])
+
+    def _tag_engine(self, no_tags):
+        n = self.ring.no_generators
+        return groebner.GroebnerEngine(self.ring.base_ring, elimination_order(range(n, n + no_tags), self.order).key)
+
+    def _eliminate_tags(self, polynomials, bases, no_tags):
+        """
+            Reduced Groebner basis of (polynomials + bases) intersected with the ring without the last `no_tags`
+            variables. The block order makes the tag-free part a reduced basis w.r.t. the order of the ring.
+        """
+        G = self._tag_engine(no_tags).reduced_basis(polynomials, bases)
+        n = self.ring.no_generators
+        return [{t[:n]: c for t, c in g.items()} for g in G if all(e == 0 for t in g for e in t[n:])]
+
+    def _tagged(self, f, tag_power=0):
+        return {t + (tag_power,): c for t, c in f.items()}
 
-    def quotient_algebra(self):
-        return QuotientKAlgebra(self.ring, self)
+    def __add__(self, other):
+        other = self._principal(other)
+        return self._cached('sum', other, lambda: self._from_groebner_terms(
+            self.engine.reduced_basis([], [self.groebner_terms(), other.groebner_terms()])))
+
+    def __mul__(self, other):
+        other = self._principal(other)
+        return self._cached('product', other, lambda: KPolynomialIdeal(
+            [f * g for f in self.generators for g in other.generators]))
+
+    def intersect(self, other):
+        """ I ∩ J = (tI + (1-t)J) ∩ k[x], both tagged bases are reused as Groebner bases. """
+        other = self._principal(other)
+
+        def compute():
+            K = self.ring.base_ring
+            tI = [self._tagged(g, 1) for g in self.groebner_terms()]
+            tJ = [self.engine.add(self._tagged(g), {t: K.neg(c) for t, c in self._tagged(g, 1).items()}) for g in other.groebner_terms()]
+            return self._from_groebner_terms(self._eliminate_tags([], [tI, tJ], 1))
+        return self._cached('intersect', other, compute)
+
+    def colon(self, other):
+        """ I : J = ∩_g (I ∩ (g)) / g over the generators g of J. """
+        other = self._principal(other)
+
+        def compute():
+            result = None
+            for g in other.groebner_terms():
+                g_ideal = self._from_groebner_terms([self.engine.monic(g)])
+                quotients = [self.engine.divide(h, [g])[0][0] for h in self.intersect(g_ideal).groebner_terms()]
+                ideal = self._from_groebner_terms(self.engine.reduce_basis(quotients))
+                result = ideal if result is None else result.intersect(ideal)
+            return result if result is not None else self._from_groebner_terms([{(0,) * self.ring.no_generators: self.ring.base_ring.one}])
+        return self._cached('colon', other, compute)
+
+    def saturate(self, other):
+        """ I : J^∞ = ∩_g (I + (1 - tg)) ∩ k[x] over the generators g of J. """
+        other = self._principal(other)
+
+        def compute():
+            K = self.ring.base_ring
+            result = None
+            for g in other.groebner_terms():
+                one_minus_tg = self.engine.add({(0,) * (self.ring.no_generators + 1): K.one},
+                                               {t: K.neg(c) for t, c in self._tagged(g, 1).items()})
+                tagged_basis = [self._tagged(f) for f in self.groebner_terms()]
+                ideal = self._from_groebner_terms(self._eliminate_tags([one_minus_tg], [tagged_basis], 1))
+                result = ideal if result is None else result.intersect(ideal)
+            return result if result is not None else self._from_groebner_terms([{(0,) * self.ring.no_generators: K.one}])
+        return self._cached('saturate', other, compute)
+
+    def eliminate(self, variables):
+        """
+            Elimination ideal I ∩ k[remaining variables], returned as an ideal of the same ring.
+            `variables` are given by indices, names or generator elements.
+        """
+        indices = []
+        for v in variables:
+            if isinstance(v, BaseElement):
+                v = int(np.argmax(v.value.leading_monomial().exponent_index))
+            elif isinstance(v, str):
+                v = self.ring.generators.index(v)
+            indices.append(v)
+        indices = tuple(sorted(set(indices)))
+
+        def compute():
+            order = elimination_order(indices, self.order)
+            basis = [g for g in self.groebner_terms(order) if all(t[i] == 0 for t in g for i in indices)]
+            return self._from_groebner_terms(self.engine.reduce_basis(basis))
+        return self._cached('eliminate', indices, compute)
 
 
 class KMonomialIdeal:
@@ -1,5 +1,8 @@
+import concurrent.futures
+import functools
 import math
 import scipy.special
+import numpy as np
 
 
 class Binomials:
@@ -15,3 +18,264 @@ class Binomials:
     def binomial_list_k(n):
         return [scipy.special.comb(n, k, exact=True) for k in range(n+1)]
 
+
+
+class PolynomialSystem:
+    """
+        Polynomials f_1, ..., f_m in n variables with numeric coefficients, evaluated with NumPy broadcasting on
+        batches of points, i.e. arrays of shape (..., n).
+    """
+    def __init__(self, polynomials, no_variables, dtype=np.complex128):
+        terms = sorted({t for f in polynomials for t in f})
+        self.no_variables = no_variables
+        self.no_polynomials = len(polynomials)
+        self.exponents = np.array(terms, dtype=np.int64).reshape(len(terms), no_variables)
+        self.coefficients = np.zeros((len(polynomials), len(terms)), dtype=dtype)
+        index = {t: i for i, t in enumerate(terms)}
+        for k, f in enumerate(polynomials):
+            for t, c in f.items():
+                self.coefficients[k, index[t]] = c
+        self.derivatives = []
+        for i in range(no_variables):
+            shifted = self.exponents.copy()
+            shifted[:, i] = np.maximum(shifted[:, i] - 1, 0)
+            self.derivatives.append((shifted, self.coefficients * self.exponents[:, i]))
+
+    @staticmethod
+    def from_polynomials(polynomials, convert=complex, dtype=np.complex128):
+        """ System of ring elements of a polynomial algebra, coefficients are mapped to numbers by `convert`. """
+        no_variables = polynomials[0].ring.no_generators
+        return PolynomialSystem([{t: convert(c) for t, c in f.value.terms.items()} for f in polynomials], no_variables, dtype)
+
+    @staticmethod
+    def monomials(points, exponents):
+        return np.prod(points[..., None, :] ** exponents, axis=-1)
+
+    def __call__(self, points):
+        return self.monomials(points, self.exponents) @ self.coefficients.T
+
+    def jacobian(self, points):
+        return np.stack([self.monomials(points, e) @ c.T for e, c in self.derivatives], axis=-1)
+
+    def newton(self, points, steps=5, tol=1e-14):
+        """ Gauss-Newton iterations on a batch of points, pseudoinverses handle non-square and near-singular systems. """
+        points = np.array(points, dtype=np.complex128)
+        for _ in range(steps):
+            values = self(points)
+            if np.max(np.abs(values), initial=0) < tol:
+                break
+            points = points - (np.linalg.pinv(self.jacobian(points)) @ values[..., None])[..., 0]
+        return points
+
+
+def distinct_points(points, tol=1e-6):
+    """ Points of a batch up to the tolerance (relative to the size of the points). """
+    distinct = []
+    for p in points:
+        if not any(np.linalg.norm(p - q) <= tol * max(1., np.linalg.norm(q)) for q in distinct):
+            distinct.append(p)
+    return np.array(distinct, dtype=points.dtype).reshape(len(distinct), points.shape[-1])
+
+
+TRACKING, CONVERGED, FAILED, AT_INFINITY = 0, 1, -1, -2
+
+
+class Homotopy:
+    """
+        Straight-line homotopy H(x, t) = (1 - t)*gamma*g(x) + t*f(x) from the total degree start system
+        g_i = x_i^d_i - 1, d_i the degree of f_i, to a square system f. Its prod d_i start points are the tuples of
+        roots of unity; by Bezout every isolated zero of f is the end of one of the paths. For a random complex
+        gamma the paths are regular for t < 1 with probability one.
+    """
+    def __init__(self, system, gamma=None, seed=None):
+        n = system.no_variables
+        if system.no_polynomials != n:
+            raise ValueError("Total degree homotopies need as many polynomials as variables.")
+        degrees = system.exponents.sum(axis=1)
+        self.degrees = [int(degrees[c != 0].max(initial=0)) for c in system.coefficients]
+        self.target = system
+        self.start = PolynomialSystem([{tuple(d * (j == i) for j in range(n)): 1, (0,) * n: -1}
+                                       for i, d in enumerate(self.degrees)], n)
+        if gamma is None:
+            gamma = np.exp(2j * np.pi * np.random.default_rng(seed).random())
+        self.gamma = gamma
+
+    def start_points(self):
+        roots = [np.exp(2j * np.pi * np.arange(d) / d) for d in self.degrees]
+        return np.stack(np.meshgrid(*roots, indexing='ij'), axis=-1).reshape(-1, self.target.no_variables)
+
+    def __call__(self, points, t):
+        return (1 - t)[:, None] * self.gamma * self.start(points) + t[:, None] * self.target(points)
+
+    def jacobian(self, points, t):
+        return (1 - t)[:, None, None] * self.gamma * self.start.jacobian(points) + t[:, None, None] * self.target.jacobian(points)
+
+    def tangent(self, points, t):
+        """ dx/dt along the paths, from H_x dx/dt + H_t = 0. """
+        return -_solve(self.jacobian(points, t), self.target(points) - self.gamma * self.start(points))
+
+
+def _solve(matrices, vectors):
+    """ Least squares solutions of a batch of linear systems, pseudoinverses keep near-singular ones finite. """
+    return (np.linalg.pinv(matrices) @ vectors[..., None])[..., 0]
+
+
+def _norm(points):
+    return np.linalg.norm(points, axis=-1)
+
+
+def track(homotopy, points, t_start, t_end, step=0.05, min_step=1e-12, max_steps=10**4, tol=1e-10, divergence=1e8):
+    """
+        Tracks a batch of paths from t_start to t_end (arrays or numbers) with a fourth order Runge-Kutta predictor
+        and three Newton corrections. Every path has its own step size, halved when the corrector does not converge
+        and enlarged by 1.5 after a success. Returns the end points and the status of every path: CONVERGED when
+        t_end is reached, AT_INFINITY when the path leaves the ball of radius `divergence` and FAILED when the step
+        size falls below `min_step` or `max_steps` is exceeded.
+    """
+    x = np.array(points, dtype=np.complex128)
+    N = len(x)
+    t = np.broadcast_to(np.asarray(t_start, dtype=float), (N,)).copy()
+    t_end = np.broadcast_to(np.asarray(t_end, dtype=float), (N,))
+    h = np.full(N, step)
+    status = np.where(t >= t_end, CONVERGED, TRACKING)
+    for _ in range(max_steps):
+        active = np.flatnonzero(status == TRACKING)
+        if not active.size:
+            break
+        xa, ta = x[active], t[active]
+        ha = np.minimum(h[active], t_end[active] - ta)
+        k1 = homotopy.tangent(xa, ta)
+        k2 = homotopy.tangent(xa + ha[:, None] / 2 * k1, ta + ha / 2)
+        k3 = homotopy.tangent(xa + ha[:, None] / 2 * k2, ta + ha / 2)
+        k4 = homotopy.tangent(xa + ha[:, None] * k3, ta + ha)
+        predicted = xa + ha[:, None] / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+        t_new = np.where(ha == t_end[active] - ta, t_end[active], ta + ha)
+        corrections = []
+        for _ in range(3):
+            dx = _solve(homotopy.jacobian(predicted, t_new), homotopy(predicted, t_new))
+            predicted = predicted - dx
+            corrections.append(_norm(dx))
+        scale = 1 + _norm(predicted)
+        accepted = (corrections[-1] <= tol * scale) | (corrections[-1] <= corrections[0] / 4) & (corrections[-1] <= 1e-6 * scale)
+        accepted &= np.isfinite(corrections[-1])
+        done, rejected = active[accepted], active[~accepted]
+        x[done], t[done] = predicted[accepted], t_new[accepted]
+        h[done] = np.minimum(1.5 * h[done], step * 4)
+        h[rejected] /= 2
+        status[rejected[h[rejected] < min_step]] = FAILED
+        status[done[t[done] >= t_end[done]]] = CONVERGED
+        status[done[_norm(x[done]) > divergence]] = AT_INFINITY
+    status[status == TRACKING] = FAILED
+    return x, status
+
+
+def _circle_step(homotopy, x, t, angle):
+    """ RK4 step of x along t = 1 - s*e^(i*theta) by `angle` in theta and three Newton corrections; t is complex. """
+    def derivative(x, t):
+        # dx/dtheta = dx/dt * dt/dtheta, dt/dtheta = i*(t - 1)
+        return homotopy.tangent(x, t) * (1j * (t - 1))[:, None]
+
+    middle, end = 1 - (1 - t) * np.exp(0.5j * angle), 1 - (1 - t) * np.exp(1j * angle)
+    k1 = derivative(x, t)
+    k2 = derivative(x + angle / 2 * k1, middle)
+    k3 = derivative(x + angle / 2 * k2, middle)
+    k4 = derivative(x + angle * k3, end)
+    x = x + angle / 6 * (k1 + 2 * k2 + 2 * k3 + k4)
+    for _ in range(3):
+        dx = _solve(homotopy.jacobian(x, end), homotopy(x, end))
+        x = x - dx
+    return x, end, _norm(dx)
+
+
+def cauchy_integral(homotopy, points, s, loop_points=32, max_winding=8):
+    """
+        Cauchy integral endgame at radius s: the paths through the points at t = 1 - s are tracked around the circle
+        |1 - t| = s until they close up after c loops, c the winding number. Near a solution of multiplicity m the
+        path is a Puiseux series x(s) = sum_k a_k s^(k/c), so the mean of the points at c*loop_points equally spaced
+        angles is a_0 = x(0) up to terms of order s^loop_points. Returns the estimates and the winding numbers, 0 for
+        paths that fail to close within `max_winding` loops or whose corrector does not converge.
+    """
+    y = np.array(points, dtype=np.complex128)
+    N = len(y)
+    t = np.full(N, 1 - s, dtype=np.complex128)
+    sums, winding = np.zeros_like(y), np.zeros(N, dtype=int)
+    looping = np.ones(N, dtype=bool)
+    angle = 2 * np.pi / loop_points
+    for c in range(1, max_winding + 1):
+        index = np.flatnonzero(looping)
+        if not index.size:
+            break
+        for _ in range(loop_points):
+            sums[index] += y[index]
+            y[index], t[index], correction = _circle_step(homotopy, y[index], t[index], angle)
+            looping[index[~(correction <= 1e-6 * (1 + _norm(y[index])))]] = False
+        t[index] = 1 - s
+        index = index[looping[index]]
+        closed = _norm(y[index] - points[index]) <= 1e-6 * (1 + _norm(points[index]))
+        winding[index[closed]] = c
+        looping[index[closed]] = False
+    estimates = sums / np.maximum(winding, 1)[:, None] / loop_points
+    estimates[winding == 0] = np.nan
+    return estimates, winding
+
+
+def track_paths(homotopy, points, endgame_start=0.1, endgame_steps=20, tol=1e-8, loop_points=32, max_winding=8,
+                **options):
+    """
+        Paths of the homotopy from the start points to t = 1. They are tracked up to t = 1 - endgame_start, then
+        x(0) is estimated by the Cauchy integral around |1 - t| = s (see `cauchy_integral`) for the radii
+        s = endgame_start/2^k. This is exact up to O(s^loop_points) at regular and singular solutions alike, so a path
+        converges once the estimates at two successive radii agree up to `tol` while the path approaches them. The
+        integral also removes the negative powers of s of a path going to infinity; such paths move away from their
+        estimates as s shrinks and are sent to infinity after three radii.
+    """
+    x, status = track(homotopy, points, 0., 1 - endgame_start, **options)
+    estimates = np.full_like(x, np.nan)
+    distances = np.full(len(x), np.inf)
+    growing = np.zeros(len(x), dtype=int)
+    status[status == CONVERGED] = TRACKING
+    s = endgame_start
+    for k in range(endgame_steps):
+        if k:
+            index = np.flatnonzero(status == TRACKING)
+            x[index], result = track(homotopy, x[index], 1 - 2 * s, 1 - s, **options)
+            status[index[result != CONVERGED]] = result[result != CONVERGED]
+        index = np.flatnonzero(status == TRACKING)
+        if not index.size:
+            break
+        estimate, winding = cauchy_integral(homotopy, x[index], s, loop_points, max_winding)
+        distance = _norm(x[index] - estimate)
+        growing[index] = np.where(distance > distances[index], growing[index] + 1, 0)
+        agree = (_norm(estimate - estimates[index]) <= tol * (1 + _norm(estimate))) & (growing[index] == 0)
+        distances[index] = np.where(np.isnan(distance), np.inf, distance)
+        estimates[index] = estimate
+        finished = index[agree]
+        status[finished] = CONVERGED
+        x[finished] = estimates[finished]
+        status[index[growing[index] >= 3]] = AT_INFINITY
+        s /= 2
+    # paths still moving away when the tracking stops diverge
+    unfinished = (status == TRACKING) | (status == FAILED)
+    status[unfinished] = np.where((growing[unfinished] > 0) | (_norm(x[unfinished]) > 1 / tol), AT_INFINITY, FAILED)
+    converged = status == CONVERGED
+    x[converged] = homotopy.target.newton(x[converged], steps=3)
+    return x, status
+
+
+def solve_total_degree(system, processes=None, seed=None, **options):
+    """
+        End points and statuses of all paths of the total degree homotopy of a square PolynomialSystem, see
+        `track_paths`. With `processes`, chunks of the start points are tracked in a process pool.
+    """
+    homotopy = Homotopy(system, seed=seed)
+    n = system.no_variables
+    if not all(homotopy.degrees):
+        # a nonzero constant among the polynomials: no solutions
+        return np.zeros((0, n), dtype=np.complex128), np.zeros(0, dtype=int)
+    start = homotopy.start_points()
+    if not processes:
+        return track_paths(homotopy, start, **options)
+    chunks = [chunk for chunk in np.array_split(start, 4 * processes) if len(chunk)]
+    with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+        results = list(executor.map(functools.partial(track_paths, homotopy, **options), chunks))
+    return np.concatenate([x for x, _ in results]), np.concatenate([status for _, status in results])
@@ -0,0 +1,308 @@
+"""
+    Permutations as NumPy int32 arrays and Schreier-Sims stabilizer chains.
+
+    A permutation p of {0, ..., n-1} maps the point i to p[i]. Groups act on the right, so the product g*h maps i to
+    h[g[i]] (first g, then h), which agrees with the coset tables of `cosets`. A stabilizer chain of a group G is a
+    base (b_0, ..., b_{k-1}) with G = G_0 > G_1 > ... > G_k = 1, G_i the pointwise stabilizer of b_0, ..., b_{i-1},
+    and a strong generating set containing generators of every G_i. Orbits of the base points are stored with
+    Schreier vectors, so a level costs O(n) memory whatever the size of the orbit.
+"""
+import math
+import random
+
+import numpy as np
+
+
+def identity(degree):
+    return np.arange(degree, dtype=np.int32)
+
+
+def compose(g, h):
+    """ The product g*h: first g, then h. """
+    return h[g]
+
+
+def invert(g):
+    result = np.empty_like(g)
+    result[g] = np.arange(len(g), dtype=g.dtype)
+    return result
+
+
+def is_identity(g):
+    return bool((g == np.arange(len(g))).all())
+
+
+def from_cycles(cycles, degree):
+    g = identity(degree)
+    for cycle in cycles:
+        for a, b in zip(cycle, cycle[1:] + cycle[:1]):
+            g[a] = b
+    return g
+
+
+def cycles(g):
+    """ Cycles of length > 1, each starting with its least point. """
+    seen = np.zeros(len(g), dtype=bool)
+    result = []
+    for i in range(len(g)):
+        if seen[i] or g[i] == i:
+            continue
+        cycle = [i]
+        seen[i] = True
+        j = int(g[i])
+        while j != i:
+            cycle.append(j)
+            seen[j] = True
+            j = int(g[j])
+        result.append(tuple(cycle))
+    return result
+
+
+def orbit(generators, point, degree):
+    """ Orbit of the point as an array in breadth-first order and the Schreier vector: for b != point in the orbit,
+        back[b] = k such that b is the image of an earlier orbit point under generators[k], -1 outside the orbit. """
+    back = np.full(degree, -1, dtype=np.int32)
+    seen = np.zeros(degree, dtype=bool)
+    seen[point] = True
+    layers = [np.array([point])]
+    frontier = layers[0]
+    while frontier.size and generators:
+        images = np.stack([g[frontier] for g in generators])
+        labels = np.repeat(np.arange(len(generators)), len(frontier))
+        images = images.ravel()
+        new = ~seen[images]
+        images, labels = images[new], labels[new]
+        images, first = np.unique(images, return_index=True)
+        back[images] = labels[first]
+        seen[images] = True
+        frontier = images
+        layers.append(images)
+    return np.concatenate(layers), back
+
+
+class StabilizerChain:
+    """
+        Base and strong generating set of the group generated by `generators` (permutations of `degree` points).
+        Random Schreier-Sims sifts random products (product replacement with `rng`) until the known `order` is
+        reached or, when it is not known, until `tries` consecutive elements sift to the identity. Unless the order
+        is known, the deterministic algorithm (Holt, Handbook of computational group theory, 4.4.2) then completes
+        the chain by sifting every Schreier generator, in batches, so the chain is always correct. With
+        `deterministic=False` this verification is skipped: while the chain is incomplete at most half of the
+        elements of the group sift to the identity, so the error probability would be 2^-tries for uniformly
+        distributed elements, but product replacement only approximates the uniform distribution and no bound is
+        guaranteed. A prefix of the base can be prescribed.
+    """
+    max_transversal_size = 2**24
+
+    def __init__(self, generators, degree, base=(), order=None, deterministic=True, tries=20, rng=random):
+        self.degree = degree
+        self.rng = rng
+        self.base = []
+        self.strong_generators = []
+        self._moved = []
+        self.levels = []
+        for b in base:
+            self._extend_base(b)
+        for g in generators:
+            g = np.asarray(g, dtype=np.int32)
+            if not is_identity(g):
+                self._add_strong_generator(g)
+        self._random_schreier_sims(order, tries)
+        if order is None and deterministic:
+            self._schreier_sims()
+
+    #  ------ levels ------
+    def _extend_base(self, point):
+        self.base.append(int(point))
+        self.levels.append(None)
+
+    def _level_generators(self, i):
+        return [g for g, moved in zip(self.strong_generators, self._moved) if moved >= i]
+
+    def _level(self, i):
+        """
+            (generators of G_i, their inverses, orbit of b_i, Schreier vector, positions of the orbit points,
+            inverse transversal), recomputed after changes. Row positions[b] of the inverse transversal maps b back
+            to b_i; it is stored while all transversals have at most `max_transversal_size` entries, otherwise None.
+        """
+        if self.levels[i] is None:
+            generators = self._level_generators(i)
+            inverses = [invert(g) for g in generators]
+            orbit_points, back = orbit(generators, self.base[i], self.degree)
+            positions = np.full(self.degree, -1, dtype=np.int32)
+            positions[orbit_points] = np.arange(len(orbit_points), dtype=np.int32)
+            transversal = None
+            stored = sum(level[5].size for level in self.levels if level is not None and level[5] is not None)
+            if stored + len(orbit_points) * self.degree <= self.max_transversal_size:
+                transversal = _inverse_transversal(inverses, orbit_points, back, positions)
+            self.levels[i] = (generators, inverses, orbit_points, back, positions, transversal)
+        return self.levels[i]
+
+    def _add_strong_generator(self, g):
+        """ Adds g, extending the base if g fixes all of it; the levels of the G_i containing g whose orbit grows are recomputed. """
+        moved = next((i for i, b in enumerate(self.base) if g[b] != b), None)
+        if moved is None:
+            self._extend_base(int(np.flatnonzero(g != np.arange(self.degree))[0]))
+            moved = len(self.base) - 1
+        self.strong_generators.append(g)
+        self._moved.append(moved)
+        inverse = invert(g)
+        for i in range(moved + 1):
+            level = self.levels[i]
+            if level is not None and (level[4][g[level[2]]] >= 0).all():
+                # the orbit is closed under g: Schreier vector and transversal stay valid
+                level[0].append(g)
+                level[1].append(inverse)
+            else:
+                self.levels[i] = None
+
+    def orbit(self, i):
+        return self._level(i)[2]
+
+    def transversal_element(self, i, point):
+        """ u in G_i mapping b_i to `point`, which must lie in the orbit of b_i. """
+        generators, inverses, _, back, positions, transversal = self._level(i)
+        if transversal is not None:
+            return invert(transversal[positions[point]])
+        word = []
+        while point != self.base[i]:
+            k = back[point]
+            word.append(k)
+            point = inverses[k][point]
+        u = identity(self.degree)
+        for k in reversed(word):
+            u = compose(u, generators[k])
+        return u
+
+    def sift(self, g, start=0):
+        """ (h, i): g stripped by the transversals of levels start, start + 1, ... until level i where the image
+            of b_i is not in the orbit (i = len(base) when every level succeeds; g is in the group iff h = 1). """
+        for i in range(start, len(self.base)):
+            _, inverses, _, back, positions, transversal = self._level(i)
+            b = self.base[i]
+            point = int(g[b])
+            if positions[point] < 0:
+                return g, i
+            if transversal is not None:
+                g = compose(g, transversal[positions[point]])
+                continue
+            while point != b:
+                k = back[point]
+                g = compose(g, inverses[k])
+                point = int(inverses[k][point])
+        return g, len(self.base)
+
+    def sift_batch(self, elements, start=0):
+        """ `sift` of the rows of an (N, degree) array at once: the residues and the level reached by every row. """
+        residues = np.array(elements, dtype=np.int32).reshape(-1, self.degree)
+        reached = np.full(len(residues), len(self.base))
+        active = np.arange(len(residues))
+        for i in range(start, len(self.base)):
+            _, _, _, _, positions, transversal = self._level(i)
+            if transversal is None:
+                for k in active:
+                    residues[k], reached[k] = self.sift(residues[k], i)
+                break
+            where = positions[residues[active, self.base[i]]]
+            reached[active[where < 0]] = i
+            active, where = active[where >= 0], where[where >= 0]
+            residues[active] = np.take_along_axis(transversal[where], residues[active], axis=1)
+        return residues, reached
+
+    #  ------ construction ------
+    def _random_schreier_sims(self, order, tries):
+        if not self.strong_generators:
+            return
+        state = list(self.strong_generators) + [identity(self.degree)] * max(0, 10 - len(self.strong_generators))
+        for _ in range(50):
+            _product_replacement(state, self.rng)
+        successes = 0
+        while successes < tries if order is None else self.order() < order:
+            h, i = self.sift(_product_replacement(state, self.rng))
+            if i < len(self.base) or not is_identity(h):
+                self._add_strong_generator(h)
+                successes = 0
+            else:
+                successes += 1
+
+    def _schreier_sims(self):
+        i = len(self.base) - 1
+        while i >= 0:
+            i = self._check_level(i)
+
+    def _check_level(self, i):
+        """
+            Sifts the Schreier generators u_b * s of level i; returns the next level to check. With a stored
+            transversal they are formed and sifted in chunks of whole arrays.
+        """
+        generators, _, orbit_points, _, _, transversal = self._level(i)
+        if transversal is None:
+            for point in orbit_points:
+                u = self.transversal_element(i, point)
+                for s in generators:
+                    h, j = self.sift(compose(u, s), i)
+                    if j < len(self.base) or not is_identity(h):
+                        self._add_strong_generator(h)
+                        return j if j < len(self.base) else len(self.base) - 1
+            return i - 1
+        stack = np.stack(generators)
+        chunk = max(1, self.max_transversal_size // (len(generators) * self.degree))
+        for start in range(0, len(orbit_points), chunk):
+            inverses = transversal[start:start + chunk]
+            u = np.empty_like(inverses)
+            np.put_along_axis(u, inverses, np.arange(self.degree, dtype=np.int32)[None, :], axis=1)
+            # row (b, s) is u_b * s = s[u_b]
+            products = np.take_along_axis(stack[None, :, :], u[:, None, :], axis=2).reshape(-1, self.degree)
+            residues, reached = self.sift_batch(products, i)
+            failed = np.flatnonzero((reached < len(self.base)) | (residues != np.arange(self.degree)).any(axis=1))
+            if failed.size:
+                h, j = residues[failed[0]], int(reached[failed[0]])
+                self._add_strong_generator(h)
+                return j if j < len(self.base) else len(self.base) - 1
+        return i - 1
+
+    #  ------ queries ------
+    def order(self):
+        """ Product of the orbit lengths: the group order for a complete chain, at most that otherwise. """
+        return math.prod(len(self.orbit(i)) for i in range(len(self.base)))
+
+    def contains(self, g):
+        h, i = self.sift(np.asarray(g, dtype=np.int32))
+        return i == len(self.base) and is_identity(h)
+
+    def random_element(self, rng=random):
+        """ Uniformly distributed element: a product of random transversal elements, one of every level. """
+        g = identity(self.degree)
+        for i in reversed(range(len(self.base))):
+            orbit_points = self.orbit(i)
+            g = compose(g, self.transversal_element(i, int(orbit_points[rng.randrange(len(orbit_points))])))
+        return g
+
+
+def _inverse_transversal(inverses, orbit_points, back, positions):
+    """ Rows u_b^-1 for the orbit points b in breadth-first order, u_b being the product of the generators along
+        the Schreier tree; a whole layer is computed at once from the rows of the parents. """
+    transversal = np.empty((len(orbit_points), len(positions)), dtype=np.int32)
+    transversal[0] = np.arange(len(positions))
+    if len(orbit_points) == 1:
+        return transversal
+    inverse_stack = np.stack(inverses)
+    labels = back[orbit_points[1:]]
+    parents = inverse_stack[labels, orbit_points[1:]]
+    depth = np.zeros(len(orbit_points), dtype=np.int32)
+    for k in range(1, len(orbit_points)):
+        depth[k] = depth[positions[parents[k - 1]]] + 1
+    for d in range(1, depth.max(initial=0) + 1):
+        layer = np.flatnonzero(depth == d)
+        # u_b = u_parent * s, so u_b^-1 = s^-1 * u_parent^-1
+        transversal[layer] = np.take_along_axis(transversal[positions[parents[layer - 1]]],
+                                                inverse_stack[labels[layer - 1]], axis=1)
+    return transversal
+
+
+def _product_replacement(state, rng=random):
+    """ One step of the product replacement algorithm; returns the accumulator (the last slot). """
+    i, j = rng.sample(range(len(state) - 1), 2)
+    state[i] = compose(state[i], state[j] if rng.random() < 0.5 else invert(state[j]))
+    state[-1] = compose(state[-1], state[i])
+    return state[-1]
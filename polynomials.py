@@ -2,9 +2,14 @@ from base_rings import *
 
 
 class MonomialOrder:
-    def __init__(self, name, comparator):
+    def __init__(self, name, comparator=None, key=None):
         self.name = name
+        if comparator is None:
+            comparator = lambda l1, l2: key_comp(key, l1, l2)
+        if key is None:
+            key = functools.cmp_to_key(lambda l1, l2: comparator(np.array(l1), np.array(l2)))
         self.comparator = comparator
+        self.key = key
 
     def __call__(self, a, b):
         return self.comparator(a.exponent_index, b.exponent_index)
@@ -51,9 +56,40 @@ def grevlex_comp(l1, l2):
     return 0
 
 
-grlex = MonomialOrder('grlex', grlex_comp)
-lex = MonomialOrder('lex', lex_comp)
-grevlex = MonomialOrder('grevlex', grevlex_comp)
+def key_comp(key, l1, l2):
+    k1, k2 = key(tuple(l1)), key(tuple(l2))
+    return (k1 > k2) - (k1 < k2)
+
+
+def lex_key(exponents):
+    return tuple(exponents)
+
+
+def grlex_key(exponents):
+    return sum(exponents), tuple(exponents)
+
+
+def grevlex_key(exponents):
+    return sum(exponents), tuple(-e for e in reversed(exponents))
+
+
+grlex = MonomialOrder('grlex', grlex_comp, grlex_key)
+lex = MonomialOrder('lex', lex_comp, lex_key)
+grevlex = MonomialOrder('grevlex', grevlex_comp, grevlex_key)
+
+
+def elimination_order(eliminated, order=grevlex):
+    """
+        Block order in which any monomial containing a variable with index in `eliminated` is bigger than every
+        monomial free of them; monomials free of them are compared by `order`.
+    """
+    eliminated = tuple(sorted(eliminated))
+    base_key = order.key
+
+    def key(exponents):
+        return grevlex_key([exponents[i] for i in eliminated]), base_key(exponents)
+
+    return MonomialOrder(f'elim{list(eliminated)}({order})', key=key)
 
 
 class Monomial:
@@ -92,7 +128,7 @@ class Monomial:
             return False
         if self.no_variables is None or other.no_variables is None:
             return list(self.exponent_index) + [self.ring.zero]*len(other.exponent_index) == list(other.exponent_index) + [self.ring.zero]*len(self.exponent_index)
-        return self.exponent_index == other.exponent_index
+        return np.array_equal(self.exponent_index, other.exponent_index)
 
     def __mul__(self, other):
         assert isinstance(other, (Monomial, BaseElement))
@@ -295,8 +331,12 @@ class Polynomial:
         self.infinite_variables = self.monomials[0].infinite_variables
         for i in range(len(self.monomials) - 1, 0, -1):
             if np.array_equal(self.monomials[i].exponent_index, self.monomials[i - 1].exponent_index):
-                self.monomials[i - 1].coefficient += self.monomials[i].coefficient
+                merged = self.monomials[i - 1]
+                self.monomials[i - 1] = Monomial(merged.coefficient + self.monomials[i].coefficient, merged.exponent_index, merged.var_names)
                 self.monomials.pop(i)
+        self.monomials = [m for m in self.monomials if not m.coefficient.maybe_is_zero()]
+        if len(self.monomials) == 0:
+            self.monomials.append(Monomial(monomials[0].ring.zero, [0] * monomials[0].no_variables))
         self.value_dict = {tuple(m.exponent_index): m.coefficient for m in self.monomials}
         self.ring = self.monomials[0].ring
 
@@ -326,17 +366,7 @@ class Polynomial:
         other = other if not isinstance(other, Monomial) else Polynomial.from_monomial(other)
         if self.monomials[0].ring != other.monomials[0].ring:
             raise ValueError('Polynomials must be in the same coefficient ring')
-        monomials = self.monomials
-        for m in other.monomials:
-            duplicate = False
-            for i, included in enumerate(monomials):
-                if np.array_equal(m.exponent_index, included.exponent_index):
-                    monomials[i] = Monomial(included.coefficient + m.coefficient, m.exponent_index, m.var_names)
-                    duplicate = True
-                    break
-            if not duplicate:
-                monomials.append(m)
-        return Polynomial(*monomials, order=self.order)
+        return Polynomial(*(self.monomials + other.monomials), order=self.order)
 
     @staticmethod
     def from_monomial(monomial, order=grlex):
@@ -360,12 +390,16 @@ class Polynomial:
         return self * -self.ring.one
 
     def __eq__(self, other):
-        return self.degree == other.degree == -1 or all([m1 == m2 for m1, m2 in zip(self.monomials, other.monomials)])
+        if self.degree == other.degree == -1:
+            return True
+        return len(self.monomials) == len(other.monomials) and all([m1 == m2 for m1, m2 in zip(self.monomials, other.monomials)])
 
     def __sub__(self, other):
         return self + (-other)
 
     def __truediv__(self, other):
+        if self.degree == -1:
+            return self
         if isinstance(other, Monomial):
             return Polynomial(*[m/other for m in self.monomials], order=self.order)
         if isinstance(other, Polynomial) and len(other.monomials) == 1:
@@ -377,6 +411,16 @@ class Polynomial:
             raise ValueError('Wrong number of arguments')
         return sum([m(*args) for m in self.monomials])
 
+    @property
+    def terms(self):
+        return {tuple(int(e) for e in m.exponent_index): m.coefficient for m in self.monomials if m.degree >= 0}
+
+    @staticmethod
+    def from_terms(terms, no_variables, coef_ring, var_names=None, order=grlex):
+        if not terms:
+            return Polynomial.create_zero(no_variables, coef_ring, order)
+        return Polynomial(*[Monomial(c, list(e), var_names) for e, c in terms.items()], order=order)
+
     @staticmethod
     def create_one(no_variables, coef_ring, order=grlex):
         return Polynomial(Monomial.create_one(no_variables, coef_ring), order=order)
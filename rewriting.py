@@ -0,0 +1,179 @@
+"""
+    Knuth-Bendix completion of group presentations and reduction of words by an Aho-Corasick automaton.
+
+    Words use the letters of `cosets`: 2*i is the generator x_i and 2*i + 1 its inverse. Words are ordered shortlex
+    (shorter first, then lexicographically by letters), so the normal form of an element is its shortlex least word.
+"""
+import heapq
+import itertools
+
+import cosets
+
+
+def shortlex(word):
+    return len(word), tuple(word)
+
+
+class RewritingSystem:
+    """
+        Confluent rewriting system {lhs: rhs} with lhs > rhs, no left-hand side containing another one. Words are
+        reduced in one left to right pass of the Aho-Corasick automaton of the left-hand sides: letters are pushed
+        on a stack together with the automaton states, a completed left-hand side is popped and its right-hand side
+        is fed back in front of the remaining input.
+    """
+    def __init__(self, rules, no_letters):
+        self.rules = rules
+        self.no_letters = no_letters
+        self._build_automaton()
+
+    def _build_automaton(self):
+        goto, output = [[-1] * self.no_letters], [None]
+        for lhs, rhs in self.rules.items():
+            s = 0
+            for a in lhs:
+                if goto[s][a] < 0:
+                    goto[s][a] = len(goto)
+                    goto.append([-1] * self.no_letters)
+                    output.append(None)
+                s = goto[s][a]
+            output[s] = (len(lhs), rhs)
+        fail = [0] * len(goto)
+        queue = []
+        for a in range(self.no_letters):
+            if goto[0][a] < 0:
+                goto[0][a] = 0
+            else:
+                queue.append(goto[0][a])
+        for s in queue:
+            for a in range(self.no_letters):
+                t = goto[s][a]
+                if t < 0:
+                    goto[s][a] = goto[fail[s]][a]
+                else:
+                    fail[t] = goto[fail[s]][a]
+                    queue.append(t)
+        self.goto, self.output = goto, output
+
+    def reduce(self, word):
+        goto, output = self.goto, self.output
+        letters, states = [], [0]
+        pending = list(reversed(word))
+        while pending:
+            a = pending.pop()
+            s = goto[states[-1]][a]
+            rule = output[s]
+            if rule is None:
+                letters.append(a)
+                states.append(s)
+                continue
+            length, rhs = rule
+            if length > 1:
+                del letters[1 - length:]
+                del states[1 - length:]
+            pending.extend(reversed(rhs))
+        return letters
+
+    def __len__(self):
+        return len(self.rules)
+
+
+class _Completion:
+    """
+        Rules under construction. Left-hand sides are indexed by their proper prefixes (for overlaps) and in a trie
+        of reversed words, so that a left-hand side ending at the top of the reduction stack is found by walking
+        back from the last letter.
+    """
+    def __init__(self, max_rules):
+        self.rules = {}
+        self.prefixes = {}
+        self.suffixes = {}
+        self.max_rules = max_rules
+
+    def reduce(self, word):
+        rules, root = self.rules, self.suffixes
+        letters, pending = [], list(reversed(word))
+        while pending:
+            letters.append(pending.pop())
+            node, k = root, len(letters)
+            while k and node:
+                k -= 1
+                node = node.get(letters[k])
+                if node is not None and None in node:
+                    lhs = node[None]
+                    del letters[k:]
+                    pending.extend(reversed(rules[lhs]))
+                    break
+        return tuple(letters)
+
+    def add(self, lhs, rhs):
+        if len(self.rules) >= self.max_rules:
+            raise RuntimeError(f"Knuth-Bendix completion exceeded {self.max_rules} rules.")
+        self.rules[lhs] = rhs
+        node = self.suffixes
+        for a in reversed(lhs):
+            node = node.setdefault(a, {})
+        node[None] = lhs
+        for k in range(1, len(lhs)):
+            self.prefixes.setdefault(lhs[:k], set()).add(lhs)
+
+    def remove(self, lhs):
+        rhs = self.rules.pop(lhs)
+        node = self.suffixes
+        for a in reversed(lhs):
+            node = node[a]
+        del node[None]
+        for k in range(1, len(lhs)):
+            self.prefixes[lhs[:k]].discard(lhs)
+        return rhs
+
+    def critical_pairs(self, lhs):
+        """ Both reductions of every overlap of lhs with a left-hand side (in either order). """
+        rules = self.rules
+        for k in range(1, len(lhs)):
+            for other in list(self.prefixes.get(lhs[k:], ())):
+                # lhs = u v, other = v w
+                yield rules[lhs] + other[len(lhs) - k:], lhs[:k] + rules[other]
+        for other in list(rules):
+            for k in range(1, len(other)):
+                if other[k:] == lhs[:len(other) - k] and len(other) - k < len(lhs):
+                    yield rules[other] + lhs[len(other) - k:], other[:k] + rules[lhs]
+
+
+def complete(no_generators, relators, max_rules=10**5):
+    """
+        Shortlex confluent rewriting system of <x_0, ..., x_{n-1} | relators> by Knuth-Bendix completion; the
+        relators are words of letters. Each relator w = uv becomes the equation u = v^-1 with halves of equal
+        length, free cancellation of x x^-1 is part of the system. Equations are oriented shortest first, which
+        keeps the intermediate rules short. The critical pairs of every rule with all rules present are formed when
+        it is added, and a rule whose left-hand side becomes reducible returns as an equation, so the final system
+        is confluent. Terminates for finite groups.
+    """
+    system = _Completion(max_rules)
+    equations, counter = [], itertools.count()
+
+    def push(u, v):
+        heapq.heappush(equations, (max(len(u), len(v)), next(counter), u, v))
+
+    for a in range(2 * no_generators):
+        push((a, a ^ 1), ())
+    for r in relators:
+        half = (len(r) + 1) // 2
+        push(tuple(r[:half]), tuple(cosets.inverse(r[half:])))
+    while equations:
+        _, _, u, v = heapq.heappop(equations)
+        u, v = system.reduce(u), system.reduce(v)
+        if u == v:
+            continue
+        if shortlex(u) < shortlex(v):
+            u, v = v, u
+        for lhs in [lhs for lhs in system.rules if _contains(lhs, u)]:
+            push(lhs, system.remove(lhs))
+        system.add(u, v)
+        for pair in system.critical_pairs(u):
+            push(*pair)
+    return RewritingSystem({lhs: system.reduce(rhs) for lhs, rhs in system.rules.items()}, 2 * no_generators)
+
+
+def _contains(word, part):
+    n = len(part)
+    return any(word[i:i + n] == part for i in range(len(word) - n + 1))
@@ -1,6 +1,11 @@
+import collections
+
+import finite_fields
 from arrows import *
 from graded import *
 
+SheafCacheInfo = collections.namedtuple('SheafCacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
 
 class OpenOfAffine(OpenSet):
     def __init__(self, distinguished_union):
@@ -19,20 +24,221 @@ class OpenOfAffine(OpenSet):
 
 
 class DistinguishedOpen(OpenSet):
-    def __init__(self, element):
+    """ D(f), the complement of V(f). `factors` (by default [f]) multiply to f; intersections concatenate them. """
+    def __init__(self, element, factors=None):
         super().__init__(element)
         self.ring = element.ring
+        self.factors = factors if factors is not None else [element]
 
     def union(self, other):
         OpenOfAffine([self, other])
 
     def intersection(self, other):
-        return DistinguishedOpen(self.id*other.id)
+        return DistinguishedOpen(self.id*other.id, self.factors + other.factors)
 
     def to_open_of_affine(self):
         return OpenOfAffine([self.id])
 
 
+class _Localisation:
+    """
+        A_m = K[x, t_1, ..., t_r]/J for a monic normal form m (terms `monic`). `inverse` are the terms of 1/m,
+        `cofactors[k]` those of m*t_k, a polynomial in x alone, and `factors` the keys of the opens whose
+        localisations were chained to build it.
+    """
+    def __init__(self, algebra, monic, inverse, cofactors, factors):
+        self.algebra = algebra
+        self.ring = algebra.ideal.ring
+        self.monic = monic
+        self.inverse = inverse
+        self.cofactors = cofactors
+        self.factors = factors
+
+
+class RestrictionMorphism(AlgebraMorphism):
+    """ Map of localisations substituting `images` (terms of the polynomial ring of the codomain) for the variables of the domain. """
+    def __init__(self, domain, codomain, images):
+        Morphism.__init__(self, domain, codomain)
+        self.images = images
+
+    def __call__(self, element):
+        ring = StructureSheaf.polynomial_ring(self.codomain)
+        engine, one = ring.groebner_engine, {(0,) * ring.no_generators: ring.base_ring.one}
+        powers = [[one, image] for image in self.images]
+        result = {}
+        for exponent, c in StructureSheaf.polynomial_terms(self.domain, element).items():
+            term = engine.scale(one, c)
+            for k, e in enumerate(exponent):
+                while len(powers[k]) <= e:
+                    powers[k].append(engine.mul(powers[k][-1], self.images[k]))
+                term = engine.mul(term, powers[k][e])
+            result = engine.add(result, term)
+        return self.codomain(ring.from_terms(result))
+
+
+class StructureSheaf:
+    """
+        Sections O(D(f)) = A_f of Spec(A) for A = K[x]/I (or K[x]) and their restriction maps, cached by the
+        distinguished open: the key of D(f) is the monic normal form m of f, so scalar multiples and all
+        representatives of f share one localisation A_m = K[x, t]/(I + (t*m - 1)), whose Groebner basis is computed
+        once and pinned to it. When a cached D(m') refines to the requested open, D(m'*g), its Groebner basis is
+        reused and only s*g - 1 is added. The `maxsize` least recently used localisations are kept together with
+        the restrictions between them.
+    """
+    def __init__(self, algebra, maxsize=128):
+        self.algebra = algebra
+        self.ring = self.polynomial_ring(algebra)
+        self.maxsize = maxsize
+        self._sections = collections.OrderedDict()
+        self._restrictions = {}
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def polynomial_ring(algebra):
+        return algebra if isinstance(algebra, KPolynomialAlgebra) else algebra.ideal.ring
+
+    @staticmethod
+    def polynomial_terms(algebra, element):
+        """ Normal form of an element of the algebra (or of its polynomial ring) as a dict of terms. """
+        if isinstance(algebra, KPolynomialAlgebra):
+            return element.value.terms
+        return algebra.to_polynomial(element if element.ring is algebra else algebra(element)).value.terms
+
+    def _normal_form(self, terms):
+        return self.polynomial_terms(self.algebra, self.ring.from_terms(terms))
+
+    def key(self, terms):
+        """ (key, leading coefficient, monic terms) of a nonzero normal form. """
+        engine = self.ring.groebner_engine
+        monic = engine.monic(terms)
+        return tuple(sorted((e, c.value) for e, c in monic.items())), terms[engine.leading_term(terms)], monic
+
+    def cache_info(self):
+        return SheafCacheInfo(self.hits, self.misses, self.maxsize, len(self._sections))
+
+    #  ------ sections ------
+    def sections(self, element, factors=None):
+        """ A_f for f = `element`; `factors` with product f let a cached localisation at some of them be refined. """
+        if not self.polynomial_terms(self.algebra, element):
+            return AlgebraFG('0', self.ring.base_ring, [])
+        entry = self._entry(element, factors)
+        return self.algebra if entry is None else entry.algebra
+
+    def _entry(self, element, factors=None):
+        terms = self.polynomial_terms(self.algebra, element)
+        if not terms:
+            raise ValueError("D(0) is empty, its ring of sections is the zero ring.")
+        if len(terms) == 1 and not any(next(iter(terms))):
+            return None
+        key, _, monic = self.key(terms)
+        if key in self._sections:
+            self.hits += 1
+            self._sections.move_to_end(key)
+            return self._sections[key]
+        self.misses += 1
+        factors = [self.polynomial_terms(self.algebra, f) for f in (factors or [element])]
+        factors = [(self.key(f)[0], f) for f in factors if f]
+        entry = self._refine(key, factors)
+        if entry is None:
+            entry = self._localise(None, monic)
+            entry.factors = tuple(sorted(k for k, _ in factors))
+        self._sections[key] = entry
+        if len(self._sections) > self.maxsize:
+            evicted, _ = self._sections.popitem(last=False)
+            for pair in [pair for pair in self._restrictions if evicted in pair]:
+                del self._restrictions[pair]
+        return entry
+
+    def _refine(self, key, factors):
+        """ Localisation at the product of `factors` from the cached one at most of them, None if there is none. """
+        best = None
+        for entry in self._sections.values():
+            remaining = collections.Counter(k for k, _ in factors)
+            remaining.subtract(entry.factors)
+            if min(remaining.values()) >= 0 and (best is None or len(entry.factors) > len(best.factors)):
+                best = entry
+        if best is None:
+            return None
+        remaining = collections.Counter(best.factors)
+        g = {(0,) * self.ring.no_generators: self.ring.base_ring.one}
+        for k, f in factors:
+            if remaining[k] > 0:
+                remaining[k] -= 1
+            else:
+                g = self._normal_form(self.ring.groebner_engine.mul(g, f))
+        entry = self._localise(best, g)
+        if entry.monic is None or self.key(entry.monic)[0] != key:
+            return None
+        entry.factors = tuple(sorted(k for k, _ in factors))
+        return entry
+
+    def _relations(self):
+        return [] if self.algebra is self.ring else self.algebra.groebner_basis
+
+    def _localise(self, parent, g):
+        """
+            Adjoins s = 1/g to the localisation `parent` at m (to A, m = 1, when it is None); the Groebner basis of
+            the parent is a block of the new one. The result is the localisation at m' = m*g/c, c the leading
+            coefficient of the normal form of m*g, with 1/m' = c/m * s and m'*t_k = g*(m*t_k)/c, m'*s = m/c.
+        """
+        engine, K = self.ring.groebner_engine, self.ring.base_ring
+        one = {(0,) * self.ring.no_generators: K.one}
+        m, ring = (one, self.ring) if parent is None else (parent.monic, parent.ring)
+        names = list(ring.generators)
+        name = next(v for v in ['t'] + [f't_{k}' for k in range(1, len(names) + 2)] if v not in names)
+        new_ring = KPolynomialAlgebra(K, len(names) + 1, names + [name], order=ring.order)
+        new_engine = new_ring.groebner_engine
+
+        def embed(terms, s=0):
+            return {e + (0,) * (len(names) - len(e)) + (s,): c for e, c in terms.items()}
+
+        basis = [embed(b) for b in (self._relations() if parent is None else parent.algebra.groebner_basis)]
+        relation = new_engine.add(embed(g, 1), {(0,) * (len(names) + 1): -K.one})
+        G = new_engine.reduced_basis([relation], bases=[basis] if basis else [])
+        G = [new_ring.from_terms(h) for h in G]
+        base_name = self.algebra.name if parent is None else parent.algebra.name
+        algebra = KPolynomialIdeal(G, groebner=G).quotient_algebra(name=f'{base_name}[1/({self.ring.from_terms(g)})]')
+        mg = self._normal_form(engine.mul(m, g))
+        if not mg:
+            return _Localisation(algebra, None, {}, [], ())
+        _, c, monic = self.key(mg)
+        inverse = new_engine.scale(embed(one if parent is None else parent.inverse, 1), c)
+        cofactors = [] if parent is None else [self._normal_form(engine.scale(engine.mul(g, k), K.one / c)) for k in parent.cofactors]
+        cofactors.append(engine.scale(m, K.one / c))
+        return _Localisation(algebra, monic, inverse, cofactors, ())
+
+    #  ------ restrictions ------
+    def restriction(self, element, cofactor, factors=None, cofactor_factors=None):
+        """
+            Restriction O(D(f)) -> O(D(f*g)) for f = `element` and g = `cofactor`: x -> x and, as 1/m = g/(m*g) for
+            the monic form m of f, every t_k = (m*t_k)/m of A_m maps to (m*t_k)*g*c'/m'' in A_{m*g}, where
+            m*g = c'*m'' with m'' monic.
+        """
+        source = self._entry(element, factors)
+        target = self._entry(element * cofactor, (factors or [element]) + (cofactor_factors or [cofactor]))
+        domain = self.algebra if source is None else source.algebra
+        codomain = self.algebra if target is None else target.algebra
+        pair = (None if source is None else self.key(source.monic)[0], None if target is None else self.key(target.monic)[0])
+        if pair in self._restrictions:
+            return self._restrictions[pair]
+        ring = self.polynomial_ring(codomain)
+        engine, K = ring.groebner_engine, self.ring.base_ring
+
+        def embed(terms):
+            return {e + (0,) * (ring.no_generators - len(e)): c for e, c in terms.items()}
+
+        n = self.ring.no_generators
+        images = [{tuple(int(i == j) for j in range(ring.no_generators)): K.one} for i in range(n)]
+        if source is not None:
+            g = self.polynomial_terms(self.algebra, cofactor)
+            _, c, _ = self.key(self._normal_form(self.ring.groebner_engine.mul(source.monic, g)))
+            inverse = target.inverse if target is not None else {(0,) * n: K.one}
+            inverse_m = engine.scale(engine.mul(embed(g), inverse), K.one / c)
+            images += [engine.mul(embed(k), inverse_m) for k in source.cofactors]
+        self._restrictions[pair] = morphism = RestrictionMorphism(domain, codomain, images)
+        return morphism
+
+
 class AffineScheme(Scheme):
     def __init__(self, algebra, name=None, **properties):
         if name is None:
@@ -63,24 +269,34 @@ class AffineScheme(Scheme):
             raise ValueError("affine cover of Spec(R) has only one element with id 0.")
         return AlgebraMorphism.identity(self.algebra)
 
+    @functools.cached_property
+    def structure_sheaf(self):
+        return StructureSheaf(self.algebra)
+
+    @staticmethod
+    def _distinguished(open_set):
+        if isinstance(open_set, DistinguishedOpen):
+            return open_set
+        if open_set.is_distinguished:
+            return DistinguishedOpen(open_set.distinguished_list[0])
+        raise ValueError("Only sections of distinguished open sets are implemented")
+
     def sections_general(self, open_set):
-        if not isinstance(open_set, DistinguishedOpen):
-            if open_set.is_distinguished:
-                return self.sections_general(DistinguishedOpen(open_set.distinguished_list[0]))
-            raise ValueError("Only sections of distinguished open sets are implemented")
-        return self.algebra.localisation(open_set.id)
+        """ Localisation O(D(f)) = A_f, cached in the structure sheaf for algebras over fields. """
+        open_set = self._distinguished(open_set)
+        if not isinstance(self.algebra, QuotientKAlgebra):
+            return self.algebra.localisation_at_element(open_set.id)
+        return self.structure_sheaf.sections(open_set.id, open_set.factors)
 
     def transition_general(self, open1, open2):
-        if not isinstance(open1, DistinguishedOpen):
-            if open1.is_distinguished:
-                return self.transition_general(DistinguishedOpen(open1.distinguished_list[0]), open2)
-        if not isinstance(open2, DistinguishedOpen):
-            if open2.is_distinguished:
-                return self.transition_general(open1, DistinguishedOpen(open2.distinguished_list[0]))
-        return AlgebraMorphism.identity(self(open1*open2))
+        return AlgebraMorphism.identity(self.sections_general(self._distinguished(open1)*self._distinguished(open2)))
 
     def restriction_general(self, open1, open2):
-        return self(open1).localisation_morphism_at_element((open1*open2).id)
+        """ Restriction O(D(f)) -> O(D(f) n D(g)) = O(D(f*g)). """
+        open1, open2 = self._distinguished(open1), self._distinguished(open2)
+        if not isinstance(self.algebra, QuotientKAlgebra):
+            return self.algebra.localisation_morphism_at_element((open1*open2).id)
+        return self.structure_sheaf.restriction(open1.id, open2.id, open1.factors, open2.factors)
 
     def transition(self, open_set1, open_set2):
         return AlgebraMorphism.identity(self.algebra)
@@ -88,6 +304,35 @@ class AffineScheme(Scheme):
     def global_sections(self):
         return self.algebra
 
+    def solve(self, refine=True, steps=5, tol=1e-6, seed=None):
+        """ Complex points of a zero-dimensional affine scheme, see QuotientKAlgebra.solve. """
+        if not isinstance(self.algebra, QuotientKAlgebra) or isinstance(self.algebra, KPolynomialAlgebra):
+            raise ValueError("Only zero-dimensional affine schemes have finitely many points.")
+        return self.algebra.solve(refine, steps, tol, seed)
+
+    def homotopy_solve(self, processes=None, seed=None, tol=1e-6, **options):
+        """ Complex points of a scheme cut out by a square system, see KPolynomialIdeal.homotopy_solve. """
+        if not isinstance(self.algebra, QuotientKAlgebra) or isinstance(self.algebra, KPolynomialAlgebra):
+            raise ValueError("Only schemes given by a square system of equations are solved by homotopy continuation.")
+        return self.algebra.ideal.homotopy_solve(processes, seed, tol, **options)
+
+    def equations(self):
+        """ Polynomials defining the scheme in the polynomial ring of its algebra. """
+        if isinstance(self.algebra, PolynomialAlgebra):
+            return []
+        return [g for g in self.algebra.ideal.generators]
+
+    def count_points(self, p, r=1, method=None, chunk_size=2**16, processes=None):
+        """
+            Number of F_q-points, q = p^r, see finite_fields.count_points. By default zero-dimensional schemes are
+            enumerated along a lex Groebner basis and all others on the grid F_q^n.
+        """
+        if method is None:
+            zero_dimensional = isinstance(self.algebra, QuotientKAlgebra) and self.algebra.is_finite_dimensional
+            method = 'triangular' if zero_dimensional else 'grid'
+        polynomials = finite_fields.residues(self.equations(), p)
+        return finite_fields.count_points(polynomials, self.algebra.no_generators, p, r, method, chunk_size, processes)
+
 
 class Spec(ContravariantFunctor):
     def __init__(self, base_ring):
@@ -103,7 +348,7 @@ class Spec(ContravariantFunctor):
 
 class AffineSpace(AffineScheme):
     def __init__(self, ring, n):
-        algebra = PolynomialAlgebra(ring, n)
+        algebra = KPolynomialAlgebra(ring, n) if ring.properties['field'] else PolynomialAlgebra(ring, n)
         super().__init__(algebra, name='A^' + str(n))
 
 
@@ -127,28 +372,163 @@ class ProjectiveSpace(Scheme):
                          proper=True,
                          **properties)
         self.algebra = algebra
+        self._transitions = {}
+
+    @functools.cached_property
+    def coordinate_ring(self):
+        """ Homogeneous coordinate ring K[x_0, ..., x_n]. """
+        names = [f'x_{j}' for j in range(self.n + 1)]
+        if self.algebra.properties['field']:
+            return KPolynomialAlgebra(self.algebra, self.n + 1, names)
+        return PolynomialAlgebra(self.algebra, self.n + 1, names)
+
+    @functools.cached_property
+    def chart_rings(self):
+        """ Polynomial rings of the standard affine charts U_i = D(x_i), with the variables x_j/x_i, j != i. """
+        rings = []
+        for i in range(self.n + 1):
+            names = [f'x_{j}/x_{i}' for j in range(self.n + 1) if j != i]
+            if self.algebra.properties['field']:
+                rings.append(KPolynomialAlgebra(self.algebra, self.n, names))
+            else:
+                rings.append(PolynomialAlgebra(self.algebra, self.n, names))
+        return rings
+
+    @functools.cached_property
+    def charts(self):
+        """ Coordinate rings of the charts U_i. """
+        return self.chart_rings
+
+    @functools.cached_property
+    def affine_charts(self):
+        return [AffineScheme(chart, name=f'U_{i}') for i, chart in enumerate(self.charts)]
 
     def __call__(self, i):
-        return PolynomialAlgebra(self.algebra, self.n, [f'x_{j}/x_{i}' for j in range(self.n) if j != i])
+        return self.charts[i]
 
     def sections_general(self, open_set):
         raise NotImplementedError("general sections of projective schemes are not implemented")
 
-    #  ------ TODO -------
-    def transition(self, i, j):
-        pass
+    @staticmethod
+    def _chart_index(i, j):
+        """ Position of the variable x_j/x_i in chart i. """
+        return j if j < i else j - 1
 
-    def transition_general(self, open1, open2):
-        pass
+    def _unit(self, i, j):
+        """ x_j/x_i as an element of chart i. """
+        return self.charts[i].generator_elements[self._chart_index(i, j)]
+
+    def intersection(self, i, j):
+        """ O(U_i n U_j) in the coordinates of chart i: the localisation of chart i at x_j/x_i. """
+        if i == j:
+            return self.charts[i]
+        if not self.algebra.properties['field']:
+            return self.charts[i].localisation_at_element(self._unit(i, j))
+        return self.affine_charts[i].structure_sheaf.sections(self._unit(i, j))
 
     def restriction(self, i, ij):
-        pass
+        """ Restriction O(U_i) -> O(U_i n U_j) for j = `ij`, cached in the structure sheaf of chart i. """
+        if i == ij:
+            return AlgebraMorphism.identity(self.charts[i])
+        if not self.algebra.properties['field']:
+            return self.charts[i].localisation_morphism_at_element(self._unit(i, ij))
+        return self.affine_charts[i].structure_sheaf.restriction(self.charts[i].one, self._unit(i, ij))
+
+    def transition(self, i, j):
+        """
+            Isomorphism O(U_i n U_j) -> O(U_j n U_i) from the coordinates of chart i to those of chart j, built once.
+            The last variable t of either localisation is the inverse of the unit, so chart j has t = x_j/x_i and
+            the substitution is x_k/x_i -> (x_k/x_j)*t, x_j/x_i -> t and t = x_i/x_j -> x_i/x_j.
+        """
+        if i == j:
+            return AlgebraMorphism.identity(self.charts[i])
+        if (i, j) in self._transitions:
+            return self._transitions[(i, j)]
+        if not self.algebra.properties['field']:
+            raise NotImplementedError("transition maps are only implemented over fields")
+        domain, codomain = self.intersection(i, j), self.intersection(j, i)
+        K = self.algebra
+
+        def monomial(k, t):
+            return {tuple(int(m == k) for m in range(self.n)) + (t,): K.one}
+
+        images = [monomial(None, 1) if k == j else monomial(self._chart_index(j, k), 1) for k in range(self.n + 1) if k != i]
+        images.append(monomial(self._chart_index(j, i), 0))
+        self._transitions[(i, j)] = morphism = RestrictionMorphism(domain, codomain, images)
+        return morphism
+
+    def transition_general(self, open1, open2):
+        raise NotImplementedError("general transition maps of projective schemes are not implemented")
 
     def restriction_general(self, open1, open2):
-        pass
+        raise NotImplementedError("general restriction maps of projective schemes are not implemented")
 
     def global_sections(self):
-        pass
+        return self.algebra
+
+    def equations(self):
+        """ Homogeneous polynomials defining the scheme in the coordinate ring. """
+        return []
+
+    def count_points(self, p, r=1, method='grid', chunk_size=2**16, processes=None):
+        """ Number of F_q-points, q = p^r, see finite_fields.count_projective_points. """
+        polynomials = finite_fields.residues(self.equations(), p)
+        return finite_fields.count_projective_points(polynomials, self.n + 1, p, r, method, chunk_size, processes)
+
+    #  ------ homogenisation ------
+    def dehomogenize(self, polynomials, i):
+        """ Images in chart i of polynomials of the coordinate ring (x_i -> 1), the exponents of all of them at once. """
+        terms = [f.value.terms for f in polynomials]
+        exponents, coefficients, owners = self._stack_terms(terms, self.n + 1)
+        exponents = np.delete(exponents, i, axis=1)
+        return self._unstack_terms(self.chart_rings[i], exponents, coefficients, owners, len(terms))
+
+    def homogenize(self, polynomials, i):
+        """ Homogeneous polynomials of the coordinate ring restricting to the given elements of chart i, of the least degree. """
+        terms = [StructureSheaf.polynomial_terms(self.charts[i], f) for f in polynomials]
+        exponents, coefficients, owners = self._stack_terms(terms, self.n)
+        degrees = exponents.sum(axis=1)
+        top = np.zeros(len(terms), dtype=np.int64)
+        np.maximum.at(top, owners, degrees)
+        exponents = np.insert(exponents, i, top[owners] - degrees, axis=1)
+        return self._unstack_terms(self.coordinate_ring, exponents, coefficients, owners, len(terms))
+
+    @staticmethod
+    def _stack_terms(terms, no_variables):
+        exponents = np.array([e for t in terms for e in t], dtype=np.int64).reshape(-1, no_variables)
+        coefficients = [c for t in terms for c in t.values()]
+        owners = np.repeat(np.arange(len(terms)), [len(t) for t in terms])
+        return exponents, coefficients, owners
+
+    @staticmethod
+    def _unstack_terms(ring, exponents, coefficients, owners, count):
+        results = [{} for _ in range(count)]
+        K = ring.base_ring
+        for e, c, k in zip(map(tuple, exponents.tolist()), coefficients, owners.tolist()):
+            results[k][e] = K.add(results[k][e], c) if e in results[k] else c
+        return [ring.from_terms({e: c for e, c in t.items() if not K.eq(c, K.zero)}) for t in results]
+
+
+class ProjectiveScheme(ProjectiveSpace):
+    """ Closed subscheme V(I) of P^n for a homogeneous ideal I of K[x_0, ..., x_n]; chart i is the quotient of the chart of P^n by the dehomogenised ideal. """
+    def __init__(self, ideal, name=None, **properties):
+        ring = ideal.ring
+        super().__init__(ring.base_ring, ring.no_generators - 1)
+        if name is None:
+            name = 'V(' + ', '.join(str(g) for g in ideal.generators) + ')'
+        self.name = name
+        self.properties = SchemeProperties(projective=True, separated=True, quasi_projective=True, proper=True,
+                                           noetherian=ring.properties['noetherian'], **properties)
+        self.ideal = ideal
+        self.coordinate_ring = ring
+
+    @functools.cached_property
+    def charts(self):
+        return [KPolynomialIdeal(self.dehomogenize(self.ideal.generators, i)).quotient_algebra(name=f'U_{i}')
+                for i in range(self.n + 1)]
+
+    def equations(self):
+        return list(self.ideal.generators)
 
 
 
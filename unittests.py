@@ -1,5 +1,13 @@
 import unittest
 from graded import *
+from schemes import *
+from arrows import *
+from groups import *
+import interpolation
+import finite_fields
+import numeric
+import cosets
+import rewriting
 
 
 class TestAll(unittest.TestCase):
@@ -39,6 +47,546 @@ class TestAll(unittest.TestCase):
     def test_modules(self):
         pass
 
+    def test_matrix_elimination(self):
+        Z, Q = ZRing(), QField()
+        for ring in [Z, Q, RFloating(), FpField(101)]:
+            A = Matrix([[ring(1), ring(2), ring(3)], [ring(2), ring(4), ring(6)], [ring(1), ring(0), ring(1)]])
+            self.assertEqual(A.det(), ring.zero)
+            self.assertEqual(A.rank(), 2)
+            kernel = A.nullspace()
+            self.assertEqual(len(kernel), 1)
+            v = [row[0] for row in kernel[0].coefficients]
+            for row in A.coefficients:
+                self.assertEqual(row[0]*v[0] + row[1]*v[1] + row[2]*v[2], ring.zero)
+        B = Matrix([[Z(2), Z(-1), Z(0)], [Z(-1), Z(2), Z(-1)], [Z(0), Z(-1), Z(2)]])
+        self.assertEqual(B.det(), Z(4))
+        M, = Matrix.fill_free_coefficients(Q, 3)
+        self.assertEqual(M.det(), M._laplace_det())
+
+    def test_matrix_numpy_backend(self):
+        Z, Q, F = ZRing(), QField(), FpField(101)
+        values = [[3, -1, 4, 1], [5, 9, -2, 6], [5, 3, 5, -8], [9, 7, 9, 3]]
+        A = Matrix([[Z(v) for v in row] for row in values])
+        AQ = Matrix([[Q(v) for v in row] for row in values])
+        AF = Matrix([[F(v) for v in row] for row in values])
+        self.assertEqual(A.array.dtype, np.int64)
+        self.assertIsNone(AQ.array)
+        self.assertEqual(A.det().value, AQ.det().value[0])
+        self.assertEqual(AF.det(), F(A.det().value))
+        self.assertEqual((A**3).trace().value, (AQ**3).trace().value[0])
+        self.assertEqual((A**40).coefficients[1][2].value, (AQ**40).coefficients[1][2].value[0])
+        self.assertEqual((A**40).array.dtype, object)
+        self.assertEqual(A @ A.identity_matrix(4), A)
+        self.assertEqual((AF**100).coefficients[0][0], F((A**100).coefficients[0][0].value))
+        R = RFloating()
+        AR = Matrix([[R(v) for v in row] for row in values])
+        self.assertEqual(AR.det(), R(A.det().value))
+        self.assertEqual(AR - AR.transpose().transpose(), AR.zero_matrix(4, 4))
+
+    def test_sparse_matrices(self):
+        for ring in [ZRing(), QField(), FpField(5), RFloating()]:
+            values = [[1, 2, 3, 0], [2, 4, 6, 0], [1, 0, 1, 0]]
+            D = Matrix([[ring(v) for v in row] for row in values])
+            A = D.to_sparse()
+            self.assertEqual(A.nnz, 8)
+            self.assertEqual(A.rank(), 2)
+            kernel = A.nullspace()
+            self.assertEqual(len(kernel), 2)
+            self.assertTrue(all(A @ v == {} for v in kernel))
+            self.assertEqual(A.transpose().to_matrix(), D.transpose())
+            self.assertEqual((A.transpose() @ A).to_matrix(), D.transpose() @ D)
+            B = A.transpose() @ A + SparseMatrix.from_entries({(i, i): ring.one for i in range(4)}, 4, 4, ring)
+            self.assertEqual(B.det(), B.to_matrix().det())
+
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        M, columns = KPolynomialIdeal([x**2 - y, x*y - Q.one]).macaulay_matrix(3)
+        self.assertEqual((M.no_rows, M.no_columns, M.rank()), (6, 10, 6))
+        self.assertEqual(columns[0], (3, 0))
+
+        F = FreeFGModule(Q, 2)
+        f = ModuleMorphism(F, F, lambda g: F([Q.one, Q.one]) if g == 'v_0' else F([Q.zero, Q(2)]))
+        self.assertEqual(f.matrix(sparse=True), Matrix([[Q.one, Q.zero], [Q.one, Q(2)]]))
+
+    def test_normal_forms_over_z(self):
+        Z = ZRing()
+        A = Matrix([[Z(2), Z(4), Z(4)], [Z(-6), Z(6), Z(12)], [Z(10), Z(-4), Z(-16)]])
+        self.assertEqual([d.value for d in A.invariant_factors()], [2, 6, 12])
+        S, U, V = A.smith_form(transform=True)
+        self.assertEqual(U @ A @ V, S)
+        self.assertEqual(S, A.smith_form())
+        self.assertEqual(abs(U.det().value), 1)
+        H, U = A.hermite_form(transform=True)
+        self.assertEqual(U @ A, H)
+        self.assertEqual(H, A.hermite_form())
+        self.assertEqual(H, Matrix([[Z(2), Z(4), Z(4)], [Z(0), Z(6), Z(0)], [Z(0), Z(0), Z(12)]]))
+
+        B = Matrix([[Z(1), Z(2), Z(3)], [Z(2), Z(4), Z(6)]])
+        self.assertEqual([d.value for d in B.invariant_factors()], [1, 0])
+        H, U = B.hermite_form(transform=True)
+        self.assertEqual(U @ B, H)
+        self.assertEqual(H, Matrix([[Z(1), Z(2), Z(3)], [Z(0), Z(0), Z(0)]]))
+
+        random.seed(0)
+        C = Matrix([[Z(random.randint(-10, 10)) for _ in range(50)] for _ in range(50)])
+        d = C.invariant_factors()
+        self.assertEqual(functools.reduce(lambda x, y: x * y, [x.value for x in d]), abs(C.det().value))
+        self.assertTrue(all(d[i + 1].value % d[i].value == 0 for i in range(49)))
+
+        M = FreeFGModule(Z, 3).quotient([[Z(2), Z(4), Z(4)], [Z(-6), Z(6), Z(12)]])
+        self.assertEqual(M.structure(), 'Z/2 + Z/6 + Z')
+        self.assertEqual(M.rank, 1)
+        G = FreeAbelianGroup(['a', 'b', 'c'])
+        self.assertEqual(G.structure([[('a', 2)], ['b', 'b', 'c']]), 'Z/2 x Z')
+        self.assertEqual(G.invariant_factors([[4, 0, 0], [0, 6, 0]]), [2, 12, 0])
+
+    def test_coset_enumeration(self):
+        S3 = FiniteGroup(['a', 'b'], [[('a', 2)], [('b', 3)], ['a', 'b', 'a', 'b']])
+        a, b = S3.generator_elements()
+        self.assertEqual(S3.order, 6)
+        self.assertTrue(a * b * a == ~b)
+        self.assertFalse(a * b == b * a)
+        self.assertEqual(sorted(S3.index(g) for g in S3.elements), list(range(6)))
+        self.assertEqual(S3.elements[S3.table[S3.index(a), S3.index(b)]], a * b)
+        self.assertEqual(sorted(S3.permutation_representation([['a']])[1].tolist()), [0, 1, 2])
+
+        def symmetric(n):
+            relations = [[('s', 2)], [('t', n)], ['s', 't'] * (n - 1), ['s', ('t', -1), 's', 't'] * 3]
+            relations += [['s', ('t', -j), 's', ('t', j)] * 2 for j in range(2, n // 2 + 1)]
+            return relations
+
+        self.assertEqual(FiniteGroup(['s', 't'], symmetric(6)).order, 720)
+        self.assertEqual(FiniteGroup(['s', 't'], symmetric(6), strategy='felsch').order, 720)
+        self.assertEqual(cosets.coset_table(1, [[0] * 12], [[0, 0, 0]]).shape, (3, 2))
+
+    def test_shortlex_words(self):
+        relations = [[('s', 2)], [('t', 5)], ['s', 't'] * 4, ['s', ('t', -1), 's', 't'] * 3, ['s', ('t', -2), 's', ('t', 2)] * 2]
+        S5 = FiniteGroup(['s', 't'], relations)
+        self.assertEqual(S5.words[S5.index(S5([('t', 4)]))], [('t', -1)])
+        s, t = S5.generator_elements()
+        self.assertEqual((s * t) ** 4, S5.one)
+        self.assertEqual(len({g * h for g in S5.elements[:20] for h in S5.elements}), 120)
+        random.seed(2)
+        for _ in range(20):
+            word = [random.choice([('s', 1), ('t', 1), ('t', -1)]) for _ in range(50)]
+            self.assertEqual(S5(word), S5.elements[S5.index(S5(word))])
+        fresh, small = FiniteGroup(['s', 't'], relations), FiniteGroup(['s', 't'], relations, max_rules=5)
+        for _ in range(20):
+            word = [random.choice([('s', 1), ('t', 1), ('t', -1)]) for _ in range(50)]
+            self.assertEqual(fresh.normal_form(word), S5(word).sequence_of_generators)
+            self.assertEqual(small.normal_form(word), S5(word).sequence_of_generators)
+        self.assertNotIn('coset_table', vars(fresh))
+        self.assertEqual(len(fresh.rewriting_system), 36)
+        self.assertIsNone(small.rewriting_system)
+        self.assertEqual(rewriting.complete(1, [[0] * 4]).reduce([0, 0, 0]), [1])
+
+    def test_cayley_table(self):
+        relations = [[('s', 2)], [('t', 5)], ['s', 't'] * 4, ['s', ('t', -1), 's', 't'] * 3, ['s', ('t', -2), 's', ('t', 2)] * 2]
+        S5 = FiniteGroup(['s', 't'], relations)
+        self.assertEqual(S5.table.dtype, np.int32)
+        self.assertTrue((S5.table[np.arange(120), S5.inverses] == 0).all())
+        s, t = S5.generator_elements()
+        self.assertEqual(~(s * t), S5(S5.inverses[S5.index(s * t)]))
+        self.assertEqual(S5.index(s * t * s), S5.products(S5.products(s.value, t.value), s.value))
+        a, b = np.arange(120), np.arange(120)[::-1]
+        large = FiniteGroup(['s', 't'], relations, max_table_order=10)
+        self.assertTrue((large.products(a, b) == S5.products(a, b)).all())
+        self.assertTrue((large.conjugates(a, t.value) == S5.table[S5.table[S5.inverses[t.value], a], t.value]).all())
+        classes = {frozenset(S5.conjugates(g, a).tolist()) for g in range(120)}
+        self.assertEqual(sorted(map(len, classes)), [1, 10, 15, 20, 20, 24, 30])
+
+    def test_permutation_groups(self):
+        A9 = PermutationGroup([[(0, 1, 2)], [tuple(range(2, 9))]])
+        self.assertEqual(A9.order, 181440)
+        self.assertFalse(A9([(0, 1)]) in A9)
+        self.assertTrue(A9([(0, 1, 2, 3, 4)]) in A9)
+        self.assertEqual(A9.stabilizer(0).order, 20160)
+        x = A9.random_element()
+        self.assertTrue(x in A9 and x * ~x == A9.one)
+        p = 1009
+        AGL = PermutationGroup([[(x + 1) % p for x in range(p)], [11 * x % p for x in range(p)]])
+        self.assertEqual(AGL.order, p * (p - 1))
+        self.assertEqual(AGL.stabilizer(3).order, p - 1)
+        self.assertEqual(len(AGL.orbits()), 1)
+        self.assertTrue(AGL.random_element(random.Random(1)) == AGL.random_element(random.Random(1)))
+        n = 60
+        S = PermutationGroup([list(range(1, n)) + [0], [(0, 1)]], degree=n, deterministic=False)
+        self.assertEqual(S.order, math.factorial(n))
+        self.assertEqual(PermutationGroup([list(range(1, 20)) + [0], [(0, 1)]], degree=20).order, math.factorial(20))
+        relations = [[('s', 2)], [('t', 5)], ['s', 't'] * 4, ['s', ('t', -1), 's', 't'] * 3, ['s', ('t', -2), 's', ('t', 2)] * 2]
+        S5 = FiniteGroup(['s', 't'], relations)
+        self.assertEqual(S5.permutation_group().order, 120)
+        action = S5.permutation_group([['t']])
+        self.assertEqual((action.degree, action.order, len(action.orbit(0))), (24, 120, 24))
+
+    def test_free_groups(self):
+        F = FreeGroup(['a', 'b'])
+        a, b = F.generator_elements()
+        self.assertEqual(a * b * ~b * ~a, F.one)
+        self.assertEqual(len({a * b, a * b * b * ~b, b * a}), 2)
+        self.assertEqual(F(['a', ('b', 2), ('b', -3), 'a']).sequence_of_generators, [('a', 1), ('b', -1), ('a', 1)])
+        x = F(np.random.randint(0, 4, 10**5))
+        self.assertTrue(all(l != m ^ 1 for l, m in zip(x.value[1:], x.value[:-1])))
+        self.assertEqual(x * ~x, F.one)
+        even = [a * a, b, a * b * ~a]
+        self.assertEqual(F.subgroup_index(even), 2)
+        self.assertTrue(F.subgroup_contains(even, x * x))
+        self.assertFalse(F.subgroup_contains(even, a * b * b))
+        commutator = [a * b * ~a * ~b]
+        self.assertEqual(F.subgroup_index(commutator), math.inf)
+        self.assertTrue(F.subgroup_contains(commutator, (b * a * ~b * ~a) ** 3))
+        self.assertFalse(F.subgroup_contains(commutator, a * b))
+        self.assertEqual(len(F.stallings_graph(commutator)), 4)
+
+    def test_abelian_groups(self):
+        G = FreeAbelianGroup(['a', 'b', 'c'])
+        a, b, c = G.generator_elements()
+        self.assertEqual(a * ~a, G.one)
+        self.assertEqual(G([('a', 2), 'c']), a * a * c)
+        self.assertEqual(len({a * b, b * a, G([1, 1, 0])}), 1)
+        Q = G.quotient([[('a', 4)], [('a', 2), ('b', 6)], ['c', 'c', 'a']])
+        self.assertEqual(Q.structure(), 'Z/2 x Z/24')
+        x, y, z = Q.generator_elements()
+        self.assertEqual(z * z * x, Q.one)
+        self.assertNotEqual(x * x, Q.one)
+        self.assertEqual(x ** 5, x)
+        X = np.random.randint(-50, 50, (1000, 3))
+        relations = np.array([[4, 0, 0], [2, 6, 0], [1, 0, 2]])
+        B = Q.batch(X)
+        self.assertEqual(Q.batch(X + np.random.randint(-3, 3, (1000, 3)) @ relations), B)
+        self.assertTrue((-B + B).equal(Q.one).all())
+        self.assertEqual(len(B.unique()), 48)
+        self.assertEqual(B[0], Q(X[0]))
+        F = FPAbelianGroup(['f'], [[('f', 6125369338)]])
+        self.assertEqual(F([('f', -5)]).value.tolist(), [6125369333])
+        generators = [f'g{i}' for i in range(12)]
+        relations = np.random.RandomState(1).randint(-50, 51, (12, 12)).tolist()
+        H = FPAbelianGroup(generators, relations)
+        g = H(np.random.RandomState(2).randint(-10**6, 10**6, 12))
+        self.assertEqual(H(relations[0]), H.one)
+        self.assertEqual(H.mul(H.mul(g, g), H.inv(g)), g)
+        self.assertTrue(all(0 <= n < math.prod(H.moduli.tolist()) for n in H.mul(g, g).value))
+
+    def test_conjugacy_classes(self):
+        relations = [[('s', 2)], [('t', 5)], ['s', 't'] * 4, ['s', ('t', -1), 's', 't'] * 3, ['s', ('t', -2), 's', ('t', 2)] * 2]
+        S5 = FiniteGroup(['s', 't'], relations)
+        self.assertEqual(sorted(S5.class_sizes.tolist()), [1, 10, 15, 20, 20, 24, 30])
+        self.assertEqual(S5.exponent, 60)
+        s, t = S5.generator_elements()
+        conjugates = {S5.index(~x * s * x) for x in S5.elements}
+        self.assertEqual(conjugates, set(S5.conjugacy_classes[S5.class_index[S5.index(s)]].tolist()))
+        self.assertEqual(len(S5.centralizer(t)), S5.centralizer_orders[S5.class_index[S5.index(t)]])
+        self.assertEqual(S5.class_orders[S5.power_map(2)[S5.class_index[S5.index(s)]]], 1)
+        c = S5.class_structure_constants
+        self.assertTrue((c.sum(axis=(0, 1)) == 120).all())
+        self.assertTrue((c[0, :, :] == np.eye(7, dtype=int)).all())
+        large = FiniteGroup(['s', 't'], relations, max_table_order=10)
+        self.assertEqual(len(large.centralizer(t)), 5)
+        self.assertEqual(sorted(large.class_sizes.tolist()), sorted(S5.class_sizes.tolist()))
+
+    def test_charpoly_and_powers(self):
+        Q = QField()
+        A, = Matrix.fill_free_coefficients(Q, 5)
+        chi = A.charpoly()
+        self.assertEqual(len(chi), 6)
+        self.assertEqual(chi[1], -A.trace())
+        self.assertEqual(-chi[5], A.det())
+        B, = Matrix.fill_free_coefficients(Q, 3)
+        self.assertEqual(B.det(), B._laplace_det())
+        M = B.identity_matrix(3) * B.ring.zero
+        for c in B.charpoly():
+            M = M @ B + B.identity_matrix(3) * c
+        self.assertEqual(M, 0)
+
+        Z, F = ZRing(), FpField(101)
+        values = [[1, 1, 0], [1, 0, 2], [0, 3, 1]]
+        for ring in [Z, F]:
+            C = Matrix([[ring(v) for v in row] for row in values])
+            self.assertEqual(C.charpoly(), [ring(v) for v in [1, -2, -6, 7]])
+            power = C.identity_matrix(3)
+            for _ in range(100):
+                power = power @ C
+            self.assertEqual(C ** 100, power)
+        self.assertEqual(Matrix([[F(2), F(0)], [F(0), F(3)]]) ** (10**30), Matrix([[F(pow(2, 10**30, 101)), F(0)], [F(0), F(pow(3, 10**30, 101))]]))
+
+    def test_interpolation_det(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        c = lambda a, b=1: P.from_terms({(0, 0): Q(a, b)})
+        A = Matrix([[x * c(1, 2) + y, y, c(3), x], [x * x, c(1, 3), y, c(1)], [c(1), x, y * y, x * y], [x, x + y, c(1), c(2, 5) * y]])
+        self.assertEqual(A.det(), A._berkowitz_det())
+        self.assertEqual(A.charpoly()[2], sum([A.submatrix([i, j], [i, j], keep=True).det() for i in range(4) for j in range(i + 1, 4)], P.zero))
+
+        F = FpField(65537)
+        PF = PolynomialAlgebra(F, 2)
+        u, v = PF.generator_elements
+        B = Matrix([[u, v, u * v, u * u], [u * u, PF.one, v, PF.one], [PF.one, u, v * v, u * v], [u, u + v, PF.one, v]])
+        self.assertEqual(B.det(), B._berkowitz_det())
+
+        Z = ZRing()
+        p = next(interpolation.primes())
+        stack = np.array([[[2, 1], [1, 3]], [[0, 1], [1, 0]], [[2, 4], [1, 2]]])
+        self.assertEqual(list(interpolation.det_mod(stack, p)), [5, p - 1, 0])
+        values = lambda points, q: (3 * points[:, 0] ** 2 * points[:, 1] - 7 * 10**12) % q
+        f = interpolation.integer_interpolate(lambda points, q: values(points.astype(object), q), 2, [2, 1], lambda f, q, point: True)
+        self.assertEqual(f, {(2, 1): 3, (0, 0): -7 * 10**12})
+
+    def test_module_batches(self):
+        for ring in [ZRing(), FpField(7), RFloating()]:
+            F3, F2 = FreeFGModule(ring, 3), FreeFGModule(ring, 2)
+            images = {'v_0': F2([ring(1), ring(2)]), 'v_1': F2([ring(0), ring(1)]), 'v_2': F2([ring(3), ring(-1)])}
+            f = ModuleMorphism(F3, F2, lambda g: images[g])
+            v = F3([ring(1), ring(1), ring(2)])
+            self.assertEqual(f(v), F2([ring(7), ring(1)]))
+            self.assertEqual(v - v, 0)
+            self.assertEqual(v * ring(2), v + v)
+            B = F3.batch(np.arange(30).reshape(10, 3) % 5)
+            self.assertEqual(len(B), 10)
+            self.assertEqual((B + B)[3], B[3] + B[3])
+            self.assertEqual((B * ring(3))[2], B[2] * ring(3))
+            self.assertEqual(B + v, F3.batch([e + v for e in B]))
+            image = f(B)
+            self.assertTrue(all(image[i] == f(B[i]) for i in range(10)))
+
+        Z = ZRing()
+        F = FreeFGModule(Z, 2)
+        B = F.batch([F([Z(2**61), Z(1)]), F([Z(1), Z(2)])])
+        self.assertEqual((B + B)[0].coefficients[0], Z(2**62))
+        self.assertEqual((B * [Z(1), Z(-1)])[1], F([Z(-1), Z(-2)]))
+
+    def test_kernel_image_cokernel(self):
+        Z = ZRing()
+        F3, F2 = FreeFGModule(Z, 3), FreeFGModule(Z, 2)
+        images = [F2([Z(2), Z(4)]), F2([Z(0), Z(6)]), F2([Z(2), Z(10)])]
+        position = {g: i for i, g in enumerate(F3.generators)}
+        f = ModuleMorphism(F3, F2, lambda g: images[position[g]])
+        kernel = f.kernel()
+        self.assertIs(kernel, f.kernel())
+        self.assertEqual(kernel.domain.no_generators, 1)
+        self.assertEqual(f(kernel.images[0]), F2.zero)
+        self.assertEqual(f.image().domain.no_generators, 2)
+        self.assertEqual(f.cokernel().codomain.structure(), 'Z/2 + Z/6')
+
+        Fp = FpField(101)
+        D, C = FreeFGModule(Fp, 300), FreeFGModule(Fp, 200)
+        rng = np.random.default_rng(1)
+        A = np.zeros((200, 300), dtype=np.int64)
+        for j in range(300):
+            A[rng.integers(0, 200, 2), j] = rng.integers(1, 101, 2)
+        images = [C(A[:, j].copy()) for j in range(300)]
+        g = ModuleMorphism(D, C, lambda v: images[int(v[2:])])
+        rank = Matrix(A, Fp).rank()
+        self.assertEqual(g.image().domain.no_generators, rank)
+        self.assertEqual(g.kernel().domain.no_generators, 300 - rank)
+        self.assertTrue(all(e == C.zero for e in g(D.batch(g.kernel().images))))
+
+        P = KPolynomialAlgebra(QField(), 2)
+        x, y = P.generator_elements
+        P2, P1 = FreeFGModule(P, 2), FreeFGModule(P, 1)
+        h = ModuleMorphism(P2, P1, lambda v: P1([x]) if v == 'v_0' else P1([y]))
+        self.assertEqual(h.kernel().domain.groebner_basis(), [P2([y, -x])])
+        self.assertTrue(P1([x * y]) in h.image().domain)
+
+    def test_module_groebner_bases(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        F = FreeFGModule(P, 2)
+        M = F.submodule([[x, y], [y * y, x * x]])
+        a, b = x * x + y, x
+        v = F([a * x + b * y * y, a * y + b * x * x])
+        self.assertTrue(v in M)
+        self.assertEqual(M.reduce(v), F.zero)
+        self.assertEqual(M.contains([v, v + F([P.one, P.zero]), F([P.zero, x ** 3 - y ** 3])]), [True, False, True])
+        self.assertEqual(len(M.groebner_basis('pot')), 3)
+        self.assertEqual(len(M.groebner_basis('top')), 2)
+        N = F.submodule([[x, y], [y * y, x * x], [x * x, x * y]], order='top')
+        self.assertTrue(M == N)
+        self.assertTrue(F.submodule([[x * x, x * y]]) <= M)
+        self.assertFalse(M <= F.submodule([[x, y]]))
+
+        engine = groebner.ModuleGroebnerEngine(Q, P.order.key)
+        self.assertIsNone(engine.lcm((0, (1, 0)), (1, (0, 1))))
+        self.assertFalse(engine.divides((0, (1, 0)), (1, (2, 0))))
+
+    def test_resolutions(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 4)
+        x, y, z, w = P.generator_elements
+        twisted_cubic = HomogeneousIdeal([x * z - y * y, x * w - y * z, y * w - z * z])
+        r = twisted_cubic.resolution()
+        self.assertEqual(r.ranks, [1, 3, 2])
+        self.assertEqual(r.betti_numbers(), {(0, 0): 1, (1, 2): 3, (2, 3): 2})
+        product = r.differential(1) @ r.differential(2)
+        self.assertTrue(all(c == P.zero for row in product.coefficients for c in row))
+        self.assertEqual(KPolynomialIdeal([x, y, z]).betti_numbers(), {(0, 0): 1, (1, 1): 3, (2, 2): 3, (3, 3): 1})
+        self.assertEqual(KPolynomialIdeal([x, y, x + y, x * y]).resolution().ranks, [1, 2, 1])
+        self.assertEqual(KPolynomialIdeal([x, x + 1]).resolution().ranks, [0])
+        self.assertEqual(KPolynomialIdeal([x, x + 1]).betti_numbers(), {})
+        self.assertEqual(FreeFGModule(P, 2).submodule([[P.one, x], [P.zero, y]]).resolution().ranks, [1, 1])
+        for s in twisted_cubic.syzygies().generators:
+            self.assertEqual(sum([c * g for c, g in zip(s.coefficients, twisted_cubic.generators)], start=P.zero), P.zero)
+        self.assertRaises(ValueError, HomogeneousIdeal, [x * y - z])
+
+        F = FreeFGModule(P, 2)
+        self.assertEqual(F.submodule([[x, y], [z, w]]).betti_numbers(), {(0, 0): 2, (1, 1): 2})
+
+    def test_ideal_operations(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 3)
+        x, y, z = P.generator_elements
+        I = KPolynomialIdeal([x**2 - y, x**3 - z])
+        self.assertTrue(x*z - y**2 in I)
+        self.assertFalse(x*y in I)
+        self.assertEqual(I.eliminate(['x']), KPolynomialIdeal([y**3 - z**2]))
+
+        A, B = KPolynomialIdeal([x]), KPolynomialIdeal([y])
+        self.assertEqual(A.intersect(B), A*B)
+        self.assertEqual(A + B, KPolynomialIdeal([y, x]))
+        self.assertEqual(KPolynomialIdeal([x*y, x*z]).colon(A), KPolynomialIdeal([y, z]))
+        self.assertEqual(KPolynomialIdeal([x**2*y, x*y**2]).saturate(x), KPolynomialIdeal([y]))
+        G = [x * Q(2), y * Q(3), x * y + x]
+        self.assertEqual(KPolynomialIdeal(G, groebner=G), KPolynomialIdeal([x, y]))
+
+    def test_zero_dimensional_quotient(self):
+        for K in [QField(), RFloating(), FpField(7)]:
+            P = KPolynomialAlgebra(K, 2)
+            x, y = P.generator_elements
+            A = KPolynomialIdeal([x**2 - y - K.one, y**2 - x*K(2)]).quotient_algebra()
+            self.assertEqual(A.standard_monomials, [(0, 0), (0, 1), (1, 0), (1, 1)])
+            X, Y = A.generator_elements
+            self.assertEqual(X*X, Y + A.one)
+            self.assertEqual(X*X*X*Y, A(x**3*y))
+            self.assertEqual(A.to_polynomial(X*X*X*Y), x*y + y*K(2) + K(2))
+        self.assertIsNone(KPolynomialIdeal([x*y]).quotient_algebra().dimension)
+        self.assertEqual(str(KPolynomialIdeal([x*y]).quotient_algebra()(x**2*y + x)), 'x + (xy)')
+
+    def test_normal_form_cache(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        A = KPolynomialIdeal([x*y - Q.one]).quotient_algebra()
+        A.set_normal_form_cache_size(2)
+        self.assertEqual(A(x**2*y + x), A(x*Q(2)))
+        self.assertEqual(A(x**2*y**3), A(y))
+        self.assertEqual(A(x**2*y**3), A(y))
+        info = A.normal_form_cache_info()
+        self.assertEqual((info.maxsize, info.currsize), (2, 2))
+        self.assertGreater(A.normal_form_hit_rate, 0)
+        F = FpField(7)
+        P = KPolynomialAlgebra(F, 2)
+        x, y = P.generator_elements
+        B = KPolynomialIdeal([x**3 - y - F.one, y**2 - x]).quotient_algebra()
+        self.assertEqual(B(x**3000 * y), B(x**1500) * B(x**1500 * y))
+        self.assertTrue((B.multiplication_matrix(B(x)) == B.multiplication_matrices[0]).all())
+        F = FpField(2**31 - 1)
+        P = KPolynomialAlgebra(F, 2)
+        x, y = P.generator_elements
+        I = KPolynomialIdeal([x**3 - y*F(123456789) - F(987654321), y**2 - x*F(2**30 + 7) - F(5)])
+        C = I.quotient_algebra()
+        f = sum([x**i * y**j * F(2**31 - 2 - 17*i - j) for i in range(6) for j in range(6)], start=P.zero)
+        self.assertEqual(C.to_polynomial(C(f)), I.groebner_reminder(f))
+        for e in [5, 10, 20, 40, 100]:
+            self.assertEqual(C.to_polynomial(C(x**e * y)), I.groebner_reminder(x**e * y))
+
+    def test_zero_dimensional_solve(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        X = AffineScheme(KPolynomialIdeal([x**2 + y**2 - Q.one, x - y]).quotient_algebra())
+        points = X.solve()
+        self.assertEqual(points.shape, (2, 2))
+        self.assertTrue(np.allclose(sorted(points[:, 0].real), [-np.sqrt(.5), np.sqrt(.5)]))
+        self.assertTrue(np.allclose(points[:, 0], points[:, 1]))
+        self.assertEqual(KPolynomialIdeal([x**2, y - x]).quotient_algebra().solve().shape, (1, 2))
+
+    def test_structure_sheaf(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        A = KPolynomialIdeal([x**2 + y**2 - Q.one]).quotient_algebra()
+        X = AffineScheme(A)
+        Dx, Dy = DistinguishedOpen(A(x)), DistinguishedOpen(A(y))
+        Ax = X.sections_general(Dx)
+        self.assertIs(X.sections_general(DistinguishedOpen(A(x * Q(3) + (x**2 + y**2 - Q.one)))), Ax)
+        Axy = X.sections_general(Dx * Dy)
+        self.assertIs(X.sections_general(Dy * Dx), Axy)
+        self.assertEqual(len(Axy.ideal.ring.generators), 4)
+        r = X.restriction_general(Dx, Dy)
+        self.assertIs(X.restriction_general(Dx, Dy), r)
+        _, w, t = Ax.ideal.ring.generator_elements
+        u, v = Axy.ideal.ring.generator_elements[:2]
+        self.assertEqual(r(Ax(t)) * Axy(u), Axy.one)
+        self.assertEqual(r(Ax(w)), Axy(v))
+        self.assertEqual(X.structure_sheaf.cache_info().currsize, 2)
+        sheaf = StructureSheaf(P, maxsize=2)
+        for f in [x, y, x + y, x]:
+            sheaf.sections(f)
+        self.assertEqual(sheaf.cache_info()[:2], (0, 4))
+
+    def test_projective_charts(self):
+        Q = QField()
+        X = ProjectiveSpace(Q, 2)
+        self.assertIs(X(1), X(1))
+        self.assertEqual(X(2).generators, ['x_0/x_2', 'x_1/x_2'])
+        T = X.transition(0, 1)
+        self.assertIs(X.transition(0, 1), T)
+        D01 = X.intersection(0, 1)
+        s, y, t = D01.ideal.ring.generator_elements
+        u, v, w = X.intersection(1, 0).ideal.ring.generator_elements
+        self.assertEqual(T(D01(s)), T.codomain(w))
+        self.assertEqual(T(D01(t)), T.codomain(u))
+        for f in [s, y, t, s * y + t * t]:
+            self.assertEqual(X.transition(1, 0)(T(D01(f))), D01(f))
+        x0, x1, x2 = X.coordinate_ring.generator_elements
+        fs = [x0**2 + x1 * x2, x1**3 - x0 * x1 * x2 + x2**3]
+        a, b = X(1).generator_elements
+        self.assertEqual(X.dehomogenize(fs, 1), [a**2 + b, X(1).one - a * b + b**3])
+        self.assertEqual(X.homogenize(X.dehomogenize(fs, 1), 1), fs)
+
+    def test_point_counting(self):
+        Q = QField()
+        P = KPolynomialAlgebra(Q, 2)
+        x, y = P.generator_elements
+        E = AffineScheme(KPolynomialIdeal([y**2 - x**3 - x - Q.one]).quotient_algebra())
+        self.assertEqual([E.count_points(p) for p in (5, 7, 11)], [8, 4, 13])
+        self.assertEqual(E.count_points(7, chunk_size=10, processes=2), 4)
+        S = KPolynomialAlgebra(Q, 3)
+        X, Y, Z = S.generator_elements
+        C = ProjectiveScheme(HomogeneousIdeal([Y**2 * Z - X**3 - X * Z**2 - Z**3]))
+        for p in (5, 7):
+            a = p + 1 - C.count_points(p)
+            self.assertEqual(C.count_points(p, 2), p**2 + 1 - (a**2 - 2 * p))
+            self.assertEqual(C.count_points(p, 3, method='triangular'), p**3 + 1 - (a**3 - 3 * p * a))
+        self.assertEqual(ProjectiveSpace(Q, 2).count_points(3, 2), 81 + 9 + 1)
+        Z0 = AffineScheme(KPolynomialIdeal([x**2 - Q(2), x * y - Q.one]).quotient_algebra())
+        self.assertEqual([Z0.count_points(7), Z0.count_points(5), Z0.count_points(5, 2)], [2, 0, 2])
+        F = finite_fields.galois_field(2, 8)
+        self.assertEqual(len(set(F.log.tolist())), 255)
+
+    def test_homotopy_continuation(self):
+        C = CFloating()
+        P = KPolynomialAlgebra(C, 3)
+        x, y, z = P.generator_elements
+        I = KPolynomialIdeal([x**2 + y**2 + z**2 - C.one, x * y - z, x - y * C(2)])
+        points = AffineScheme(I.quotient_algebra()).homotopy_solve(seed=0)
+        self.assertEqual(points.shape, (4, 3))
+        self.assertTrue(np.allclose(points[:, 0], 2 * points[:, 1]))
+        self.assertTrue(np.allclose(points[:, 2], points[:, 0] * points[:, 1]))
+        self.assertEqual(I.homotopy_solve(processes=2, seed=0).shape, (4, 3))
+        system = numeric.PolynomialSystem([{(2, 0): 1, (0, 1): -1}, {(2, 0): 1, (0, 0): -1}], 2)
+        _, status = numeric.solve_total_degree(system, seed=1)
+        self.assertEqual(sorted(status), [numeric.AT_INFINITY] * 2 + [numeric.CONVERGED] * 2)
+        for seed in range(3):
+            points, status = numeric.solve_total_degree(numeric.PolynomialSystem([{(2, 0): 1, (0, 1): -1}, {(0, 2): 1}], 2), seed=seed)
+            self.assertTrue((status == numeric.CONVERGED).all() and np.abs(points).max() < 1e-8)
+        singular = KPolynomialIdeal([x**2, y**3 - x, z - y]).homotopy_solve(seed=0)
+        self.assertTrue(singular.shape == (1, 3) and np.abs(singular).max() < 1e-8)
+        with self.assertRaises(ValueError):
+            KPolynomialIdeal([x - y]).homotopy_solve()
+
     def test_graded(self):
         pass
 